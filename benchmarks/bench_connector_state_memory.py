@@ -0,0 +1,161 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+Compares the peak RSS growth of scanning connectors spread across clusters, when the scans keep kafka_connect_api
+Connector objects with their status, info and a metrics dict per connector, and with the ConnectorState records.
+Each representation is measured in its own process, so that they do not share the allocator high-water mark.
+
+Usage: poetry run python benchmarks/bench_connector_state_memory.py [connectors] [clusters]
+"""
+
+from __future__ import annotations
+
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from compose_x_common.compose_x_common import set_else_none
+from kafka_connect_api.kafka_connect_api import Connector, Task
+
+from kafka_connect_watcher.connectors_eval import evaluate_connector
+from kafka_connect_watcher.error_rules import EvaluationRule
+from kafka_connect_watcher.logger import LOG
+from kafka_connect_watcher.snapshot import ClusterSnapshot, import_connectors_snapshot
+
+
+class LegacyTask(Task):
+    def __init__(self, connector: LegacyConnector, task_status: dict):
+        super().__init__(connector, int(task_status["id"]), {})
+        self._status: dict = task_status
+
+    @property
+    def state(self) -> str:
+        return set_else_none("state", self._status, "UNKNOWN")
+
+
+class LegacyConnector(Connector):
+    """The connectors snapshot as it was, holding the status & info payloads"""
+
+    def __init__(self, cluster, name: str, status: dict, info: dict):
+        super().__init__(cluster, name)
+        self.scan_status: dict = status
+        self._info: dict = info
+        self._tasks: list[LegacyTask] = [
+            LegacyTask(self, _task) for _task in set_else_none("tasks", status, [])
+        ]
+
+    @property
+    def state(self) -> str:
+        return set_else_none(
+            "state", set_else_none("connector", self.scan_status, {}), "UNKNOWN"
+        )
+
+    @property
+    def tasks(self) -> list[LegacyTask]:
+        return self._tasks
+
+
+def legacy_scan(payload: dict) -> tuple:
+    connectors: dict = {
+        connector_name: LegacyConnector(
+            None, connector_name, definition["status"], definition["info"]
+        )
+        for connector_name, definition in payload.items()
+    }
+    metrics: dict = {
+        connector_name: {
+            "tasks": len(connector.tasks),
+            "running": len([_t for _t in connector.tasks if _t.state == "RUNNING"]),
+            "failed": len([_t for _t in connector.tasks if _t.state == "FAILED"]),
+            "unassigned": len(
+                [_t for _t in connector.tasks if _t.state == "UNASSIGNED"]
+            ),
+        }
+        for connector_name, connector in connectors.items()
+    }
+    return connectors, metrics
+
+
+def records_scan(payload: dict) -> tuple:
+    snapshot = ClusterSnapshot(import_connectors_snapshot(payload))
+    rule = EvaluationRule({}, {})
+    for connector_name in snapshot.connectors_names:
+        evaluate_connector(rule, snapshot[connector_name])
+    return snapshot, dict(snapshot.connectors)
+
+
+def cluster_payload(cluster_index: int, connectors: int) -> str:
+    payload: dict = {}
+    for index in range(connectors):
+        name = f"cluster-{cluster_index}-connector-{index}"
+        tasks = [
+            {"id": task_id, "state": "RUNNING", "worker_id": f"10.0.{task_id}.1:8083"}
+            for task_id in range(1 + index % 4)
+        ]
+        payload[name] = {
+            "status": {
+                "name": name,
+                "connector": {"state": "RUNNING", "worker_id": "10.0.0.1:8083"},
+                "tasks": tasks,
+                "type": "sink",
+            },
+            "info": {
+                "name": name,
+                "config": {
+                    "connector.class": "io.confluent.connect.s3.S3SinkConnector",
+                    "tasks.max": str(len(tasks)),
+                    "topics.regex": f"^cluster-{cluster_index}.topic-{index}.*$",
+                    "s3.bucket.name": f"bucket-{cluster_index}",
+                    "s3.region": "eu-west-1",
+                    "flush.size": "10000",
+                    "rotate.interval.ms": "600000",
+                    "format.class": "io.confluent.connect.s3.format.parquet.ParquetFormat",
+                    "key.converter": "org.apache.kafka.connect.storage.StringConverter",
+                    "value.converter": "io.confluent.connect.avro.AvroConverter",
+                    "value.converter.schema.registry.url": "http://schema-registry:8081",
+                    "name": name,
+                },
+                "tasks": [{"connector": name, "task": _task["id"]} for _task in tasks],
+                "type": "sink",
+            },
+        }
+    return json.dumps(payload)
+
+
+def measure(mode: str, connectors: int, clusters: int) -> None:
+    LOG.disabled = True
+    scan = legacy_scan if mode == "objects" else records_scan
+    per_cluster = connectors // clusters
+    responses: list[str] = [
+        cluster_payload(index, per_cluster) for index in range(clusters)
+    ]
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    retained: list = []
+    for response in responses:
+        retained.append(scan(json.loads(response)))
+    duration = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    print(f"{mode:>8} {(peak - baseline) / 1024:>15.1f} {duration * 1000:>10.1f}")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == "--mode":
+        measure(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+        return
+    connectors = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    clusters = int(sys.argv[2]) if len(sys.argv) > 2 else 30
+    print(f"{connectors} connectors across {clusters} clusters")
+    print(f"{'snapshot':>8} {'RSS growth (MB)':>15} {'time (ms)':>10}", flush=True)
+    for mode in ("objects", "records"):
+        subprocess.run(
+            [sys.executable, __file__, "--mode", mode, str(connectors), str(clusters)],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+Compares the per-pattern connector filtering loop with EvaluationRule.filter_out_connector, for 5k connectors
+names and 50 patterns (25 include, 25 exclude), on the first scan and on the following ones.
+
+Usage: poetry run python benchmarks/bench_connectors_filter.py [connectors] [patterns]
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import time
+from unittest.mock import MagicMock
+
+from kafka_connect_watcher.error_rules import EvaluationRule
+from kafka_connect_watcher.logger import LOG
+
+
+def legacy_filter_out_connector(
+    include_regexes: list[re.Pattern],
+    exclude_regexes: list[re.Pattern],
+    connector_name: str,
+    cluster_name: str,
+):
+    """The filtering as it was before the regexes were combined"""
+    if exclude_regexes:
+        for regex in exclude_regexes:
+            if regex.match(connector_name):
+                LOG.info(
+                    f"{cluster_name} - Connector {connector_name} ignored by exclude_regex"
+                )
+                return False
+    for regex in include_regexes:
+        LOG.debug(regex.pattern)
+        LOG.debug(regex.match(connector_name))
+        if regex.match(connector_name):
+            return True
+
+
+def main():
+    connectors_count = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    patterns_count = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    LOG.disabled = True
+    include = [f"^team-{index}-.*" for index in range(patterns_count // 2)]
+    exclude = [f".*-replicator-{index}$" for index in range(patterns_count // 2)]
+    names = [
+        f"team-{index % patterns_count}-connector-{index}"
+        + (f"-replicator-{index % 30}" if index % 7 == 0 else "")
+        for index in range(connectors_count)
+    ]
+    cluster = MagicMock()
+    cluster.name = "benchmark"
+    rule = EvaluationRule(
+        {"include_regex": include, "exclude_regex": exclude},
+        MagicMock(notification_channels={}),
+    )
+
+    start = time.perf_counter()
+    legacy = [
+        legacy_filter_out_connector(
+            rule.include_regexes, rule.exclude_regexes, name, cluster.name
+        )
+        for name in names
+    ]
+    legacy_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    first_scan = [rule.filter_out_connector(name, cluster) for name in names]
+    first_scan_duration = time.perf_counter() - start
+
+    start = time.perf_counter()
+    next_scan = [rule.filter_out_connector(name, cluster) for name in names]
+    next_scan_duration = time.perf_counter() - start
+
+    assert [bool(result) for result in legacy] == first_scan == next_scan
+    print(f"{connectors_count} connectors, {patterns_count} patterns")
+    print(f"{'per-pattern loop':>20}: {legacy_duration * 1000:8.2f} ms")
+    print(f"{'combined, 1st scan':>20}: {first_scan_duration * 1000:8.2f} ms")
+    print(f"{'combined, next scans':>20}: {next_scan_duration * 1000:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
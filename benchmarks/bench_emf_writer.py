@@ -0,0 +1,133 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+Compares the EMF documents, writes, bytes and time spent to publish the metrics of one cluster scan, with one
+metric_scope flush per connector and with the EmfBatchWriter, writing to stdout (local environment).
+
+Usage: poetry run python benchmarks/bench_emf_writer.py [connectors]
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+from asyncio import new_event_loop, set_event_loop
+from contextlib import redirect_stdout
+from os import environ
+from unittest.mock import MagicMock
+
+environ.setdefault("AWS_EMF_ENVIRONMENT", "local")
+
+from aws_embedded_metrics import metric_scope
+from aws_embedded_metrics.storage_resolution import StorageResolution
+
+from kafka_connect_watcher.aws_emf import EmfBatchWriter
+from kafka_connect_watcher.connectors_eval import get_connector_metrics
+from kafka_connect_watcher.logger import LOG
+from kafka_connect_watcher.snapshot import ConnectorState
+
+
+class CountingOutput:
+    def __init__(self):
+        self.documents: int = 0
+        self.bytes: int = 0
+        self.writes: int = 0
+
+    def write(self, content: str) -> int:
+        self.writes += 1
+        self.documents += content.count("\n")
+        self.bytes += len(content.encode())
+        return len(content)
+
+    def flush(self):
+        pass
+
+
+@metric_scope
+def publish_cluster_metrics(cluster, metrics) -> None:
+    metrics.reset_dimensions(use_default=False)
+    metrics.set_property("ConnectDetails", {"designation": cluster.name})
+    metrics.put_dimensions(
+        {**cluster.emf_config.dimensions, "ConnectCluster": cluster.name}
+    )
+    for metric_name, value in cluster.metrics.items():
+        if not isinstance(value, (int, str)):
+            continue
+        metrics.put_metric(metric_name, value, None, cluster.emf_config.emf_resolution)
+
+
+@metric_scope
+def publish_connector_metrics(
+    cluster, connector_name, connector_metrics, metrics
+) -> None:
+    metrics.set_namespace(cluster.emf_config.namespace)
+    metrics.reset_dimensions(use_default=False)
+    metrics.set_property("ConnectDetails", {"designation": cluster.name})
+    metrics.put_dimensions(
+        {
+            **cluster.emf_config.dimensions,
+            "ConnectorName": connector_name,
+            "ConnectCluster": cluster.name,
+        }
+    )
+    for metric_name, value in connector_metrics.items():
+        metrics.put_metric(metric_name, value, None, cluster.emf_config.emf_resolution)
+
+
+def legacy_publish(cluster) -> None:
+    """The publication as it was, one metric_scope per connector"""
+    publish_cluster_metrics(cluster)
+    for connector_name, connector in cluster.metrics["connectors"].items():
+        publish_connector_metrics(
+            cluster, connector_name, get_connector_metrics(connector)
+        )
+
+
+def main():
+    connectors = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    LOG.disabled = True
+    set_event_loop(new_event_loop())
+    cluster = MagicMock()
+    cluster.name = "benchmark"
+    cluster.emf_config.namespace = "KafkaConnect/Watcher"
+    cluster.emf_config.emf_resolution = StorageResolution.STANDARD
+    cluster.emf_config.dimensions = {"Environment": "benchmark"}
+    cluster.metrics = {
+        "total": connectors,
+        "ignored": 0,
+        "count": connectors,
+        "running": connectors,
+        "unassigned": 0,
+        "failed": 0,
+        "connectors": {
+            f"connector-{index}": ConnectorState(
+                f"connector-{index}", "RUNNING", (0, 1), ("RUNNING", "RUNNING")
+            )
+            for index in range(connectors)
+        },
+    }
+    cluster.unchanged_connectors = frozenset()
+    writer = EmfBatchWriter()
+
+    print(f"{connectors} connectors")
+    print(
+        f"{'publication':>14} {'documents':>10} {'writes':>10} {'bytes':>10} {'time (ms)':>10}"
+    )
+    for name, publish in (
+        ("metric_scope", legacy_publish),
+        ("batch writer", writer.write),
+    ):
+        output = CountingOutput()
+        start = time.perf_counter()
+        with redirect_stdout(output):
+            publish(cluster)
+        duration = time.perf_counter() - start
+        print(
+            f"{name:>14} {output.documents:>10} {output.writes:>10} {output.bytes:>10} "
+            f"{duration * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
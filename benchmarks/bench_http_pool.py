@@ -0,0 +1,101 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+Counts the connections (and therefore TLS handshakes) opened to a local stub Connect cluster for one scan
+retrieving the status of every connector, with the kafka_connect_api Api (one connection per request)
+and with the pooled ClusterApi.
+
+Usage: poetry run python benchmarks/bench_http_pool.py [connectors] [pool_size]
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from kafka_connect_api.kafka_connect_api import Api
+
+from kafka_connect_watcher.api import AdaptiveRateLimiter, ClusterApi
+
+STATUS_BODY: bytes = json.dumps(
+    {"connector": {"state": "RUNNING"}, "tasks": [{"id": 0, "state": "RUNNING"}]}
+).encode()
+
+
+class StubConnectServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubConnectHandler)
+        self.connections: int = 0
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class StubConnectHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(STATUS_BODY)))
+        self.end_headers()
+        self.wfile.write(STATUS_BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+def scan(server: StubConnectServer, api: Api, connectors: int, pool_size: int):
+    """Retrieves the status of all the connectors, returns the connections opened and the duration"""
+    connections_before = server.connections
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=pool_size) as executor:
+        list(
+            executor.map(
+                lambda index: api.get(f"/connectors/connector-{index}/status"),
+                range(connectors),
+            )
+        )
+    return server.connections - connections_before, time.perf_counter() - start
+
+
+def main():
+    connectors = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    pool_size = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    server = StubConnectServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    port = server.server_address[1]
+
+    print(f"{connectors} connectors, {pool_size} concurrent requests")
+    print(f"{'client':>12} {'connections/scan':>18} {'scan (s)':>10}")
+    for name, api in (
+        ("Api", Api("127.0.0.1", port=port)),
+        (
+            "ClusterApi",
+            ClusterApi(
+                "127.0.0.1",
+                port=port,
+                pool_size=pool_size,
+                max_concurrent_requests=pool_size,
+                rate_limiter=AdaptiveRateLimiter(max_rate=1_000_000),
+            ),
+        ),
+    ):
+        connections, duration = scan(server, api, connectors, pool_size)
+        print(f"{name:>12} {connections:>18} {duration:>10.3f}")
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+Measures the CPU consumed by idle cluster workers, waiting for clusters to process between two scans.
+Compares the former busy-wait loop (``if not queue.empty()``) with process_cluster.
+
+Usage: poetry run python benchmarks/bench_idle_workers.py [idle_seconds]
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from queue import Queue
+
+from kafka_connect_watcher.watcher import process_cluster
+
+BENCHMARK_STARTED = threading.Event()
+BENCHMARK_DONE = threading.Event()
+
+
+def busy_wait_process_cluster(queue: Queue):
+    """The worker loop as it was before blocking on the queue"""
+    BENCHMARK_STARTED.wait()
+    while not BENCHMARK_DONE.is_set():
+        if not queue.empty():
+            _watcher, _config, connect_cluster = queue.get()
+            if connect_cluster is None:
+                break
+            queue.task_done()
+
+
+def measure_idle_cpu(worker, workers_count: int, idle_seconds: float) -> float:
+    """Returns the CPU time consumed by the process per wall-clock second while the workers are idle"""
+    queue = Queue()
+    threads = [
+        threading.Thread(target=worker, args=(queue,), daemon=True)
+        for _ in range(workers_count)
+    ]
+    for _thread in threads:
+        _thread.start()
+    BENCHMARK_STARTED.set()
+    cpu_start = time.process_time()
+    wall_start = time.monotonic()
+    time.sleep(idle_seconds)
+    cpu_used = time.process_time() - cpu_start
+    wall_elapsed = time.monotonic() - wall_start
+    BENCHMARK_DONE.set()
+    for _ in threads:
+        queue.put([None, None, None], False)
+    for _thread in threads:
+        _thread.join()
+    BENCHMARK_STARTED.clear()
+    BENCHMARK_DONE.clear()
+    return cpu_used / wall_elapsed
+
+
+def main():
+    idle_seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    print(f"{'workers':>8} {'busy-wait (cpu s/s)':>20} {'blocking (cpu s/s)':>20}")
+    for workers_count in (1, 8, 64):
+        busy = measure_idle_cpu(busy_wait_process_cluster, workers_count, idle_seconds)
+        blocking = measure_idle_cpu(process_cluster, workers_count, idle_seconds)
+        print(f"{workers_count:>8} {busy:>20.3f} {blocking:>20.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+Compares the per-notification latency of an SnsChannel assuming a role, when creating a new session, STS
+assume-role and SNS client for each notification, and with the cached client, against a local STS/SNS stub.
+
+Usage: poetry run python benchmarks/bench_sns_client.py [notifications]
+"""
+
+from __future__ import annotations
+
+import sys
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from os import environ
+from urllib.parse import parse_qs
+
+from kafka_connect_watcher.aws_sns import SnsChannel
+
+ASSUME_ROLE_RESPONSE: str = """<AssumeRoleResponse xmlns="https://sts.amazonaws.com/doc/2011-06-15/">
+  <AssumeRoleResult>
+    <Credentials>
+      <AccessKeyId>ASIABENCHMARK</AccessKeyId>
+      <SecretAccessKey>benchmark</SecretAccessKey>
+      <SessionToken>benchmark</SessionToken>
+      <Expiration>{expiration}</Expiration>
+    </Credentials>
+    <AssumedRoleUser>
+      <AssumedRoleId>AROABENCHMARK:benchmark</AssumedRoleId>
+      <Arn>arn:aws:sts::123456789012:assumed-role/watcher/benchmark</Arn>
+    </AssumedRoleUser>
+  </AssumeRoleResult>
+  <ResponseMetadata><RequestId>benchmark</RequestId></ResponseMetadata>
+</AssumeRoleResponse>"""
+
+PUBLISH_RESPONSE: str = """<PublishResponse xmlns="http://sns.amazonaws.com/doc/2010-03-31/">
+  <PublishResult><MessageId>benchmark</MessageId></PublishResult>
+  <ResponseMetadata><RequestId>benchmark</RequestId></ResponseMetadata>
+</PublishResponse>"""
+
+
+class StubAwsServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), StubAwsHandler)
+        self.calls: dict[str, int] = {"AssumeRole": 0, "Publish": 0}
+
+
+class StubAwsHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode()
+        action = parse_qs(body)["Action"][0]
+        self.server.calls[action] += 1
+        if action == "AssumeRole":
+            expiration = datetime.now(tz=timezone.utc) + timedelta(minutes=15)
+            content = ASSUME_ROLE_RESPONSE.format(
+                expiration=expiration.strftime("%Y-%m-%dT%H:%M:%SZ")
+            )
+        else:
+            content = PUBLISH_RESPONSE
+        payload = content.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/xml")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    notifications = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    server = StubAwsServer()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    environ.update(
+        {
+            "AWS_ENDPOINT_URL": f"http://127.0.0.1:{server.server_address[1]}",
+            "AWS_DEFAULT_REGION": "eu-west-1",
+            "AWS_ACCESS_KEY_ID": "AKIABENCHMARK",
+            "AWS_SECRET_ACCESS_KEY": "benchmark",
+        }
+    )
+    channel = SnsChannel(
+        "benchmark",
+        {
+            "topic_arn": "arn:aws:sns:eu-west-1:123456789012:benchmark",
+            "role_arn": "arn:aws:iam::123456789012:role/watcher",
+        },
+    )
+
+    print(f"{notifications} notifications")
+    print(f"{'client':>10} {'assume-role':>12} {'ms/notification':>16}")
+    for name, publish in (
+        (
+            "per call",
+            lambda: channel.session.client("sns").publish(
+                TopicArn=channel.arn, Subject="benchmark", Message="benchmark"
+            ),
+        ),
+        ("cached", lambda: channel.publish("benchmark", "benchmark")),
+    ):
+        assume_role_before = server.calls["AssumeRole"]
+        start = time.perf_counter()
+        for _ in range(notifications):
+            publish()
+        duration = time.perf_counter() - start
+        print(
+            f"{name:>10} {server.calls['AssumeRole'] - assume_role_before:>12} "
+            f"{duration * 1000 / notifications:>16.2f}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,185 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+Connect API client keeping a pool of kept-alive HTTP connections per Connect cluster,
+limiting the concurrency and rate of the requests sent to it.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from requests import Response
+
+import threading
+from time import monotonic, sleep
+
+from kafka_connect_api.errors import evaluate_api_return
+from kafka_connect_api.kafka_connect_api import Api
+from requests import RequestException, Session
+from requests.adapters import HTTPAdapter
+from urllib3.util import Timeout
+
+from kafka_connect_watcher.logger import LOG
+
+DEFAULT_CONNECT_TIMEOUT: float = 5.0
+DEFAULT_READ_TIMEOUT: float = 30.0
+DEFAULT_MAX_CONCURRENT_REQUESTS: int = 10
+DEFAULT_REQUESTS_PER_SECOND: float = 100.0
+DEFAULT_MIN_REQUESTS_PER_SECOND: float = 1.0
+
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket limiting the rate of the requests sent to a connect cluster.
+    When the cluster answers with 429 or 5xx, or does not answer, the rate is halved, at most once per second
+    and down to min_rate. Each successful response then increases the rate additively, by about one request
+    per second, every second, back up to max_rate. A Retry-After returned with the 429 pauses the bucket.
+    """
+
+    def __init__(
+        self,
+        max_rate: float = DEFAULT_REQUESTS_PER_SECOND,
+        burst: int = None,
+        min_rate: float = DEFAULT_MIN_REQUESTS_PER_SECOND,
+    ):
+        self.max_rate: float = max_rate
+        self.min_rate: float = min(min_rate, max_rate)
+        self.rate: float = max_rate
+        self.burst: int = burst if burst else max(1, int(max_rate))
+        self._tokens: float = self.burst
+        self._updated_at: float = monotonic()
+        self._last_decrease: float = 0.0
+        self._lock = threading.Lock()
+        self.metrics: dict = {"throttled": 0, "waited_seconds": 0.0}
+
+    def reserve(self) -> float:
+        """Takes a token, returns the seconds to wait before sending the request"""
+        with self._lock:
+            now = monotonic()
+            if now > self._updated_at:
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+            self._tokens -= 1
+            wait = max(0.0, self._updated_at - now) + max(
+                0.0, -self._tokens / self.rate
+            )
+            self.metrics["waited_seconds"] += wait
+            return wait
+
+    def acquire(self) -> None:
+        delay = self.reserve()
+        if delay > 0:
+            sleep(delay)
+
+    def on_success(self) -> None:
+        with self._lock:
+            if self.rate < self.max_rate:
+                self.rate = min(self.max_rate, self.rate + 1 / self.rate)
+
+    def on_throttled(self, retry_after: float = None) -> None:
+        with self._lock:
+            now = monotonic()
+            self.metrics["throttled"] += 1
+            if retry_after:
+                self._updated_at = max(self._updated_at, now + retry_after)
+                self._tokens = min(self._tokens, 0)
+            if now - self._last_decrease < 1.0:
+                return
+            self._last_decrease = now
+            rate = max(self.min_rate, self.rate / 2)
+            if rate < self.rate:
+                LOG.warning(
+                    f"Connect cluster throttling: lowering requests rate to {rate:.1f}/s"
+                )
+            self.rate = rate
+
+    def on_response(self, status_code: int, retry_after: str = None) -> None:
+        if status_code == 429 or status_code >= 500:
+            try:
+                self.on_throttled(float(retry_after) if retry_after else None)
+            except ValueError:
+                self.on_throttled()
+        else:
+            self.on_success()
+
+
+class ClusterApi(Api):
+    """
+    Api which requests all go through a single requests Session, reusing up to ``pool_size`` connections
+    to the Connect cluster instead of opening (and TLS handshaking) a new connection for each request.
+    At most ``max_concurrent_requests`` requests are in flight at once, at the rate allowed by the rate limiter.
+    """
+
+    def __init__(
+        self,
+        *args,
+        pool_size: int = 10,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        total_timeout: float = None,
+        max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+        rate_limiter: AdaptiveRateLimiter = None,
+        **kwargs,
+    ):
+        super().__init__(*args, **kwargs)
+        self.pool_size: int = pool_size
+        self.semaphore = threading.BoundedSemaphore(max_concurrent_requests)
+        self.rate_limiter: AdaptiveRateLimiter = (
+            rate_limiter if rate_limiter else AdaptiveRateLimiter()
+        )
+        self.timeout = Timeout(
+            connect=connect_timeout, read=read_timeout, total=total_timeout
+        )
+        self.session = Session()
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=pool_size, pool_block=True
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request_raw(self, method: str, query_path: str, **kwargs) -> Response:
+        if not query_path.startswith(r"/"):
+            query_path = f"/{query_path}"
+        with self.semaphore:
+            self.rate_limiter.acquire()
+            try:
+                response = self.session.request(
+                    method,
+                    f"{self.url}{query_path}",
+                    auth=self.basic_auth,
+                    headers=self.headers,
+                    verify=self.verify_ssl,
+                    timeout=self.timeout,
+                    **kwargs,
+                )
+            except RequestException:
+                self.rate_limiter.on_throttled()
+                raise
+        self.rate_limiter.on_response(
+            response.status_code, response.headers.get("Retry-After")
+        )
+        return response
+
+    @evaluate_api_return
+    def get_raw(self, query_path, **kwargs) -> Response:
+        return self.request_raw("GET", query_path, **kwargs)
+
+    @evaluate_api_return
+    def post_raw(self, query_path, **kwargs) -> Response:
+        return self.request_raw("POST", query_path, **kwargs)
+
+    @evaluate_api_return
+    def put_raw(self, query_path, **kwargs) -> Response:
+        return self.request_raw("PUT", query_path, **kwargs)
+
+    @evaluate_api_return
+    def delete_raw(self, query_path, **kwargs) -> Response:
+        return self.request_raw("DELETE", query_path, **kwargs)
+
+    def close(self) -> None:
+        self.session.close()
@@ -0,0 +1,504 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+Asyncio based scan engine. Clusters scans, connectors status retrieval and corrective actions
+run as coroutines over a single, shared, HTTP client instead of threads.
+aiohttp, installed with the async extra, is only imported once the async engine is used.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Union
+
+if TYPE_CHECKING:
+    from aiohttp import ClientSession
+    from kafka_connect_watcher.api import AdaptiveRateLimiter
+    from kafka_connect_watcher.config import Config
+    from kafka_connect_watcher.error_rules import AutoCorrectRule, EvaluationRule
+    from kafka_connect_watcher.prometheus import PrometheusExporter
+    from kafka_connect_watcher.snapshot import ConnectorState
+
+import asyncio
+import signal
+from datetime import datetime as dt
+from json import loads
+
+from compose_x_common.compose_x_common import set_else_none
+from kafka_connect_api.errors import ConnectApiException
+
+from kafka_connect_watcher.aws_emf import (
+    EmfExporter,
+    handle_watcher_emf,
+    init_emf_config,
+    process_emf_exporter_metrics,
+)
+from kafka_connect_watcher.cluster import ConnectCluster
+from kafka_connect_watcher.connectors_eval import evaluate_connector
+from kafka_connect_watcher.logger import LOG
+from kafka_connect_watcher.notifications import (
+    NotificationDispatcher,
+    process_notifications_metrics,
+)
+from kafka_connect_watcher.sharding import Shard, process_shard_metrics
+from kafka_connect_watcher.snapshot import (
+    EXPANDED_CONNECTORS_PATH,
+    ClusterSnapshot,
+    ConnectorSnapshot,
+    import_connectors_snapshot,
+)
+
+
+class AsyncConnectApi:
+    """
+    Asynchronous counterpart of the kafka_connect_api Api for a Connect cluster.
+    Requests are sent over the shared client session, at most ``max_concurrent_requests`` at a time,
+    at the rate allowed by the rate limiter of the cluster.
+    """
+
+    def __init__(self, connect: ConnectCluster, session: ClientSession):
+        from aiohttp import BasicAuth, ClientError, ClientTimeout
+
+        self.url: str = connect.api.url
+        self.session = session
+        self.auth = (
+            BasicAuth(connect.api.username, connect.api.password)
+            if connect.api.username
+            else None
+        )
+        self.ssl = None if connect.api.verify_ssl else False
+        self.semaphore = asyncio.Semaphore(connect.max_concurrent_requests)
+        self.rate_limiter: AdaptiveRateLimiter = connect.rate_limiter
+        self.timeout = ClientTimeout(
+            total=connect.http_timeouts["total_timeout"],
+            sock_connect=connect.http_timeouts["connect_timeout"],
+            sock_read=connect.http_timeouts["read_timeout"],
+        )
+        self.connection_errors: tuple = (ClientError, asyncio.TimeoutError)
+
+    async def request(
+        self, method: str, query_path: str, **kwargs
+    ) -> Union[dict, list]:
+        if not query_path.startswith(r"/"):
+            query_path = f"/{query_path}"
+        async with self.semaphore:
+            delay = self.rate_limiter.reserve()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            try:
+                response = await self.session.request(
+                    method,
+                    f"{self.url}{query_path}",
+                    auth=self.auth,
+                    ssl=self.ssl,
+                    timeout=self.timeout,
+                    headers={
+                        "Content-type": "application/json",
+                        "Accept": "application/json",
+                    },
+                    **kwargs,
+                )
+            except self.connection_errors:
+                self.rate_limiter.on_throttled()
+                raise
+            async with response:
+                self.rate_limiter.on_response(
+                    response.status, response.headers.get("Retry-After")
+                )
+                if response.status not in [200, 201, 202, 204]:
+                    raise ConnectApiException(
+                        response.status, ((self, query_path), await response.text())
+                    )
+                body = await response.text()
+                return loads(body) if body else {}
+
+    async def get(self, query_path: str) -> Union[dict, list]:
+        return await self.request("GET", query_path)
+
+    async def post(self, query_path: str, **kwargs) -> Union[dict, list]:
+        return await self.request("POST", query_path, **kwargs)
+
+    async def put(self, query_path: str, **kwargs) -> Union[dict, list]:
+        return await self.request("PUT", query_path, **kwargs)
+
+
+async def get_snapshot(
+    connect: ConnectCluster, api: AsyncConnectApi
+) -> ClusterSnapshot:
+    """Async counterpart of ConnectCluster.get_snapshot"""
+    connectors = await api.get(EXPANDED_CONNECTORS_PATH)
+    if isinstance(connectors, list):
+        statuses = await asyncio.gather(
+            *[
+                api.get(f"/connectors/{connector_name}/status")
+                for connector_name in connectors
+            ]
+        )
+        connectors = {
+            connector_name: {"status": status}
+            for connector_name, status in zip(connectors, statuses)
+        }
+    return connect.build_snapshot(import_connectors_snapshot(connectors))
+
+
+async def cycle_connector(api: AsyncConnectApi, connector: ConnectorState) -> None:
+    await api.put(f"/connectors/{connector.name}/pause")
+    await asyncio.gather(
+        *[
+            api.post(f"/connectors/{connector.name}/tasks/{task_id}/restart")
+            for task_id in connector.tasks_ids
+        ]
+    )
+    await api.put(f"/connectors/{connector.name}/resume")
+
+
+async def apply_corrective_action(
+    rule: AutoCorrectRule,
+    connect: ConnectCluster,
+    api: AsyncConnectApi,
+    connector: ConnectorState,
+    notifications: NotificationDispatcher = None,
+) -> None:
+    """Async counterpart of AutoCorrectRule.process"""
+    status_path = f"/connectors/{connector.name}/status"
+    backoff_delays = rule.backoff_delays()
+    for attempt, backoff in enumerate(backoff_delays):
+        recovered, connector_state, task_states = rule.is_recovered(
+            await api.get(status_path)
+        )
+        if recovered:
+            LOG.info(
+                f"{connector.name} and all its tasks have recovered. Skipping corrective action."
+            )
+            return
+        LOG.warning(
+            f"{connector.name} not fully recovered (connector: {connector_state}, tasks: {task_states}). "
+            f"Attempt {attempt + 1}/{len(backoff_delays)}. Waiting {backoff}s before re-checking..."
+        )
+        await asyncio.sleep(backoff)
+
+    try:
+        if rule.action == "restart":
+            await api.post(f"/connectors/{connector.name}/restart")
+        elif rule.action == "pause":
+            await api.put(f"/connectors/{connector.name}/pause")
+        elif rule.action == "cycle":
+            await cycle_connector(api, connector)
+        LOG.info(
+            f"Applied corrective action '{rule.action}' to connector {connector.name}"
+        )
+        if rule.notify_targets:
+            notified_connector = ConnectorSnapshot(connect.cluster, connector)
+            await asyncio.gather(
+                *[
+                    (
+                        asyncio.to_thread(
+                            notifications.submit, channel, connect, notified_connector
+                        )
+                        if notifications
+                        else asyncio.to_thread(
+                            channel.send_error_notification,
+                            connect,
+                            notified_connector,
+                        )
+                    )
+                    for channel in rule.notification_channels
+                ]
+            )
+        await asyncio.sleep(rule.initial_delay)
+        LOG.info(
+            f"Post-action status for {connector.name}: {await api.get(status_path)}"
+        )
+    except Exception as error:
+        LOG.exception(
+            f"Error applying corrective action to connector {connector.name}: {error}"
+        )
+        if rule.on_failure:
+            log_level_to_set = set_else_none("loglevel", rule.on_failure)
+            if connector.state not in ["RUNNING", "PAUSED"] and log_level_to_set:
+                connector_config = await api.get(f"/connectors/{connector.name}/config")
+                connector_class = set_else_none(
+                    "connector.class",
+                    connector_config,
+                    set_else_none("class", connector_config),
+                )
+                loggers = await api.get("/admin/loggers")
+                if connector_class in loggers:
+                    await api.put(
+                        f"/admin/loggers/{connector_class}",
+                        json={"level": log_level_to_set},
+                    )
+
+
+async def remediate_connector(
+    evaluation_rule: EvaluationRule,
+    connect: ConnectCluster,
+    api: AsyncConnectApi,
+    connector: ConnectorState,
+    notifications: NotificationDispatcher = None,
+) -> None:
+    """Applies the auto-correct rules of the evaluation rule, in order, to the connector"""
+    for rule in evaluation_rule.auto_correct_rules:
+        await apply_corrective_action(rule, connect, api, connector, notifications)
+
+
+class AsyncRemediations:
+    """
+    Async counterpart of the RemediationScheduler: the remediations run as tasks, off the clusters scans.
+    A connector already being remediated by an evaluation rule is not remediated again until that is over.
+    """
+
+    def __init__(self, notifications: NotificationDispatcher = None):
+        self.notifications = notifications
+        self._tasks: dict[tuple, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def submit(
+        self,
+        evaluation_rule: EvaluationRule,
+        connect: ConnectCluster,
+        api: AsyncConnectApi,
+        connector: ConnectorState,
+    ) -> bool:
+        """Starts the remediation of the connector. Returns False if it is already in progress."""
+        key: tuple = (connect.name, connector.name, id(evaluation_rule))
+        if key in self._tasks:
+            LOG.debug(
+                f"{connect.name} - {connector.name} remediation already in progress"
+            )
+            return False
+        task = asyncio.create_task(
+            remediate_connector(
+                evaluation_rule, connect, api, connector, self.notifications
+            )
+        )
+        self._tasks[key] = task
+        task.add_done_callback(lambda _: self._tasks.pop(key, None))
+        return True
+
+    async def join(self) -> None:
+        await asyncio.gather(*self._tasks.values(), return_exceptions=True)
+
+    async def cancel(self) -> None:
+        for task in self._tasks.values():
+            task.cancel()
+        await self.join()
+
+
+async def execute_rule(
+    evaluation_rule: EvaluationRule,
+    connect: ConnectCluster,
+    api: AsyncConnectApi,
+    snapshot: ClusterSnapshot,
+    remediations: AsyncRemediations = None,
+) -> None:
+    """
+    Async counterpart of EvaluationRule.execute, evaluating the connectors from the scan snapshot.
+    With remediations, the connectors to fix are remediated in the background instead of awaited.
+    """
+    connectors_to_handle: list[ConnectorState] = [
+        snapshot[connector_name]
+        for connector_name in snapshot.connectors_names
+        if evaluation_rule.filter_out_connector(connector_name, connect)
+    ]
+    verdicts: dict[str, int] = {"RUNNING": 0, "PAUSED": 0, "UNASSIGNED": 0}
+    connectors_to_fix: list[ConnectorState] = []
+    connectors_to_cycle: list[ConnectorState] = []
+    running_connectors: list[str] = []
+    for connector in connectors_to_handle:
+        connect.metrics["connectors"][connector.name] = connector
+        if (
+            connector.name in snapshot.unchanged
+            and connector.name in evaluation_rule.running_connectors
+        ):
+            verdict, cycle = "RUNNING", False
+        else:
+            verdict, cycle = evaluate_connector(evaluation_rule, connector)
+        if verdict == "RUNNING":
+            running_connectors.append(connector.name)
+        if verdict in verdicts:
+            verdicts[verdict] += 1
+        else:
+            connectors_to_fix.append(connector)
+        if cycle:
+            connectors_to_cycle.append(connector)
+    evaluation_rule.running_connectors = frozenset(running_connectors)
+    await asyncio.gather(
+        *[cycle_connector(api, connector) for connector in connectors_to_cycle]
+    )
+    connect.metrics.update(
+        {
+            "total": len(snapshot),
+            "ignored": len(snapshot) - len(connectors_to_handle),
+            "count": len(connectors_to_handle),
+            "running": verdicts["RUNNING"],
+            "unassigned": verdicts["UNASSIGNED"],
+            "failed": len(connectors_to_fix),
+        }
+    )
+    if remediations is not None:
+        for connector in connectors_to_fix:
+            remediations.submit(evaluation_rule, connect, api, connector)
+        return
+    await asyncio.gather(
+        *[
+            remediate_connector(evaluation_rule, connect, api, connector)
+            for connector in connectors_to_fix
+        ]
+    )
+
+
+def require_aiohttp() -> None:
+    try:
+        import aiohttp
+    except ImportError as error:
+        raise ImportError(
+            "The async engine requires aiohttp. Install it with: pip install kafka-connect-watcher[async]"
+        ) from error
+
+
+class AsyncWatcher:
+    """
+    Asyncio counterpart of the Watcher. Each cluster is scanned by its own coroutine, every ``interval``
+    configured for the cluster.
+    """
+
+    def __init__(self, shard: Shard = None):
+        require_aiohttp()
+        self.keep_running: bool = True
+        self.shard: Shard = shard if shard else Shard()
+        self.clusters: list[ConnectCluster] = []
+        self._stop_event: asyncio.Event = None
+        self.prometheus_exporter: PrometheusExporter = None
+        self.remediations: AsyncRemediations = None
+        self.notifications: NotificationDispatcher = None
+        self.emf_exporter = EmfExporter()
+        self.metrics: dict = {
+            "connect_clusters_total": 0,
+            "connect_clusters_healthy": 0,
+            "connect_clusters_unhealthy": 0,
+            "connect_clusters_scans": 0,
+            "connectors_total": 0,
+        }
+
+    def run(self, config: Config):
+        try:
+            asyncio.run(self.watch(config))
+        except KeyboardInterrupt:
+            self.keep_running = False
+            LOG.debug("\rExited due to Keyboard interrupt")
+
+    def exit_gracefully(self) -> None:
+        LOG.info("Stopping the watcher")
+        self.keep_running = False
+        self._stop_event.set()
+
+    @staticmethod
+    def ignore_reload() -> None:
+        LOG.warning(
+            "The async engine does not reload its configuration. Restart the watcher to apply the changes."
+        )
+
+    def add_signal_handlers(self, loop: asyncio.AbstractEventLoop) -> None:
+        """Stops on SIGINT & SIGTERM. SIGHUP, which would otherwise kill the process, is logged and ignored."""
+        for _signal in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(_signal, self.exit_gracefully)
+        if hasattr(signal, "SIGHUP"):
+            loop.add_signal_handler(signal.SIGHUP, self.ignore_reload)
+
+    async def wait(self, seconds: int) -> None:
+        """Waits for the given duration, or until the watcher is stopped"""
+        try:
+            await asyncio.wait_for(self._stop_event.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def watch(self, config: Config) -> None:
+        LOG.info("Initializing the async watcher")
+        self._stop_event = asyncio.Event()
+        self.add_signal_handlers(asyncio.get_running_loop())
+        clusters: list[ConnectCluster] = [
+            ConnectCluster(cluster, config)
+            for cluster in self.shard.select_clusters(config.config["clusters"])
+        ]
+        self.clusters = clusters
+        self.metrics.update({"connect_clusters_total": len(clusters)})
+        if self.shard.enabled:
+            LOG.info(
+                f"Shard {self.shard} - watching {len(clusters)} of the "
+                f"{len(config.config['clusters'])} clusters"
+            )
+        init_emf_config(config)
+        self.emf_exporter.start()
+        if any(connect.prometheus_enabled for connect in clusters):
+            from kafka_connect_watcher.prometheus import PrometheusExporter
+
+            self.prometheus_exporter = PrometheusExporter.from_config(config)
+            self.prometheus_exporter.start()
+        self.notifications = NotificationDispatcher.from_config(config)
+        self.notifications.start()
+        self.remediations = AsyncRemediations(self.notifications)
+        from aiohttp import ClientSession, TCPConnector
+
+        async with ClientSession(connector=TCPConnector(limit=0)) as session:
+            try:
+                await asyncio.gather(
+                    self.process_watcher_metrics(config),
+                    *[
+                        self.process_cluster(connect, AsyncConnectApi(connect, session))
+                        for connect in clusters
+                    ],
+                )
+            finally:
+                await self.remediations.cancel()
+                await asyncio.to_thread(self.notifications.stop)
+                await asyncio.to_thread(self.emf_exporter.stop, 30)
+
+    async def process_watcher_metrics(self, config: Config) -> None:
+        while self.keep_running:
+            await self.wait(config.scan_intervals)
+            process_notifications_metrics(
+                self.notifications, self.metrics, self.prometheus_exporter
+            )
+            process_emf_exporter_metrics(self.emf_exporter, self.metrics)
+            process_shard_metrics(
+                self.shard, self.clusters, self.metrics, self.prometheus_exporter
+            )
+            if config.emf_watcher_config:
+                await asyncio.to_thread(handle_watcher_emf, config, self)
+            LOG.debug(f"Watcher metrics: {self.metrics}")
+            self.metrics.update(
+                {
+                    "connect_clusters_healthy": 0,
+                    "connect_clusters_unhealthy": 0,
+                    "connect_clusters_scans": 0,
+                }
+            )
+
+    async def process_cluster(
+        self, connect: ConnectCluster, api: AsyncConnectApi
+    ) -> None:
+        while self.keep_running:
+            now = dt.now()
+            self.metrics["connect_clusters_scans"] += 1
+            try:
+                snapshot = await get_snapshot(connect, api)
+                connect.metrics["connectors"] = {}
+                for handling_rule in connect.handling_rules:
+                    await execute_rule(
+                        handling_rule, connect, api, snapshot, self.remediations
+                    )
+                self.metrics["connect_clusters_healthy"] += 1
+                if self.prometheus_exporter and connect.prometheus_enabled:
+                    self.prometheus_exporter.update(connect)
+            except Exception as error:
+                self.metrics["connect_clusters_unhealthy"] += 1
+                LOG.exception(error)
+                LOG.error(f"Failed to process the cluster {connect.name}")
+            self.emf_exporter.submit(connect)
+            LOG.info(
+                f"{connect.name} - processing finished - {(dt.now() - now).total_seconds()}s"
+            )
+            await self.wait(connect.interval)
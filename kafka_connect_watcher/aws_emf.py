@@ -2,7 +2,8 @@
 #   Copyright 2023 John "Preston" Mille <john@ews-network.net>
 
 """
-AWS EMF Publishing management for cluster & connectors
+AWS EMF Publishing management for cluster & connectors.
+aws_embedded_metrics is only imported once EMF is enabled and metrics are published.
 """
 
 from __future__ import annotations
@@ -10,83 +11,300 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from aws_embedded_metrics.config.configuration import Configuration
+    from aws_embedded_metrics.environment import Environment
+    from aws_embedded_metrics.logger.metrics_context import MetricsContext
+    from aws_embedded_metrics.sinks import Sink
     from kafka_connect_watcher.cluster import ConnectCluster
     from kafka_connect_watcher.config import Config
     from kafka_connect_watcher.watcher import Watcher
 
-from asyncio import get_event_loop, new_event_loop, set_event_loop
-from copy import deepcopy
-
-from aws_embedded_metrics import metric_scope
-from aws_embedded_metrics.config import get_config
+import sys
+import threading
+from asyncio import get_event_loop, new_event_loop, run, set_event_loop
+from collections import deque
+from functools import wraps
+from types import MappingProxyType
 
+from kafka_connect_watcher.connectors_eval import get_connector_metrics
 from kafka_connect_watcher.logger import LOG
 
-emf_config = get_config()
+emf_config: Configuration = None
+UDP_MAX_PAYLOAD_BYTES: int = 65000
+
+
+def get_emf_config() -> Configuration:
+    global emf_config
+    if emf_config is None:
+        from aws_embedded_metrics.config import get_config
+
+        emf_config = get_config()
+    return emf_config
+
+
+def metric_scope(function):
+    """aws_embedded_metrics.metric_scope, applied to the function on its first call"""
+    scoped_function = None
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        nonlocal scoped_function
+        if scoped_function is None:
+            from aws_embedded_metrics import metric_scope as emf_metric_scope
+
+            scoped_function = emf_metric_scope(function)
+        return scoped_function(*args, **kwargs)
+
+    return wrapper
+
+
+def join_documents(documents: list[str], max_bytes: int = None) -> list[bytes]:
+    """Joins the EMF documents, one per line, in as few payloads of up to max_bytes, if set, as possible"""
+    payloads: list[bytes] = []
+    payload: list[bytes] = []
+    size: int = 0
+    for document in documents:
+        line: bytes = f"{document}\n".encode("utf-8")
+        if payload and max_bytes and size + len(line) > max_bytes:
+            payloads.append(b"".join(payload))
+            payload, size = [], 0
+        payload.append(line)
+        size += len(line)
+    if payload:
+        payloads.append(b"".join(payload))
+    return payloads
 
 
 def init_emf_config(config: Config) -> None:
+    if not config.emf_enabled:
+        LOG.debug("AWS EMF disabled")
+        return
     try:
         loop = get_event_loop()
     except RuntimeError:
         loop = new_event_loop()
     set_event_loop(loop)
-    emf_config.service_name = config.emf_service_name
-    emf_config.service_type = config.emf_service_type
-    emf_config.log_group_name = config.emf_log_group
+    settings = get_emf_config()
+    settings.service_name = config.emf_service_name
+    settings.service_type = config.emf_service_type
+    settings.log_group_name = config.emf_log_group
 
 
-@metric_scope
-def publish_cluster_metrics(cluster: ConnectCluster, metrics) -> None:
-    LOG.info(
-        f"{cluster.name} - Publishing Cluster metrics to EMF with Resolution {cluster.emf_config.emf_resolution}",
-    )
-    LOG.debug(cluster.metrics)
-    metrics.reset_dimensions(use_default=False)
-    metrics.set_property("ConnectDetails", {"designation": cluster.name})
-    dimensions: dict = deepcopy(cluster.emf_config.dimensions)
-    dimensions.update({"ConnectCluster": cluster.name})
-    metrics.put_dimensions(dimensions)
-    for metric_name, value in cluster.metrics.items():
-        if not isinstance(value, (int, str)):
-            continue
-        metrics.put_metric(metric_name, value, None, cluster.emf_config.emf_resolution)
+class EmfBatchWriter:
+    """
+    Writes the EMF documents of a cluster scan, the cluster one and one per connector, to the sink of the
+    environment resolved once, instead of a metric_scope logger, environment lookup and flush per document.
+    An EMF document holds a single value per dimension, so each connector, with its own ConnectorName,
+    is its own document; the metrics of a document are split by the serializer past 100 metrics.
+    The documents of a cluster are serialized together and handed to the CloudWatch agent, or to stdout,
+    in a single write. Over UDP, they are split in datagrams of up to UDP_MAX_PAYLOAD_BYTES.
+    The connectors unchanged since the previous scan are not written again until the next full resync.
+    The cluster document uses the default EMF namespace, the connectors documents the cluster namespace.
+    """
 
+    def __init__(self, environment: Environment = None):
+        self._environment = environment
+        self._lock = threading.Lock()
+        self.documents: int = 0
 
-@metric_scope
-def publish_connector_metrics(
-    cluster: ConnectCluster, connector_name, connector_metrics, metrics
-) -> None:
-    LOG.debug(
-        f"Publishing Cluster Connector metrics to EMF with Resolution {cluster.emf_config.emf_resolution}"
-    )
-    metrics.set_namespace(cluster.emf_config.namespace)
-    metrics.reset_dimensions(use_default=False)
-    metrics.set_property("ConnectDetails", {"designation": cluster.name})
-    dimensions: dict = deepcopy(cluster.emf_config.dimensions)
-    dimensions.update({"ConnectorName": connector_name, "ConnectCluster": cluster.name})
-    metrics.put_dimensions(dimensions)
-    for _conn_metric_name, _conn_metric_value in connector_metrics.items():
-        metrics.put_metric(
-            _conn_metric_name,
-            _conn_metric_value,
-            None,
-            cluster.emf_config.emf_resolution,
+    @property
+    def environment(self) -> Environment:
+        if self._environment is None:
+            from aws_embedded_metrics.environment.environment_detector import (
+                resolve_environment,
+            )
+
+            self._environment = run(resolve_environment())
+        return self._environment
+
+    def new_context(
+        self,
+        cluster: ConnectCluster,
+        dimensions: dict,
+        metrics: dict,
+        namespace: str = None,
+    ) -> MetricsContext:
+        from aws_embedded_metrics.logger.metrics_context import MetricsContext
+
+        context = MetricsContext.empty()
+        if namespace:
+            context.namespace = namespace
+        context.set_dimensions([dimensions], use_default=False)
+        context.set_property("ConnectDetails", {"designation": cluster.name})
+        for metric_name, value in metrics.items():
+            if not isinstance(value, (int, float)):
+                continue
+            context.put_metric(
+                metric_name, value, None, cluster.emf_config.emf_resolution
+            )
+        self.environment.configure_context(context)
+        return context
+
+    @staticmethod
+    def write_contexts(sink: Sink, contexts: list[MetricsContext]) -> None:
+        """Serializes the contexts and writes them to the sink at once. Other sinks accept the contexts one by one."""
+        from aws_embedded_metrics.sinks.agent_sink import AgentSink
+        from aws_embedded_metrics.sinks.stdout_sink import StdoutSink
+
+        if not isinstance(sink, (AgentSink, StdoutSink)):
+            for context in contexts:
+                sink.accept(context)
+            return
+        if isinstance(sink, AgentSink):
+            for context in contexts:
+                context.meta["LogGroupName"] = sink.log_group_name
+                if sink.log_steam_name is not None:
+                    context.meta["LogStreamName"] = sink.log_steam_name
+        documents: list[str] = [
+            document
+            for context in contexts
+            for document in sink.serializer.serialize(context)
+            if document
+        ]
+        if isinstance(sink, StdoutSink):
+            sys.stdout.write("".join(f"{document}\n" for document in documents))
+            return
+        for payload in join_documents(
+            documents,
+            UDP_MAX_PAYLOAD_BYTES if sink.endpoint.scheme == "udp" else None,
+        ):
+            sink.client.send_message(payload)
+
+    def write(self, cluster: ConnectCluster) -> int:
+        """Writes the cluster & connectors metrics, returns the number of documents written"""
+        sink = self.environment.get_sink()
+        cluster_dimensions: dict = {
+            **cluster.emf_config.dimensions,
+            "ConnectCluster": cluster.name,
+        }
+        contexts: list[MetricsContext] = [
+            self.new_context(cluster, cluster_dimensions, cluster.metrics)
+        ]
+        for connector_name, connector in cluster.metrics["connectors"].items():
+            if connector_name in cluster.unchanged_connectors:
+                continue
+            contexts.append(
+                self.new_context(
+                    cluster,
+                    {**cluster_dimensions, "ConnectorName": connector_name},
+                    get_connector_metrics(connector),
+                    cluster.emf_config.namespace,
+                )
+            )
+        self.write_contexts(sink, contexts)
+        with self._lock:
+            self.documents += len(contexts)
+        return len(contexts)
+
+
+EMF_WRITER = EmfBatchWriter()
+
+
+class ClusterMetricsSnapshot:
+    """
+    Read-only copy of the cluster metrics, taken at the end of a scan. The ConnectorState records of the
+    connectors are never modified once created, so they are shared with the cluster rather than copied.
+    """
+
+    __slots__ = ("name", "emf_config", "metrics", "unchanged_connectors")
+
+    def __init__(self, cluster: ConnectCluster):
+        self.name: str = cluster.name
+        self.emf_config = cluster.emf_config
+        self.unchanged_connectors: frozenset[str] = frozenset(
+            cluster.unchanged_connectors
         )
+        metrics: dict = {
+            metric_name: value
+            for metric_name, value in cluster.metrics.items()
+            if metric_name != "connectors"
+        }
+        metrics["connectors"] = MappingProxyType(dict(cluster.metrics["connectors"]))
+        self.metrics = MappingProxyType(metrics)
 
 
-def publish_clusters_emf(cluster: ConnectCluster) -> None:
-    if not cluster.emf_config.enabled:
-        return
-    try:
-        loop = get_event_loop()
-    except RuntimeError:
-        loop = new_event_loop()
-    print("Publish EMF for clusters")
-    set_event_loop(loop)
-    publish_cluster_metrics(cluster)
-    for connector_name, connector_metrics in cluster.metrics["connectors"].items():
-        publish_connector_metrics(cluster, connector_name, connector_metrics)
+class EmfExporter:
+    """
+    Publishes the clusters metrics to EMF from a background thread, off the clusters scans.
+    The snapshots wait in a bounded queue: when it is full, the oldest snapshot is dropped for the new one.
+    A failing sink only fails the publication of the snapshot being exported.
+    """
+
+    def __init__(self, writer: EmfBatchWriter = EMF_WRITER, max_snapshots: int = 100):
+        self.writer = writer
+        self.max_snapshots = max_snapshots
+        self._snapshots: deque[ClusterMetricsSnapshot] = deque()
+        self._condition = threading.Condition()
+        self._thread: threading.Thread = None
+        self.keep_running: bool = False
+        self.metrics: dict = {}
+        self.reset_metrics()
+
+    def reset_metrics(self) -> None:
+        self.metrics.update({"exported": 0, "dropped": 0, "failed": 0})
+
+    def collect_metrics(self) -> dict:
+        """Returns the metrics since the last collection, and the current queue depth"""
+        with self._condition:
+            metrics = dict(self.metrics)
+            metrics["queue_depth"] = len(self._snapshots)
+            self.reset_metrics()
+        return metrics
+
+    def start(self) -> None:
+        with self._condition:
+            if self.keep_running:
+                return
+            self.keep_running = True
+        self._thread = threading.Thread(
+            target=self.run, daemon=True, name="emf-exporter"
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = None) -> None:
+        """Stops the exporter once the snapshots queued are exported, or after timeout"""
+        with self._condition:
+            self.keep_running = False
+            self._condition.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+
+    def submit(self, cluster: ConnectCluster) -> None:
+        """Queues a snapshot of the cluster metrics, if the cluster publishes to EMF"""
+        if not (cluster.emf_config and cluster.emf_config.enabled):
+            return
+        snapshot = ClusterMetricsSnapshot(cluster)
+        with self._condition:
+            if len(self._snapshots) >= self.max_snapshots:
+                dropped = self._snapshots.popleft()
+                self.metrics["dropped"] += 1
+                LOG.warning(
+                    f"{dropped.name} - EMF exporter queue full. Oldest metrics snapshot dropped"
+                )
+            self._snapshots.append(snapshot)
+            self._condition.notify()
+
+    def run(self) -> None:
+        while True:
+            with self._condition:
+                while self.keep_running and not self._snapshots:
+                    self._condition.wait()
+                if not self._snapshots:
+                    return
+                snapshot = self._snapshots.popleft()
+            try:
+                LOG.info(
+                    f"{snapshot.name} - Publishing Cluster metrics to EMF with Resolution "
+                    f"{snapshot.emf_config.emf_resolution}"
+                )
+                self.writer.write(snapshot)
+                outcome = "exported"
+            except Exception as error:
+                LOG.exception(error)
+                LOG.error(f"{snapshot.name} - Failed to export EMF metrics")
+                outcome = "failed"
+            with self._condition:
+                self.metrics[outcome] += 1
 
 
 @metric_scope
@@ -97,7 +315,9 @@ def publish_watcher_emf_metrics(config: Config, watcher: Watcher, metrics):
     LOG.debug(watcher.metrics)
     metrics.set_namespace(config.emf_watcher_config.namespace)
     metrics.reset_dimensions(use_default=False)
-    metrics.put_dimensions(config.emf_watcher_config.dimensions)
+    metrics.put_dimensions(
+        {**config.emf_watcher_config.dimensions, **watcher.shard.dimensions}
+    )
     for _watcher_metric, _watcher_metric_value in watcher.metrics.items():
         metrics.put_metric(
             _watcher_metric,
@@ -112,3 +332,10 @@ def handle_watcher_emf(config: Config, watcher: Watcher) -> None:
         LOG.debug("Watcher metrics to EMF disabled")
         return
     publish_watcher_emf_metrics(config, watcher)
+
+
+def process_emf_exporter_metrics(exporter: EmfExporter, watcher_metrics: dict) -> None:
+    """Adds the EMF exporter metrics since the previous collection to the watcher metrics"""
+    exporter_metrics: dict = exporter.collect_metrics()
+    for metric_name in ("queue_depth", "dropped", "failed"):
+        watcher_metrics[f"emf_snapshots_{metric_name}"] = exporter_metrics[metric_name]
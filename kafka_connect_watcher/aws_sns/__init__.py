@@ -7,7 +7,8 @@
 from __future__ import annotations
 
 import json
-from typing import TYPE_CHECKING, Union
+import threading
+from typing import TYPE_CHECKING, Optional, Union
 
 if TYPE_CHECKING:
     from kafka_connect_api.kafka_connect_api import Connector
@@ -15,6 +16,7 @@ if TYPE_CHECKING:
 
 from copy import deepcopy
 from datetime import datetime as dt
+from datetime import timedelta, timezone
 from os import environ, path
 
 from boto3.session import Session
@@ -22,11 +24,49 @@ from botocore.exceptions import ClientError
 from compose_x_common.aws import get_assume_role_session
 from compose_x_common.compose_x_common import keyisset, set_else_none
 from importlib_resources import files as pkg_files
-from jinja2 import BaseLoader, Environment
+from jinja2 import (
+    BaseLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    Template,
+    TemplateNotFound,
+)
 from kafka_connect_api.errors import GenericNotFound
 
 from kafka_connect_watcher.logger import LOG
 
+CREDENTIALS_REFRESH_MARGIN = timedelta(minutes=2)
+EXPIRED_TOKEN_ERRORS: tuple = ("ExpiredToken", "ExpiredTokenException")
+
+
+class TemplatesFilesLoader(BaseLoader):
+    """Loads the Jinja2 templates from their absolute file path"""
+
+    def get_source(self, environment: Environment, template: str) -> tuple:
+        if not path.exists(template):
+            raise TemplateNotFound(template)
+        mtime = path.getmtime(template)
+        with open(template) as template_file:
+            source = template_file.read()
+        return source, template, lambda: path.getmtime(template) == mtime
+
+
+def get_bytecode_cache() -> Optional[FileSystemBytecodeCache]:
+    """Bytecode cache of the compiled templates, if a cache directory can be used"""
+    try:
+        return FileSystemBytecodeCache()
+    except (OSError, RuntimeError) as error:
+        LOG.warning(f"Jinja2 templates bytecode cache disabled: {error}")
+        return None
+
+
+JINJA_ENVIRONMENT = Environment(
+    loader=TemplatesFilesLoader(),
+    autoescape=True,
+    auto_reload=False,
+    bytecode_cache=get_bytecode_cache(),
+)
+
 
 class SnsChannel:
     def __init__(self, name: str, definition: dict):
@@ -43,22 +83,30 @@ class SnsChannel:
         }
         self.ignore_errors = keyisset("ignore_errors", self.definition)
         self._messages_templates: dict = {}
+        self._client = None
+        self._client_expiration: Optional[dt] = None
+        self._client_lock = threading.Lock()
         self.import_jinja2_templates()
 
     def __repr__(self):
         return f"sns.{self.name}"
 
     def import_jinja2_templates(self) -> None:
+        """
+        Compiles the messages templates in the shared Jinja2 environment, which keeps the compiled templates
+        for all the channels using them.
+        """
         if keyisset("template", self.definition):
             self._templates_definitions.update(self.definition["template"])
         for message_type, template_path in self._templates_definitions.items():
             if not path.exists(template_path):
                 raise FileNotFoundError(f"Template file not found: {template_path}")
-            with open(path.abspath(template_path)) as template_file:
-                self._messages_templates[message_type] = template_file.read()
+            self._messages_templates[message_type] = JINJA_ENVIRONMENT.get_template(
+                path.abspath(template_path)
+            )
 
     @property
-    def messages_templates(self) -> dict:
+    def messages_templates(self) -> dict[str, Template]:
         """Messages templates"""
         return self._messages_templates
 
@@ -67,11 +115,11 @@ class SnsChannel:
         """Initial definition"""
         return self.__definition
 
-    def publish(self, subject: str, message: Union[str, dict]) -> None:
-        """Publish message to SNS"""
+    def publish(self, subject: str, message: Union[str, dict]) -> bool:
+        """Publish message to SNS. Returns False if SNS rejected it"""
         if not isinstance(message, (str, dict)):
             raise TypeError(f"message must be str or dict, not {type(message)}")
-        client = self.session.client("sns")
+        client = self.client
         try:
             if isinstance(message, str):
                 client.publish(TopicArn=self.arn, Subject=subject, Message=message)
@@ -83,24 +131,22 @@ class SnsChannel:
                     MessageStructure="json",
                 )
 
-        except (client.exceptions, ClientError) as error:
+        except ClientError as error:
+            if error.response.get("Error", {}).get("Code") in EXPIRED_TOKEN_ERRORS:
+                self.reset_client()
             LOG.exception(error)
             LOG.error(f"{self.name} - Failed to send notification to {self.arn}")
+            return False
+        return True
 
     @staticmethod
     def render_message_template(
-        template: str,
+        template: Template,
         cluster_id: str,
         connector_name: str,
         connector_error: str,
     ) -> str:
-        jinja_env = Environment(
-            loader=BaseLoader(),
-            autoescape=True,
-            auto_reload=False,
-        ).from_string(template)
-
-        content = jinja_env.render(
+        content = template.render(
             env=environ,
             CONNECTOR_NAME=connector_name,
             CONNECT_CLUSTER_ID=cluster_id,
@@ -108,23 +154,44 @@ class SnsChannel:
         )
         return content
 
-    def send_error_notification(self, cluster: ConnectCluster, connector: Connector):
-        """Send error notification"""
-        subject = f"Kafka Connect error for {connector.name}"
-        messages: dict = {}
+    @staticmethod
+    def get_connector_status(connector: Connector) -> Union[dict, str]:
         try:
-            connector_status = connector.status
+            return connector.status
         except GenericNotFound:
-            connector_status = "Connector does not have any workable status"
+            return "Connector does not have any workable status"
+
+    @staticmethod
+    def join_messages(contents: list[str]) -> str:
+        """
+        Joins the messages rendered for several connectors, one line per connector.
+        Messages which are all JSON documents are joined into a JSON list, to remain a valid JSON document.
+        """
+        if len(contents) == 1:
+            return contents[0]
+        try:
+            return json.dumps([json.loads(content) for content in contents])
+        except ValueError:
+            return "\n".join(contents)
+
+    def render_messages(
+        self, cluster_id: str, alerts: list[tuple[str, Union[dict, str]]]
+    ) -> dict:
+        """Renders the messages for the connectors statuses, one per connector, for each message type"""
+        messages: dict = {}
         for sns_message_type in self.messages_templates:
             try:
-                content = self.render_message_template(
-                    self.messages_templates[sns_message_type],
-                    cluster.name,
-                    connector.name,
-                    json.dumps(connector_status),
+                messages[sns_message_type] = self.join_messages(
+                    [
+                        self.render_message_template(
+                            self.messages_templates[sns_message_type],
+                            cluster_id,
+                            connector_name,
+                            json.dumps(connector_status),
+                        )
+                        for connector_name, connector_status in alerts
+                    ]
                 )
-                messages[sns_message_type] = content
             except Exception as error:
                 LOG.exception(error)
                 LOG.error(
@@ -132,12 +199,43 @@ class SnsChannel:
                 )
                 if not self.ignore_errors:
                     raise
-        self.publish(subject, messages)
+        return messages
+
+    def send_error_notification(
+        self, cluster: ConnectCluster, connector: Connector
+    ) -> bool:
+        """Send error notification"""
+        subject = f"Kafka Connect error for {connector.name}"
+        return self.publish(
+            subject,
+            self.render_messages(
+                cluster.name,
+                [(connector.name, self.get_connector_status(connector))],
+            ),
+        )
+
+    def send_digest_notification(
+        self, cluster_id: str, alerts: list[tuple[str, Union[dict, str]]]
+    ) -> bool:
+        """Send a single notification for the errors of several connectors of a cluster. Returns False if it failed"""
+        if len(alerts) == 1:
+            subject = f"Kafka Connect error for {alerts[0][0]}"
+        else:
+            subject = (
+                f"Kafka Connect errors for {len(alerts)} connectors of {cluster_id}"
+            )
+        return self.publish(subject, self.render_messages(cluster_id, alerts))
 
     @property
     def session(self) -> Session:
+        return self.get_session()[0]
+
+    def get_session(self) -> tuple[Session, Optional[dt]]:
+        """
+        Returns a new session, and when assuming the role_arn, the expiration of the assumed credentials.
+        """
         if keyisset("role_arn", self.definition):
-            return get_assume_role_session(
+            session, credentials = get_assume_role_session(
                 Session(),
                 self.definition["role_arn"],
                 set_else_none(
@@ -145,6 +243,29 @@ class SnsChannel:
                     self.definition,
                     f"KafkaConnectWatcher{self.name}",
                 ),
+                include_full_return=True,
             )
-        else:
-            return Session()
+            return session, credentials["Credentials"]["Expiration"]
+        return Session(), None
+
+    @property
+    def client(self):
+        """
+        SNS client, created once and re-used for all the notifications.
+        When assuming a role, the client is renewed shortly before the assumed credentials expire.
+        """
+        with self._client_lock:
+            if self._client is None or (
+                self._client_expiration
+                and dt.now(tz=timezone.utc)
+                >= self._client_expiration - CREDENTIALS_REFRESH_MARGIN
+            ):
+                session, self._client_expiration = self.get_session()
+                self._client = session.client("sns")
+            return self._client
+
+    def reset_client(self) -> None:
+        """Drops the cached client, for the next notification to create a new one"""
+        with self._client_lock:
+            self._client = None
+            self._client_expiration = None
@@ -2,22 +2,106 @@
 #   Copyright 2023 John "Preston" Mille <john@ews-network.net>
 
 import argparse
+import logging
+import sys
+from contextlib import redirect_stdout
 from os import path
+from time import sleep
 
 from kafka_connect_watcher.config import Config
+from kafka_connect_watcher.sharding import SHARD_COUNT_ENV, SHARD_INDEX_ENV, Shard
 from kafka_connect_watcher.watcher import Watcher
 
 
+def scan(args: argparse.Namespace, config: Config, shard: Shard) -> int:
+    """Scans the clusters, once or every watch_interval, and returns the exit code of the last scan"""
+    from kafka_connect_watcher.logger import LOG
+    from kafka_connect_watcher.scan import (
+        format_scan_report,
+        get_exit_code,
+        scan_clusters,
+    )
+
+    LOG.setLevel(logging.WARNING)
+    # kafka_connect_api prints the API errors: the report must be the only output on stdout
+    exit_code: int = 0
+    try:
+        while True:
+            with redirect_stdout(sys.stderr):
+                scan_report = scan_clusters(config, shard)
+            print(format_scan_report(scan_report, args.output), flush=True)
+            exit_code = get_exit_code(scan_report)
+            if args.once:
+                break
+            sleep(config.scan_intervals)
+    except KeyboardInterrupt:
+        pass
+    return exit_code
+
+
 def start_watcher():
     parser = argparse.ArgumentParser("Kafka Connect Watcher")
+    parser.add_argument("-c", "--config-file", help="The input configuration file")
     parser.add_argument(
-        "-c", "--config-file", help="The input configuration file", required=True
+        "--engine",
+        help="The scan engine to use. The async engine runs all the scans as coroutines.",
+        choices=["threads", "async"],
+        default="threads",
+    )
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        help=f"Index, from 0, of this watcher replica shard. Defaults to ${SHARD_INDEX_ENV} or 0",
+    )
+    parser.add_argument(
+        "--shard-count",
+        type=int,
+        help=f"Number of watcher replicas sharing the clusters. Defaults to ${SHARD_COUNT_ENV} or 1",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    scan_parser = subparsers.add_parser(
+        "scan",
+        help="Scans the clusters and reports their health, without applying the corrective actions",
+    )
+    scan_parser.add_argument(
+        "-c",
+        "--config-file",
+        help="The input configuration file",
+        default=argparse.SUPPRESS,
+    )
+    scan_parser.add_argument(
+        "--once",
+        action="store_true",
+        help="Scans the clusters once and exits with 0 if healthy, 1 if unhealthy, 2 if a scan failed",
+    )
+    scan_parser.add_argument(
+        "-o",
+        "--output",
+        help="The scan report format",
+        choices=["text", "json"],
+        default="text",
     )
 
     args = parser.parse_args()
+    if not args.config_file:
+        parser.error("the following arguments are required: -c/--config-file")
 
+    try:
+        shard = Shard.from_env(args.shard_index, args.shard_count)
+    except ValueError as error:
+        parser.error(str(error))
     config = Config(path.abspath(args.config_file))
-    watcher = Watcher()
+    if args.command == "scan":
+        sys.exit(scan(args, config, shard))
+    if args.engine == "async":
+        from kafka_connect_watcher.async_engine import AsyncWatcher
+
+        try:
+            watcher = AsyncWatcher(shard)
+        except ImportError as error:
+            parser.error(str(error))
+    else:
+        watcher = Watcher(shard)
     watcher.run(config)
 
 
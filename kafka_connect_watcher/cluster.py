@@ -8,20 +8,36 @@ Models Connect cluster
 from __future__ import annotations
 
 from copy import deepcopy
+from time import monotonic
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
     from kafka_connect_watcher.config import Config
 
-from aws_embedded_metrics.config import get_config
 from compose_x_common.compose_x_common import keyisset, set_else_none
+from kafka_connect_api.errors import GenericNotFound
 from kafka_connect_api.kafka_connect_api import Api, Cluster, Connector
-from prometheus_client import Gauge
 
+from kafka_connect_watcher.api import (
+    DEFAULT_CONNECT_TIMEOUT,
+    DEFAULT_MAX_CONCURRENT_REQUESTS,
+    DEFAULT_MIN_REQUESTS_PER_SECOND,
+    DEFAULT_READ_TIMEOUT,
+    DEFAULT_REQUESTS_PER_SECOND,
+    AdaptiveRateLimiter,
+    ClusterApi,
+)
 from kafka_connect_watcher.config import EmfConfig
 from kafka_connect_watcher.error_rules import EvaluationRule
-
-emf_config = get_config()
+from kafka_connect_watcher.logger import LOG
+from kafka_connect_watcher.snapshot import (
+    EXPANDED_CONNECTORS_PATH,
+    ClusterSnapshot,
+    ConnectorState,
+    import_connectors_snapshot,
+)
+from kafka_connect_watcher.threads_settings import NUM_THREADS
+from kafka_connect_watcher.tools import get_duration_seconds
 
 
 class ConnectCluster:
@@ -37,6 +53,14 @@ class ConnectCluster:
         self._orignial_definiton: dict = deepcopy(cluster_config)
 
         self._name = set_else_none("name", cluster_config)
+        self.max_concurrent_requests: int = max(
+            1,
+            set_else_none(
+                "max_concurrent_requests",
+                cluster_config,
+                min(NUM_THREADS, DEFAULT_MAX_CONCURRENT_REQUESTS),
+            ),
+        )
         self._port = int(set_else_none("port", cluster_config, 8083))
         auth = set_else_none("authentication", cluster_config)
         url = set_else_none("url", cluster_config)
@@ -46,19 +70,50 @@ class ConnectCluster:
         password = set_else_none(
             "password", set_else_none("authentication", cluster_config)
         )
+        http_client: dict = set_else_none("http_client", cluster_config, {})
+        self.http_pool_size: int = set_else_none(
+            "pool_size", http_client, self.max_concurrent_requests
+        )
+        self.http_timeouts: dict = {
+            "connect_timeout": set_else_none(
+                "connect_timeout", http_client, DEFAULT_CONNECT_TIMEOUT
+            ),
+            "read_timeout": set_else_none(
+                "read_timeout", http_client, DEFAULT_READ_TIMEOUT
+            ),
+            "total_timeout": set_else_none("total_timeout", http_client),
+        }
+        rate_limit: dict = set_else_none("rate_limit", http_client, {})
+        self.rate_limiter = AdaptiveRateLimiter(
+            max_rate=set_else_none(
+                "requests_per_second", rate_limit, DEFAULT_REQUESTS_PER_SECOND
+            ),
+            burst=set_else_none("burst", rate_limit),
+            min_rate=set_else_none(
+                "min_requests_per_second", rate_limit, DEFAULT_MIN_REQUESTS_PER_SECOND
+            ),
+        )
         if url:
-            self._api = Api(
+            self._api = ClusterApi(
                 self.hostname,
                 url=url,
                 username=username,
                 password=password,
+                pool_size=self.http_pool_size,
+                max_concurrent_requests=self.max_concurrent_requests,
+                rate_limiter=self.rate_limiter,
+                **self.http_timeouts,
             )
         else:
-            self._api = Api(
+            self._api = ClusterApi(
                 self.hostname,
                 port=int(set_else_none("port", cluster_config, 8083)),
                 username=username,
                 password=password,
+                pool_size=self.http_pool_size,
+                max_concurrent_requests=self.max_concurrent_requests,
+                rate_limiter=self.rate_limiter,
+                **self.http_timeouts,
             )
         try:
             self._cluster = Cluster(self.api)
@@ -81,13 +136,64 @@ class ConnectCluster:
         )
         self.emf_namespace = None
         self.metrics: dict = {"connectors": {}}
+        self.full_resync_interval: float = get_duration_seconds(
+            set_else_none("full_resync_interval", self.definition, "5m")
+        )
+        self.connectors_fingerprints: dict[str, tuple] = {}
+        self.unchanged_connectors: frozenset[str] = frozenset()
+        self._next_full_resync: float = 0
+
+    @property
+    def original_definition(self) -> dict:
+        return self._orignial_definiton
+
+    def build_rules(
+        self, cluster_config: dict, watcher_config: Config
+    ) -> list[EvaluationRule]:
+        """
+        Evaluation rules of the reloaded cluster definition. The rules which definition did not change are reused,
+        with their state. The cluster is left unchanged: the rules are swapped in by set_rules.
+        """
+        current_rules: list[EvaluationRule] = list(self.handling_rules)
+        rules: list[EvaluationRule] = []
+        for rule_definition in set_else_none(
+            EvaluationRule.config_key, cluster_config, []
+        ):
+            for rule in current_rules:
+                if rule.original_config == rule_definition:
+                    current_rules.remove(rule)
+                    break
+            else:
+                rule = EvaluationRule(rule_definition, watcher_config)
+            rules.append(rule)
+        return rules
+
+    def set_rules(
+        self,
+        rules: list[EvaluationRule],
+        cluster_config: dict,
+        watcher_config: Config,
+    ) -> bool:
+        """
+        Replaces the evaluation rules and the definition of the cluster, and maps the rules to the notification
+        channels of the reloaded configuration. Returns whether any rule was added, removed or changed.
+        """
+        changed: bool = [id(rule) for rule in rules] != [
+            id(rule) for rule in self.handling_rules
+        ]
+        for rule in rules:
+            rule.map_notification_channels(watcher_config)
+        self.handling_rules = rules
+        self.definition = cluster_config
+        self._orignial_definiton = deepcopy(cluster_config)
+        return changed
 
     @property
     def hostname(self) -> str:
         return self.definition["hostname"]
 
     @property
-    def api(self) -> Api:
+    def api(self) -> ClusterApi:
         return self._api
 
     @property
@@ -104,5 +210,62 @@ class ConnectCluster:
     def port(self) -> int:
         return self._port
 
+    @property
+    def interval(self) -> int:
+        """Interval, in seconds, between two scans of the cluster"""
+        return set_else_none("interval", self.definition, 15)
+
+    def get_connectors_snapshot(self) -> dict[str, ConnectorState]:
+        """
+        Retrieves the status and tasks of all the connectors with a single expanded request.
+        Connect clusters that do not support the expanded listing only return the connectors names,
+        in which case the status of each connector is retrieved individually, skipping the connectors
+        deleted in between.
+        """
+        connectors = self.api.get(EXPANDED_CONNECTORS_PATH)
+        if isinstance(connectors, list):
+            connectors_names: list[str] = connectors
+            connectors = {}
+            for connector_name in connectors_names:
+                try:
+                    connectors[connector_name] = {
+                        "status": self.api.get(f"/connectors/{connector_name}/status")
+                    }
+                except GenericNotFound as error:
+                    LOG.debug(
+                        f"{self.name} - {connector_name} deleted since listed. Skipping. {error}"
+                    )
+        return import_connectors_snapshot(connectors)
+
+    def get_snapshot(self) -> ClusterSnapshot:
+        """Snapshot of the cluster connectors, for all the evaluation rules of a scan"""
+        return self.build_snapshot(self.get_connectors_snapshot())
+
+    def build_snapshot(self, connectors: dict[str, ConnectorState]) -> ClusterSnapshot:
+        """
+        Compares the connectors fingerprints with the ones of the previous scan to flag the unchanged connectors.
+        Every full_resync_interval, no connector is considered unchanged, for all to be evaluated & published.
+        """
+        fingerprints: dict[str, tuple] = {
+            connector_name: connector.fingerprint
+            for connector_name, connector in connectors.items()
+        }
+        now = monotonic()
+        if now >= self._next_full_resync:
+            self._next_full_resync = now + self.full_resync_interval
+            self.unchanged_connectors = frozenset()
+        else:
+            self.unchanged_connectors = frozenset(
+                connector_name
+                for connector_name, fingerprint in fingerprints.items()
+                if self.connectors_fingerprints.get(connector_name) == fingerprint
+            )
+        self.connectors_fingerprints = fingerprints
+        return ClusterSnapshot(connectors, self.unchanged_connectors, self.cluster)
+
+    @property
+    def prometheus_enabled(self) -> bool:
+        return keyisset("enabled", self.prometheus_config)
+
     def emf_high_resolution(self) -> bool:
         return keyisset("high_resolution_metrics", self.emf_config)
@@ -10,25 +10,57 @@ from __future__ import annotations
 import json
 from copy import deepcopy
 from datetime import datetime as dt
+from functools import cache
 from json import JSONDecodeError, loads
 from os import path
 from typing import Union
 
 import yaml
-from aws_embedded_metrics.storage_resolution import StorageResolution
 from compose_x_common.compose_x_common import get_duration, keyisset, set_else_none
 from importlib_resources import files as pkg_files
-from jsonschema import RefResolver, validate
+from jsonschema import Draft7Validator, ValidationError
+from referencing import Registry, Resource
+from referencing.jsonschema import DRAFT7
 
 try:
     from yaml import Loader
 except ImportError:
     from yaml import CLoader as Loader
 
-from kafka_connect_watcher.aws_sns import SnsChannel
 from kafka_connect_watcher.logger import LOG
 
 
+@cache
+def get_config_validator() -> Draft7Validator:
+    """
+    Validator of the configuration, built on first use from the package JSON schema. The schema is checked once
+    and registered under its $id, for the $ref to resolve without reading it again.
+    """
+    source = pkg_files("kafka_connect_watcher").joinpath("watcher-config.spec.json")
+    schema: dict = loads(source.read_text())
+    Draft7Validator.check_schema(schema)
+    registry = Registry().with_resource(
+        schema["$id"], Resource.from_contents(schema, default_specification=DRAFT7)
+    )
+    return Draft7Validator(schema, registry=registry)
+
+
+def validate_config(config: dict) -> None:
+    """Validates the configuration, raising a ValidationError listing all the errors found"""
+    errors: list[ValidationError] = sorted(
+        get_config_validator().iter_errors(config), key=lambda error: error.json_path
+    )
+    if not errors:
+        return
+    if len(errors) == 1:
+        raise errors[0]
+    raise ValidationError(
+        f"{len(errors)} errors in the configuration:\n"
+        + "\n".join(f"{error.json_path}: {error.message}" for error in errors),
+        context=errors,
+    )
+
+
 class Config:
     """
     Represents the configuration & settings from the execution.
@@ -41,6 +73,9 @@ class Config:
             raise ValueError(
                 "You must specify either the configuration or the path to it."
             )
+        self.config_file_path: str = (
+            path.abspath(config_file_path) if config_file_path else None
+        )
         if not configuration and config_file_path:
             with open(path.abspath(config_file_path)) as config_fd:
                 configuration = yaml.load(config_fd.read(), Loader=Loader)
@@ -70,12 +105,18 @@ class Config:
             else None
         )
         self.scan_intervals = self.set_scan_intervals()
+        self.prometheus_config: dict = set_else_none("prometheus", self.config, {})
+        self.notifications_config: dict = set_else_none(
+            "notifications", self.config, {}
+        )
         self.notification_channels: dict = {}
         if keyisset("notification_channels", self.config):
             for channel_name, channel_definition in self.config[
                 "notification_channels"
             ].items():
                 if channel_name == "sns":
+                    from kafka_connect_watcher.aws_sns import SnsChannel
+
                     for (
                         sns_channel_name,
                         sns_channel_definition,
@@ -95,26 +136,46 @@ class Config:
 
     @config.setter
     def config(self, config: dict) -> None:
-        source = pkg_files("kafka_connect_watcher").joinpath("watcher-config.spec.json")
-        resolver = RefResolver(f"file://{path.abspath(path.dirname(source))}/", None)
-        validate(
-            config,
-            loads(source.read_text()),
-            resolver=resolver,
-        )
+        validate_config(config)
         for cluster in config["clusters"]:
-            interval_string = set_else_none("interval", cluster, "15s")
-            interval_delta = get_duration(interval_string)
-            now = dt.now()
-            cluster["interval"] = max(
-                2, int(((now + interval_delta) - now).total_seconds())
-            )
+            interval_value = set_else_none("interval", cluster, "15s")
+            if isinstance(interval_value, str):
+                interval_delta = get_duration(interval_value)
+                now = dt.now()
+                cluster["interval"] = max(
+                    2, int(((now + interval_delta) - now).total_seconds())
+                )
+            else:
+                cluster["interval"] = max(2, interval_value)
         self._config = config
 
     @property
     def original_config(self) -> dict:
         return self._original_config
 
+    @property
+    def emf_enabled(self) -> bool:
+        """Whether the watcher or any of the clusters publishes its metrics to AWS EMF"""
+        if self.emf_watcher_config and self.emf_watcher_config.enabled:
+            return True
+        return any(
+            keyisset(
+                "enabled",
+                set_else_none("aws_emf", set_else_none("metrics", cluster, {}), {}),
+            )
+            for cluster in self.config["clusters"]
+        )
+
+    @property
+    def channels_definitions(self) -> dict[str, dict]:
+        """Definition of the notification channels, per channel path (i.e. sns.channel_name)"""
+        return {
+            f"sns.{channel_name}": channel_definition
+            for channel_name, channel_definition in set_else_none(
+                "sns", set_else_none("notification_channels", self.config, {}), {}
+            ).items()
+        }
+
     def set_scan_intervals(self) -> int:
         intervals_value = set_else_none("watch_interval", self.config, 60)
         if isinstance(intervals_value, str):
@@ -127,6 +188,8 @@ class Config:
 
 class EmfConfig:
     def __init__(self, config: dict):
+        from aws_embedded_metrics.storage_resolution import StorageResolution
+
         self.enabled: bool = keyisset("enabled", config)
         self.namespace = config["namespace"]
         self.emf_resolution = (
@@ -6,80 +6,126 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from multiprocessing import Queue
+    from queue import Queue
 
-from multiprocessing import Queue
+    from kafka_connect_watcher.error_rules import EvaluationRule
+    from kafka_connect_watcher.snapshot import ConnectorState
+
+from collections import Counter
+from queue import Empty
 
 from kafka_connect_api.errors import GenericNotFound
 
 from kafka_connect_watcher.logger import LOG
 
 
-def evaluate_connector_status(queue: Queue) -> None:
-    while True:
-        if queue.empty():
-            break
+def count_tasks_states(connector: ConnectorState) -> Counter:
+    """Counts the connector tasks per state, in a single pass over the tasks"""
+    return Counter(connector.tasks_states)
+
+
+def get_connector_metrics(
+    connector: ConnectorState, tasks_states: Counter = None
+) -> dict:
+    """Tasks count per state, from the tasks states tally"""
+    if tasks_states is None:
+        tasks_states = count_tasks_states(connector)
+    return {
+        "tasks": tasks_states.total(),
+        "running": tasks_states["RUNNING"],
+        "failed": tasks_states["FAILED"],
+        "unassigned": tasks_states["UNASSIGNED"],
+        "paused": tasks_states["PAUSED"],
+        "restarting": tasks_states["RESTARTING"],
+    }
+
+
+def evaluate_connector(
+    evaluation_rule: EvaluationRule,
+    connector: ConnectorState,
+    tasks_states: Counter = None,
+) -> tuple[str, bool]:
+    """
+    Evaluates the connector health against the evaluation rule, from the tasks states tally.
+    Returns the verdict (RUNNING, PAUSED, UNASSIGNED or FAILED) and whether the connector should be cycled.
+    """
+    if connector.state == "RUNNING":
+        if tasks_states is None:
+            tasks_states = count_tasks_states(connector)
+        tasks: int = tasks_states.total()
+        running: int = tasks_states["RUNNING"]
+        if (
+            running == tasks
+            or (
+                evaluation_rule.ignore_unassigned
+                and running + tasks_states["UNASSIGNED"] == tasks
+            )
+            or (
+                evaluation_rule.ignore_paused
+                and running + tasks_states["PAUSED"] == tasks
+            )
+        ):
+            return "RUNNING", False
+        return "FAILED", False
+    elif connector.state == "PAUSED":
+        return "PAUSED", not evaluation_rule.ignore_paused
+    elif connector.state == "UNASSIGNED":
+        return "UNASSIGNED", not evaluation_rule.ignore_unassigned
+    return "FAILED", False
+
+
+class ConnectorsTally:
+    """
+    Verdicts of the connectors evaluated by a worker. Each worker fills its own tally, without locking,
+    and the tallies are merged once the workers joined.
+    """
+
+    def __init__(self):
+        self.running: int = 0
+        self.paused: int = 0
+        self.unassigned: int = 0
+        self.connectors_to_fix: list[ConnectorState] = []
+        self.running_connectors: list[str] = []
+
+    def add(self, verdict: str, connector: ConnectorState) -> None:
+        if verdict == "RUNNING":
+            self.running += 1
+            self.running_connectors.append(connector.name)
+        elif verdict == "PAUSED":
+            self.paused += 1
+        elif verdict == "UNASSIGNED":
+            self.unassigned += 1
         else:
-            (
-                evaluation_rule,
-                connect,
-                connector,
-                running_connectors,
-                paused_connectors,
-                unassigned_connectors,
-                connectors_to_fix,
-            ) = queue.get()
-        if connect is None:
-            break
+            self.connectors_to_fix.append(connector)
+
+    def merge(self, other: ConnectorsTally) -> ConnectorsTally:
+        self.running += other.running
+        self.paused += other.paused
+        self.unassigned += other.unassigned
+        self.connectors_to_fix += other.connectors_to_fix
+        self.running_connectors += other.running_connectors
+        return self
 
-        connector_metrics: dict = {
-            "tasks": len(connector.tasks),
-            "running": len(
-                [_task for _task in connector.tasks if _task.state == "RUNNING"]
-            ),
-            "failed": len(
-                [_task for _task in connector.tasks if _task.state == "FAILED"]
-            ),
-            "unassigned": len(
-                [_task for _task in connector.tasks if _task.state == "UNASSIGNED"]
-            ),
-        }
+    @classmethod
+    def merge_all(cls, tallies: list[ConnectorsTally]) -> ConnectorsTally:
+        merged = cls()
+        for tally in tallies:
+            merged.merge(tally)
+        return merged
+
+
+def evaluate_connector_status(queue: Queue, tally: ConnectorsTally) -> ConnectorsTally:
+    """Evaluates the connectors from the queue until it is empty, counting the verdicts in the worker tally"""
+    while True:
+        try:
+            evaluation_rule, connect, snapshot, connector = queue.get_nowait()
+        except Empty:
+            break
         try:
-            if connector.state in ["RUNNING"]:
-                if (
-                    all([task.is_running() for task in connector.tasks])
-                    or (
-                        evaluation_rule.ignore_unassigned
-                        and all(
-                            [
-                                task.state in ["RUNNING", "UNASSIGNED"]
-                                for task in connector.tasks
-                            ]
-                        )
-                    )
-                    or (
-                        evaluation_rule.ignore_paused
-                        and all(
-                            [
-                                task.state in ["RUNNING", "PAUSED"]
-                                for task in connector.tasks
-                            ]
-                        )
-                    )
-                ):
-                    running_connectors += 1
-                else:
-                    connectors_to_fix.append(connector)
-            elif connector.state == "PAUSED":
-                paused_connectors += 1
-                if not evaluation_rule.ignore_paused:
-                    connector.cycle_connector()
-            elif connector.state == "UNASSIGNED":
-                unassigned_connectors += 1
-                if not evaluation_rule.ignore_unassigned:
-                    connector.cycle_connector()
-            else:
-                connectors_to_fix.append(connector)
+            verdict, cycle = evaluate_connector(evaluation_rule, connector)
+            tally.add(verdict, connector)
+            if cycle:
+                snapshot.connector(connector.name).cycle_connector()
         except GenericNotFound as error:
             LOG.debug(
                 "Connector {} not found in connect cluster. {}".format(
@@ -92,7 +138,8 @@ def evaluate_connector_status(queue: Queue) -> None:
                     connect.name, connector.name
                 )
             )
-            unassigned_connectors += 1
-            connectors_to_fix.append(connector)
-        connect.metrics["connectors"].update({connector.name: connector_metrics})
-        queue.task_done()
+            tally.unassigned += 1
+            tally.connectors_to_fix.append(connector)
+        finally:
+            queue.task_done()
+    return tally
@@ -11,14 +11,18 @@ import time
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
+    from concurrent.futures import Executor, Future
+
     from kafka_connect_api.kafka_connect_api import Connector
     from kafka_connect_watcher.cluster import ConnectCluster
     from kafka_connect_watcher.config import Config
+    from kafka_connect_watcher.notifications import NotificationDispatcher
+    from kafka_connect_watcher.remediation import RemediationScheduler
+    from kafka_connect_watcher.snapshot import ClusterSnapshot, ConnectorState
 
 import re
 from copy import deepcopy
 from queue import Queue
-from threading import Thread
 
 from compose_x_common.compose_x_common import (
     get_duration_timedelta,
@@ -26,10 +30,13 @@ from compose_x_common.compose_x_common import (
     set_else_none,
 )
 
-from kafka_connect_watcher.connectors_eval import evaluate_connector_status
+from kafka_connect_watcher.connectors_eval import (
+    ConnectorsTally,
+    evaluate_connector_status,
+)
 from kafka_connect_watcher.logger import LOG
-from kafka_connect_watcher.threads_settings import NUM_THREADS
-from kafka_connect_watcher.tools import import_regexes
+from kafka_connect_watcher.threads_settings import EVALUATION_THREADS
+from kafka_connect_watcher.tools import ConnectorsFilter, import_regexes
 
 
 class EvaluationRule:
@@ -61,7 +68,11 @@ class EvaluationRule:
                 self.definition["exclude_regex"]
             )
 
+        self.connectors_filter = ConnectorsFilter(
+            self.include_regexes, self.exclude_regexes
+        )
         self.ignore_paused = keyisset("ignore_paused", self.definition)
+        self.running_connectors: frozenset[str] = frozenset()
         self.ignore_unassigned = keyisset("ignore_unassigned", self.definition)
         self.auto_correct_rules: list[AutoCorrectRule] = [
             AutoCorrectRule(config, watcher_config)
@@ -74,75 +85,106 @@ class EvaluationRule:
     def original_config(self) -> dict:
         return self._original_definition
 
-    def filter_out_connector(self, connector_name: str, cluster: ConnectCluster):
-        if self.exclude_regexes:
-            for regex in self.exclude_regexes:
-                if regex.match(connector_name):
-                    LOG.info(
-                        f"{cluster.name} - Connector {connector_name} ignored by exclude_regex"
-                    )
-                    return False
-        for regex in self.include_regexes:
-            LOG.debug(regex.pattern)
-            LOG.debug(regex.match(connector_name))
-            if regex.match(connector_name):
-                return True
-
-    def execute(self, connect: ConnectCluster) -> None:
+    def map_notification_channels(self, watcher_config: Config) -> None:
+        """Maps the auto-correct rules notify targets to the channels of the (reloaded) configuration"""
+        for rule in self.auto_correct_rules:
+            rule.notification_channels = []
+            if rule.notify_targets:
+                rule.map_notify_targets(watcher_config)
+
+    def filter_out_connector(
+        self, connector_name: str, cluster: ConnectCluster
+    ) -> bool:
+        """
+        Whether the connector is to be evaluated by the rule.
+        Exclusions are logged only the first time the connector is evaluated.
+        """
+        if connector_name in self.connectors_filter:
+            return self.connectors_filter.matches(connector_name)
+        if self.connectors_filter.is_excluded(connector_name):
+            LOG.info(
+                f"{cluster.name} - Connector {connector_name} ignored by exclude_regex"
+            )
+        return self.connectors_filter.matches(connector_name)
+
+    def execute(
+        self,
+        connect: ConnectCluster,
+        snapshot: ClusterSnapshot,
+        remediation: RemediationScheduler = None,
+        executor: Executor = None,
+    ) -> None:
         """
         Scans the connectors, matches the ones invalid and not healthy.
         When the connector status is RUNNING, we check all the tasks too to be sure.
         When paused, if we ignore paused connectors, skip
+        The connectors are evaluated against the snapshot retrieved at the beginning of the scan.
+        With an executor, the connectors are evaluated by up to EVALUATION_THREADS futures submitted to it,
+        otherwise in the calling thread.
+        With a remediation scheduler, the auto-correct rules are queued to it instead of applied inline.
+        The connectors found RUNNING by the previous scan and unchanged since are not evaluated again.
+        The ConnectorState records of the snapshot are kept as the connectors metrics.
         """
-        connectors_total: int = len(connect.cluster.connectors)
-        connectors_to_handle: list[Connector] = []
-        for connector_name in list(connect.cluster.connectors.keys()):
-            if self.filter_out_connector(connector_name, connect):
-                connectors_to_handle.append(connect.cluster.connectors[connector_name])
-        connectors_to_fix: list[Connector] = []
-
+        connectors_total: int = len(snapshot)
+        connectors_to_handle: list[ConnectorState] = [
+            snapshot[connector_name]
+            for connector_name in snapshot.connectors_names
+            if self.filter_out_connector(connector_name, connect)
+        ]
         connectors_count: int = len(connectors_to_handle)
         ignored_connectors: int = connectors_total - connectors_count
-        paused_connectors: int = 0
-        unassigned_connectors: int = 0
-        running_connectors: int = 0
 
+        unchanged_tally = ConnectorsTally()
         connectors_processing_queue = Queue()
         for connector in connectors_to_handle:
-            connectors_processing_queue.put(
-                [
-                    self,
-                    connect,
-                    connector,
-                    running_connectors,
-                    paused_connectors,
-                    unassigned_connectors,
-                    connectors_to_fix,
-                ],
-                False,
-            )
-        _processes: list[Thread] = []
-        for _ in range(NUM_THREADS):
-            __process = Thread(
-                target=evaluate_connector_status,
-                daemon=True,
-                args=(connectors_processing_queue,),
-            )
-            _processes.append(__process)
-            __process.start()
-        for _process in _processes:
-            _process.join()
+            if (
+                connector.name in snapshot.unchanged
+                and connector.name in self.running_connectors
+            ):
+                unchanged_tally.add("RUNNING", connector)
+            else:
+                connectors_processing_queue.put(
+                    [self, connect, snapshot, connector], False
+                )
+        if executor is not None:
+            futures: list[Future] = [
+                executor.submit(
+                    evaluate_connector_status,
+                    connectors_processing_queue,
+                    ConnectorsTally(),
+                )
+                for _ in range(
+                    min(EVALUATION_THREADS, connectors_processing_queue.qsize())
+                )
+            ]
+            tallies: list[ConnectorsTally] = [future.result() for future in futures]
+        else:
+            tallies: list[ConnectorsTally] = [
+                evaluate_connector_status(
+                    connectors_processing_queue, ConnectorsTally()
+                )
+            ]
+        scan_tally = ConnectorsTally.merge_all([unchanged_tally, *tallies])
+        self.running_connectors = frozenset(scan_tally.running_connectors)
+        connect.metrics["connectors"].update(
+            {connector.name: connector for connector in connectors_to_handle}
+        )
         connect.metrics.update(
             {
                 "total": connectors_total,
                 "ignored": ignored_connectors,
                 "count": connectors_count,
-                "running": running_connectors,
-                "unassigned": unassigned_connectors,
-                "failed": len(connectors_to_fix),
+                "running": scan_tally.running,
+                "unassigned": scan_tally.unassigned,
+                "failed": len(scan_tally.connectors_to_fix),
             }
         )
-        for connector in connectors_to_fix:
+        for connector_state in scan_tally.connectors_to_fix:
+            connector = snapshot.connector(connector_state.name)
+            if remediation is not None:
+                if self.auto_correct_rules:
+                    remediation.submit(connect, connector, self.auto_correct_rules)
+                continue
             for rule in self.auto_correct_rules:
                 rule.process(connect, connector)
 
@@ -178,32 +220,57 @@ class AutoCorrectRule:
     def original_config(self) -> dict:
         return self._original_config
 
-    def process(self, cluster: ConnectCluster, connector: Connector):
-        initial_delay = max(
-            5, int(get_duration_timedelta(self.wait_for_status).total_seconds())
+    @property
+    def initial_delay(self) -> int:
+        """Delay, in seconds, to wait for before checking on the connector status"""
+        return max(5, int(get_duration_timedelta(self.wait_for_status).total_seconds()))
+
+    @property
+    def use_backoff(self) -> bool:
+        return "max_backoff" in self.config and "max_attempts" in self.config
+
+    def backoff_delays(self) -> list[int]:
+        """
+        Delays to wait for between each check of the connector recovery, before applying the action.
+        Delays increase exponentially from initial_delay, capped by max_backoff.
+        """
+        if not self.use_backoff:
+            return []
+        max_backoff = max(1, self.config["max_backoff"])
+        max_attempts = max(1, self.config["max_attempts"])
+        delays: list[int] = []
+        backoff = self.initial_delay
+        for _ in range(max_attempts):
+            delays.append(backoff)
+            backoff = min(max_backoff, backoff * 2)
+        return delays
+
+    @staticmethod
+    def is_recovered(status: dict) -> tuple[bool, str, list[str]]:
+        """Evaluates from the connector status whether the connector and all its tasks are running"""
+        connector_state = status.get("connector", {}).get("state", "UNKNOWN")
+        task_states = [task.get("state", "UNKNOWN") for task in status.get("tasks", [])]
+        all_tasks_running = all(state == "RUNNING" for state in task_states)
+        return (
+            connector_state == "RUNNING" and all_tasks_running,
+            connector_state,
+            task_states,
         )
-        use_backoff = "max_backoff" in self.config and "max_attempts" in self.config
 
-        if use_backoff:
-            max_backoff = max(1, self.config["max_backoff"])
-            max_attempts = max(1, self.config["max_attempts"])
-            backoff = initial_delay
-            attempt = 0
+    def process(self, cluster: ConnectCluster, connector: Connector):
+        initial_delay = self.initial_delay
+        backoff_delays = self.backoff_delays()
 
+        if backoff_delays:
             LOG.info(
-                f"Backoff enabled: max_backoff={max_backoff}, max_attempts={max_attempts}"
+                f"Backoff enabled: max_backoff={self.config['max_backoff']}, "
+                f"max_attempts={self.config['max_attempts']}"
             )
-
-            while attempt < max_attempts:
-                status = connector.status
-                connector_state = status.get("connector", {}).get("state", "UNKNOWN")
-                task_states = [
-                    task.get("state", "UNKNOWN") for task in status.get("tasks", [])
-                ]
-
-                all_tasks_running = all(state == "RUNNING" for state in task_states)
-
-                if connector_state == "RUNNING" and all_tasks_running:
+            for attempt, backoff in enumerate(backoff_delays):
+                recovered, connector_state, task_states = self.is_recovered(
+                    connector.status
+                )
+                if recovered:
                     LOG.info(
                         f"{connector.name} and all its tasks have recovered. Skipping corrective action."
                     )
@@ -211,11 +278,9 @@ class AutoCorrectRule:
 
                 LOG.warning(
                     f"{connector.name} not fully recovered (connector: {connector_state}, tasks: {task_states}). "
-                    f"Attempt {attempt + 1}/{max_attempts}. Waiting {backoff}s before re-checking..."
+                    f"Attempt {attempt + 1}/{len(backoff_delays)}. Waiting {backoff}s before re-checking..."
                 )
                 time.sleep(backoff)
-                backoff = min(max_backoff, backoff * 2)
-                attempt += 1
         else:
             LOG.info(
                 f"No backoff configured for connector {connector.name}. "
@@ -223,6 +288,20 @@ class AutoCorrectRule:
             )
 
         # Apply the corrective action after backoff loop or immediately if no backoff
+        if self.apply_action(cluster, connector):
+            time.sleep(initial_delay)
+            LOG.info(f"Post-action status for {connector.name}: {connector.status}")
+
+    def apply_action(
+        self,
+        cluster: ConnectCluster,
+        connector: Connector,
+        notifications: NotificationDispatcher = None,
+    ) -> bool:
+        """
+        Applies the corrective action to the connector and notifies the targets, through the notifications
+        dispatcher if any. Returns whether the action was applied.
+        """
         try:
             if self.action == "restart":
                 connector.restart()
@@ -237,10 +316,11 @@ class AutoCorrectRule:
 
             if self.notify_targets:
                 for channel in self.notification_channels:
-                    channel.send_error_notification(cluster, connector)
-
-            time.sleep(initial_delay)
-            LOG.info(f"Post-action status for {connector.name}: {connector.status}")
+                    if notifications:
+                        notifications.submit(channel, cluster, connector)
+                    else:
+                        channel.send_error_notification(cluster, connector)
+            return True
 
         except Exception as error:
             LOG.exception(
@@ -263,3 +343,4 @@ class AutoCorrectRule:
                     connector.cluster.set_logger_log_level(
                         connector_class, log_level_to_set
                     )
+            return False
@@ -7,14 +7,25 @@ from __future__ import annotations
 
 from typing import TYPE_CHECKING, Union
 
-from compose_x_common.compose_x_common import keyisset
+from compose_x_common.compose_x_common import keyisset, set_else_none
 
 if TYPE_CHECKING:
+    from kafka_connect_api.kafka_connect_api import Connector
+    from kafka_connect_watcher.aws_sns import SnsChannel
+    from kafka_connect_watcher.cluster import ConnectCluster
     from kafka_connect_watcher.config import Config
+    from kafka_connect_watcher.prometheus import PrometheusExporter
 
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from copy import deepcopy
+from hashlib import sha1
+from queue import Empty, Full, Queue
+from time import monotonic
 
-from kafka_connect_watcher.aws_sns import SnsChannel
+from kafka_connect_watcher.logger import LOG
+from kafka_connect_watcher.tools import get_duration_seconds
 
 
 class Notifications:
@@ -23,6 +34,8 @@ class Notifications:
         self.sns_channels: dict[str, SnsChannel] = {}
 
         if keyisset("sns", self.definition):
+            from kafka_connect_watcher.aws_sns import SnsChannel
+
             for name, definition in self.definition["sns"].items():
                 channel = SnsChannel(name, definition)
                 self.sns_channels[name] = channel
@@ -30,3 +43,271 @@ class Notifications:
     @property
     def definition(self) -> dict:
         return self._definition
+
+
+def connector_error_fingerprint(connector_status: Union[dict, str]) -> str:
+    """
+    Fingerprint of the connector error, from the connector and tasks states and the first line of their traces.
+    Alerts for the same connector with the same fingerprint are duplicates.
+    """
+    if not isinstance(connector_status, dict):
+        return sha1(str(connector_status).encode()).hexdigest()
+
+    def error_parts(status: dict) -> list:
+        trace = set_else_none("trace", status, "")
+        return [status.get("state"), trace.splitlines()[0] if trace else ""]
+
+    parts: list = error_parts(set_else_none("connector", connector_status, {}))
+    for task in sorted(
+        set_else_none("tasks", connector_status, []),
+        key=lambda _task: _task.get("id", 0),
+    ):
+        parts += [task.get("id")] + error_parts(task)
+    return sha1(json.dumps(parts).encode()).hexdigest()
+
+
+class Alert:
+    """Error of a connector to notify to a channel"""
+
+    def __init__(
+        self,
+        channel: SnsChannel,
+        cluster_name: str,
+        connector_name: str,
+        connector_status: Union[dict, str],
+        fingerprint: str = None,
+    ):
+        self.channel = channel
+        self.cluster_name = cluster_name
+        self.connector_name = connector_name
+        self.connector_status = connector_status
+        self.fingerprint = fingerprint
+        self.submitted: float = monotonic()
+
+    @property
+    def key(self) -> tuple:
+        """Identifies the alerts of the connector to the channel, to suppress the duplicates"""
+        return repr(self.channel), self.cluster_name, self.connector_name
+
+
+class NotificationDispatcher:
+    """
+    Sends the error notifications off the remediations. Alerts are put in a bounded queue, dropped when it is full,
+    and the alerts of a cluster received within the coalesce window are sent to the channel as a single digest
+    by a pool of workers. An alert identical to the last one sent for the connector is suppressed for
+    ``suppress_duplicates_for`` seconds.
+    """
+
+    def __init__(
+        self,
+        coalesce_window: float = 30,
+        suppress_duplicates_for: float = 3600,
+        queue_size: int = 1000,
+        workers: int = 2,
+    ):
+        self.coalesce_window = coalesce_window
+        self.suppress_duplicates_for = suppress_duplicates_for
+        self.workers = workers
+        self._queue: Queue = Queue(maxsize=queue_size)
+        self._fingerprints: dict[tuple, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor = None
+        self._coalescer: threading.Thread = None
+        self.keep_running: bool = False
+        self.metrics: dict = {}
+        self.reset_metrics()
+
+    @classmethod
+    def from_config(cls, config: Config) -> NotificationDispatcher:
+        settings: dict = config.notifications_config
+        return cls(
+            coalesce_window=get_duration_seconds(
+                set_else_none("coalesce_window", settings, "30s")
+            ),
+            suppress_duplicates_for=get_duration_seconds(
+                set_else_none("suppress_duplicates_for", settings, "1h")
+            ),
+            queue_size=set_else_none("queue_size", settings, 1000),
+            workers=set_else_none("workers", settings, 2),
+        )
+
+    def reset_metrics(self) -> None:
+        self.metrics.update(
+            {
+                "queued": 0,
+                "dropped": 0,
+                "suppressed": 0,
+                "sent": 0,
+                "failed": 0,
+                "digests": 0,
+                "latency_seconds_total": 0.0,
+                "latency_seconds_max": 0.0,
+            }
+        )
+
+    def collect_metrics(self) -> dict:
+        """Returns the metrics since the last collection, and the current queue depth"""
+        with self._lock:
+            metrics = dict(self.metrics)
+            self.reset_metrics()
+        metrics["queue_depth"] = self._queue.qsize()
+        return metrics
+
+    def start(self) -> None:
+        if self.keep_running:
+            return
+        self.keep_running = True
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="notifications"
+        )
+        self._coalescer = threading.Thread(
+            target=self.run_coalescer, daemon=True, name="notifications-coalescer"
+        )
+        self._coalescer.start()
+
+    def stop(self) -> None:
+        """Stops the dispatcher, after sending the alerts already queued"""
+        self.keep_running = False
+        if self._coalescer:
+            self._coalescer.join()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+
+    def submit(
+        self, channel: SnsChannel, cluster: ConnectCluster, connector: Connector
+    ) -> bool:
+        """Queues the alert for the connector. Returns False if it was suppressed or dropped."""
+        connector_status = channel.get_connector_status(connector)
+        alert = Alert(
+            channel,
+            cluster.name,
+            connector.name,
+            connector_status,
+            connector_error_fingerprint(connector_status),
+        )
+        key: tuple = alert.key
+        fingerprint: str = alert.fingerprint
+        now = monotonic()
+        with self._lock:
+            previous = self._fingerprints.get(key)
+            if previous and previous[0] == fingerprint and previous[1] > now:
+                self.metrics["suppressed"] += 1
+                LOG.debug(
+                    f"{cluster.name} - {connector.name} - duplicate alert to {channel} suppressed"
+                )
+                return False
+            self._fingerprints[key] = (fingerprint, now + self.suppress_duplicates_for)
+        try:
+            self._queue.put_nowait(alert)
+        except Full:
+            with self._lock:
+                self._fingerprints.pop(key, None)
+                self.metrics["dropped"] += 1
+            LOG.warning(
+                f"{cluster.name} - {connector.name} - notifications queue full. Alert to {channel} dropped"
+            )
+            return False
+        with self._lock:
+            self.metrics["queued"] += 1
+        return True
+
+    def run_coalescer(self) -> None:
+        """
+        Groups the queued alerts per channel and cluster, and hands each group to the workers once its coalesce
+        window, started by its first alert, is over.
+        """
+        pending: dict[tuple, list[Alert]] = {}
+        while self.keep_running:
+            now = monotonic()
+            timeout = min(
+                [1.0]
+                + [
+                    max(0.0, alerts[0].submitted + self.coalesce_window - now)
+                    for alerts in pending.values()
+                ]
+            )
+            try:
+                alert = self._queue.get(timeout=timeout)
+                pending.setdefault((alert.channel, alert.cluster_name), []).append(
+                    alert
+                )
+            except Empty:
+                pass
+            now = monotonic()
+            for group, alerts in list(pending.items()):
+                if alerts[0].submitted + self.coalesce_window <= now:
+                    self._executor.submit(self.send, alerts)
+                    del pending[group]
+            self.prune_fingerprints(now)
+        while True:
+            try:
+                alert = self._queue.get_nowait()
+            except Empty:
+                break
+            pending.setdefault((alert.channel, alert.cluster_name), []).append(alert)
+        for alerts in pending.values():
+            self._executor.submit(self.send, alerts)
+
+    def prune_fingerprints(self, now: float) -> None:
+        with self._lock:
+            for key in [
+                key for key, (_, expiry) in self._fingerprints.items() if expiry <= now
+            ]:
+                del self._fingerprints[key]
+
+    def forget_fingerprints(self, alerts: list[Alert]) -> None:
+        """Forgets the fingerprints of alerts which were not sent, so that the next identical alerts are not suppressed"""
+        with self._lock:
+            for alert in alerts:
+                previous = self._fingerprints.get(alert.key)
+                if previous and previous[0] == alert.fingerprint:
+                    del self._fingerprints[alert.key]
+
+    def send(self, alerts: list[Alert]) -> None:
+        channel = alerts[0].channel
+        try:
+            sent: bool = channel.send_digest_notification(
+                alerts[0].cluster_name,
+                [(alert.connector_name, alert.connector_status) for alert in alerts],
+            )
+        except Exception as error:
+            LOG.exception(error)
+            sent = False
+        if not sent:
+            LOG.error(f"{alerts[0].cluster_name} - failed to notify {channel}")
+            self.forget_fingerprints(alerts)
+            with self._lock:
+                self.metrics["failed"] += len(alerts)
+            return
+        now = monotonic()
+        latencies: list[float] = [now - alert.submitted for alert in alerts]
+        with self._lock:
+            self.metrics["sent"] += len(alerts)
+            self.metrics["digests"] += 1
+            self.metrics["latency_seconds_total"] += sum(latencies)
+            self.metrics["latency_seconds_max"] = max(
+                [self.metrics["latency_seconds_max"]] + latencies
+            )
+
+
+def process_notifications_metrics(
+    notifications: NotificationDispatcher,
+    watcher_metrics: dict,
+    prometheus_exporter: PrometheusExporter = None,
+) -> None:
+    """Adds the notifications dispatcher metrics since the previous collection to the watcher metrics"""
+    notifications_metrics: dict = notifications.collect_metrics()
+    if prometheus_exporter:
+        prometheus_exporter.update_notifications(notifications_metrics)
+    for metric_name in (
+        "queue_depth",
+        "queued",
+        "dropped",
+        "suppressed",
+        "sent",
+        "failed",
+        "latency_seconds_max",
+    ):
+        watcher_metrics[f"notifications_{metric_name}"] = notifications_metrics[
+            metric_name
+        ]
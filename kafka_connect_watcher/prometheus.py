@@ -0,0 +1,168 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+Prometheus exporter for the clusters & connectors metrics
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from kafka_connect_watcher.cluster import ConnectCluster
+    from kafka_connect_watcher.config import Config
+    from kafka_connect_watcher.sharding import Shard
+
+import threading
+
+from compose_x_common.compose_x_common import set_else_none
+from prometheus_client import CollectorRegistry, Counter, Gauge, start_http_server
+
+from kafka_connect_watcher.connectors_eval import get_connector_metrics
+from kafka_connect_watcher.logger import LOG
+
+CLUSTER_CONNECTORS_STATUSES: tuple = (
+    "total",
+    "ignored",
+    "count",
+    "running",
+    "unassigned",
+    "failed",
+)
+
+NOTIFICATIONS_OUTCOMES: tuple = ("queued", "dropped", "suppressed", "sent", "failed")
+
+
+class PrometheusExporter:
+    """
+    Exposes the metrics of the clusters, updated at the end of each scan, on /metrics.
+    The series of the connectors removed from a cluster are removed too.
+    """
+
+    def __init__(self, port: int = 8000, registry: CollectorRegistry = None):
+        self.port = port
+        self.registry = registry if registry else CollectorRegistry()
+        self.cluster_connectors = Gauge(
+            "kafka_connect_watcher_cluster_connectors",
+            "Connectors of the connect cluster, per evaluation status",
+            ["cluster", "status"],
+            registry=self.registry,
+        )
+        self.cluster_scans = Counter(
+            "kafka_connect_watcher_cluster_scans",
+            "Scans of the connect cluster",
+            ["cluster"],
+            registry=self.registry,
+        )
+        self.cluster_scans_skipped = Counter(
+            "kafka_connect_watcher_cluster_scans_skipped",
+            "Scans of the connect cluster skipped as the previous one was still in progress",
+            ["cluster"],
+            registry=self.registry,
+        )
+        self.connector_tasks = Gauge(
+            "kafka_connect_watcher_connector_tasks",
+            "Tasks of the connector, per state",
+            ["cluster", "connector", "state"],
+            registry=self.registry,
+        )
+        self.notifications = Counter(
+            "kafka_connect_watcher_notifications",
+            "Connectors alerts, per outcome (queued, dropped, suppressed, sent, failed)",
+            ["outcome"],
+            registry=self.registry,
+        )
+        self.notifications_queue_depth = Gauge(
+            "kafka_connect_watcher_notifications_queue_depth",
+            "Alerts waiting in the notifications queue",
+            registry=self.registry,
+        )
+        self.notifications_latency = Gauge(
+            "kafka_connect_watcher_notifications_latency_seconds_max",
+            "Longest delay between an alert and its notification, since the previous update",
+            registry=self.registry,
+        )
+        self.shard_clusters = Gauge(
+            "kafka_connect_watcher_shard_clusters",
+            "Connect clusters watched by the watcher replica",
+            ["shard_index", "shard_count"],
+            registry=self.registry,
+        )
+        self.shard_connectors = Gauge(
+            "kafka_connect_watcher_shard_connectors",
+            "Connectors of the connect clusters watched by the watcher replica",
+            ["shard_index", "shard_count"],
+            registry=self.registry,
+        )
+        self._connectors_labels: dict[str, set[tuple]] = {}
+        self._scans_skipped: dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Config) -> PrometheusExporter:
+        return cls(int(set_else_none("port", config.prometheus_config, 8000)))
+
+    def start(self) -> None:
+        start_http_server(self.port, registry=self.registry)
+        LOG.info(f"Prometheus metrics exposed on port {self.port}")
+
+    def update_notifications(self, notifications_metrics: dict) -> None:
+        """Updates the notifications series from the dispatcher metrics collected since the previous update"""
+        with self._lock:
+            for outcome in NOTIFICATIONS_OUTCOMES:
+                self.notifications.labels(outcome).inc(notifications_metrics[outcome])
+            self.notifications_queue_depth.set(notifications_metrics["queue_depth"])
+            self.notifications_latency.set(notifications_metrics["latency_seconds_max"])
+
+    def update_shard(self, shard: Shard, clusters: int, connectors: int) -> None:
+        """Updates the load of the watcher replica shard"""
+        labels: tuple = (str(shard.index), str(shard.count))
+        with self._lock:
+            self.shard_clusters.labels(*labels).set(clusters)
+            self.shard_connectors.labels(*labels).set(connectors)
+
+    def remove_cluster(self, cluster_name: str) -> None:
+        """Removes the series of the cluster & its connectors, once the cluster is no longer watched"""
+        with self._lock:
+            for status in CLUSTER_CONNECTORS_STATUSES:
+                try:
+                    self.cluster_connectors.remove(cluster_name, status)
+                except KeyError:
+                    pass
+            for counter in (self.cluster_scans, self.cluster_scans_skipped):
+                try:
+                    counter.remove(cluster_name)
+                except KeyError:
+                    pass
+            for labels in self._connectors_labels.pop(cluster_name, set()):
+                self.connector_tasks.remove(*labels)
+            self._scans_skipped.pop(cluster_name, None)
+
+    def update(self, cluster: ConnectCluster) -> None:
+        """Updates the series of the cluster & its connectors from the cluster metrics"""
+        with self._lock:
+            self.cluster_scans.labels(cluster.name).inc()
+            for status in CLUSTER_CONNECTORS_STATUSES:
+                if status in cluster.metrics:
+                    self.cluster_connectors.labels(cluster.name, status).set(
+                        cluster.metrics[status]
+                    )
+            scans_skipped = cluster.metrics.get("scans_skipped", 0)
+            self.cluster_scans_skipped.labels(cluster.name).inc(
+                scans_skipped - self._scans_skipped.get(cluster.name, 0)
+            )
+            self._scans_skipped[cluster.name] = scans_skipped
+
+            connectors_labels: set[tuple] = set()
+            for connector_name, connector in cluster.metrics["connectors"].items():
+                for state, value in get_connector_metrics(connector).items():
+                    self.connector_tasks.labels(
+                        cluster.name, connector_name, state
+                    ).set(value)
+                    connectors_labels.add((cluster.name, connector_name, state))
+            for labels in self._connectors_labels.get(cluster.name, set()).difference(
+                connectors_labels
+            ):
+                self.connector_tasks.remove(*labels)
+            self._connectors_labels[cluster.name] = connectors_labels
@@ -0,0 +1,138 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+Reloads the configuration of a running watcher. Only the clusters, evaluation rules and notification channels
+which definition changed are rebuilt: the others keep their HTTP connections, caches and scans schedules.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from kafka_connect_watcher.config import Config
+    from kafka_connect_watcher.sharding import Shard
+
+from os import path
+
+from compose_x_common.compose_x_common import set_else_none
+
+from kafka_connect_watcher.cluster import ConnectCluster
+from kafka_connect_watcher.error_rules import EvaluationRule
+
+
+def get_cluster_name(cluster_config: dict) -> str:
+    """Name of the cluster, as ConnectCluster names it, identifying the cluster across reloads"""
+    name = set_else_none("name", cluster_config)
+    if name:
+        return name
+    return f"{cluster_config['hostname']}_{int(set_else_none('port', cluster_config, 8083))}"
+
+
+def get_config_file_mtime(config: Config) -> float:
+    """Last modification time of the configuration file, None if the configuration was not loaded from a file"""
+    if not config.config_file_path:
+        return None
+    try:
+        return path.getmtime(config.config_file_path)
+    except OSError:
+        return None
+
+
+def without_rules(cluster_config: dict) -> dict:
+    return {
+        key: value
+        for key, value in cluster_config.items()
+        if key != EvaluationRule.config_key
+    }
+
+
+class ConfigChanges:
+    """Clusters and notification channels added, removed or changed by a configuration reload"""
+
+    def __init__(self):
+        self.clusters_added: list[str] = []
+        self.clusters_removed: list[str] = []
+        self.clusters_changed: list[str] = []
+        self.clusters_rules_changed: list[str] = []
+        self.channels_added: list[str] = []
+        self.channels_removed: list[str] = []
+        self.channels_changed: list[str] = []
+
+    def __bool__(self) -> bool:
+        return any(self.__dict__.values())
+
+    def __repr__(self) -> str:
+        changes: list[str] = [
+            f"{change}={names}" for change, names in self.__dict__.items() if names
+        ]
+        return ", ".join(changes) if changes else "no changes"
+
+
+def reload_channels(current: Config, config: Config, changes: ConfigChanges) -> None:
+    """Keeps, in the reloaded configuration, the channels which definition did not change, with their SNS clients"""
+    current_definitions: dict = current.channels_definitions
+    definitions: dict = config.channels_definitions
+    for channel_path, definition in definitions.items():
+        if channel_path not in current_definitions:
+            changes.channels_added.append(channel_path)
+        elif current_definitions[channel_path] != definition:
+            changes.channels_changed.append(channel_path)
+        elif channel_path in current.notification_channels:
+            config.notification_channels[channel_path] = current.notification_channels[
+                channel_path
+            ]
+    changes.channels_removed = [
+        channel_path
+        for channel_path in current_definitions
+        if channel_path not in definitions
+    ]
+
+
+def reload_clusters(
+    clusters: dict[str, ConnectCluster],
+    current: Config,
+    config: Config,
+    shard: Shard = None,
+) -> tuple[dict[str, ConnectCluster], ConfigChanges]:
+    """
+    Maps the clusters of the reloaded configuration, of the shard if set, to the running ones.
+    The clusters which settings changed are rebuilt, the ones which only evaluation rules changed get the new rules.
+    The running clusters are only modified once all the clusters and rules were built: if any fails,
+    the exception is raised with the running clusters unchanged.
+    """
+    changes = ConfigChanges()
+    reload_channels(current, config, changes)
+    reloaded_clusters: dict[str, ConnectCluster] = {}
+    rules_updates: list[tuple[ConnectCluster, list[EvaluationRule], dict]] = []
+    clusters_configs: list[dict] = config.config["clusters"]
+    if shard:
+        clusters_configs = shard.select_clusters(clusters_configs)
+    for cluster_config in clusters_configs:
+        name: str = get_cluster_name(cluster_config)
+        connect_cluster = clusters.get(name)
+        if connect_cluster is None:
+            changes.clusters_added.append(name)
+            connect_cluster = ConnectCluster(cluster_config, config)
+        elif without_rules(connect_cluster.original_definition) != without_rules(
+            cluster_config
+        ):
+            changes.clusters_changed.append(name)
+            connect_cluster = ConnectCluster(cluster_config, config)
+        else:
+            rules_updates.append(
+                (
+                    connect_cluster,
+                    connect_cluster.build_rules(cluster_config, config),
+                    cluster_config,
+                )
+            )
+        reloaded_clusters[name] = connect_cluster
+    for connect_cluster, rules, cluster_config in rules_updates:
+        if connect_cluster.set_rules(rules, cluster_config, config):
+            changes.clusters_rules_changed.append(connect_cluster.name)
+    changes.clusters_removed = [
+        name for name in clusters if name not in reloaded_clusters
+    ]
+    return reloaded_clusters, changes
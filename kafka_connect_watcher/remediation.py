@@ -0,0 +1,213 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+Applies the auto-correct rules to the failed connectors, off the clusters scans.
+The connectors recovery is re-checked on timers instead of sleeping in the scan workers.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, Optional
+
+if TYPE_CHECKING:
+    from kafka_connect_api.kafka_connect_api import Connector
+    from kafka_connect_watcher.cluster import ConnectCluster
+    from kafka_connect_watcher.error_rules import AutoCorrectRule
+    from kafka_connect_watcher.notifications import NotificationDispatcher
+
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+from time import monotonic
+
+from kafka_connect_watcher.logger import LOG
+from kafka_connect_watcher.threads_settings import REMEDIATION_THREADS
+
+
+class Remediation:
+    """
+    Auto-correct rules being applied, in order, to a connector: a rule starts once the previous one is over.
+    Each step returns the delay, in seconds, before the next one, or None once the remediation is over.
+    """
+
+    def __init__(
+        self,
+        rules: list[AutoCorrectRule],
+        cluster: ConnectCluster,
+        connector: Connector,
+        notifications: NotificationDispatcher = None,
+    ):
+        self.rules = list(rules)
+        self.cluster = cluster
+        self.connector = connector
+        self.notifications = notifications
+        self.rule: AutoCorrectRule = None
+        self.rule_index: int = -1
+        self.backoff_delays: list[int] = []
+        self.attempt: int = 0
+        self.step: Callable[[], Optional[int]] = self.start
+
+    @property
+    def key(self) -> tuple:
+        return self.cluster.name, self.connector.name
+
+    def start(self) -> Optional[int]:
+        """Starts the next rule, once the previous one is over. None once all the rules were applied."""
+        self.rule_index += 1
+        if self.rule_index >= len(self.rules):
+            return None
+        self.rule = self.rules[self.rule_index]
+        self.backoff_delays = self.rule.backoff_delays()
+        self.attempt = 0
+        if self.backoff_delays:
+            LOG.info(
+                f"Backoff enabled: max_backoff={self.rule.config['max_backoff']}, "
+                f"max_attempts={self.rule.config['max_attempts']}"
+            )
+            self.step = self.check_recovery
+        else:
+            LOG.info(
+                f"No backoff configured for connector {self.connector.name}. "
+                f"Applying corrective action '{self.rule.action}' immediately."
+            )
+            self.step = self.apply_action
+        return self.step()
+
+    def check_recovery(self) -> Optional[int]:
+        recovered, connector_state, task_states = self.rule.is_recovered(
+            self.connector.status
+        )
+        if recovered:
+            LOG.info(
+                f"{self.connector.name} and all its tasks have recovered. Skipping corrective action."
+            )
+            return self.start()
+        backoff = self.backoff_delays[self.attempt]
+        LOG.warning(
+            f"{self.connector.name} not fully recovered (connector: {connector_state}, tasks: {task_states}). "
+            f"Attempt {self.attempt + 1}/{len(self.backoff_delays)}. Waiting {backoff}s before re-checking..."
+        )
+        self.attempt += 1
+        if self.attempt >= len(self.backoff_delays):
+            self.step = self.apply_action
+        return backoff
+
+    def apply_action(self) -> Optional[int]:
+        if not self.rule.apply_action(self.cluster, self.connector, self.notifications):
+            return self.start()
+        self.step = self.report_status
+        return self.rule.initial_delay
+
+    def report_status(self) -> Optional[int]:
+        LOG.info(
+            f"Post-action status for {self.connector.name}: {self.connector.status}"
+        )
+        return self.start()
+
+
+class RemediationScheduler:
+    """
+    Keeps the remediations in a heap ordered by the time their next step is due, and runs the due steps
+    with a bounded pool of threads. A connector already being remediated is not queued again
+    until that remediation is over. The notifications of the corrective actions are sent through
+    the notifications dispatcher, if set.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = REMEDIATION_THREADS,
+        notifications: NotificationDispatcher = None,
+    ):
+        self.max_workers = max_workers
+        self.notifications = notifications
+        self._timers: list[tuple[float, int, Remediation]] = []
+        self._sequence = count()
+        self._in_flight: set[tuple] = set()
+        self._condition = threading.Condition()
+        self._executor: ThreadPoolExecutor = None
+        self._timers_thread: threading.Thread = None
+        self.keep_running: bool = False
+        self.metrics: dict = {"submitted": 0, "deduplicated": 0, "completed": 0}
+
+    def __len__(self) -> int:
+        with self._condition:
+            return len(self._in_flight)
+
+    def start(self) -> None:
+        with self._condition:
+            if self.keep_running:
+                return
+            self.keep_running = True
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="remediation"
+        )
+        self._timers_thread = threading.Thread(
+            target=self.run_timers, daemon=True, name="remediation-timers"
+        )
+        self._timers_thread.start()
+
+    def stop(self) -> None:
+        """Stops the scheduler. The steps in progress complete, the pending ones are dropped."""
+        with self._condition:
+            self.keep_running = False
+            self._condition.notify_all()
+        if self._timers_thread:
+            self._timers_thread.join()
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def submit(
+        self,
+        cluster: ConnectCluster,
+        connector: Connector,
+        rules: list[AutoCorrectRule],
+    ) -> bool:
+        """Queues the remediation of the connector with the rules, in order. Returns False if it is already in progress."""
+        remediation = Remediation(rules, cluster, connector, self.notifications)
+        with self._condition:
+            if remediation.key in self._in_flight:
+                LOG.debug(
+                    f"{cluster.name} - {connector.name} remediation already in progress"
+                )
+                self.metrics["deduplicated"] += 1
+                return False
+            self._in_flight.add(remediation.key)
+            self.metrics["submitted"] += 1
+            self.schedule(remediation, 0)
+        return True
+
+    def schedule(self, remediation: Remediation, delay: float) -> None:
+        """Schedules the next step of the remediation. Must be called with the condition held."""
+        heapq.heappush(
+            self._timers, (monotonic() + delay, next(self._sequence), remediation)
+        )
+        self._condition.notify()
+
+    def run_timers(self) -> None:
+        """Submits the due steps to the executor, waiting until the next one is due or a new one is scheduled"""
+        with self._condition:
+            while self.keep_running:
+                now = monotonic()
+                while self._timers and self._timers[0][0] <= now:
+                    _, _, remediation = heapq.heappop(self._timers)
+                    self._executor.submit(self.run_step, remediation)
+                timeout = self._timers[0][0] - now if self._timers else None
+                self._condition.wait(timeout)
+
+    def run_step(self, remediation: Remediation) -> None:
+        try:
+            delay = remediation.step()
+        except Exception as error:
+            LOG.exception(error)
+            LOG.error(
+                f"{remediation.cluster.name} - remediation of {remediation.connector.name} failed"
+            )
+            delay = None
+        with self._condition:
+            if delay is None or not self.keep_running:
+                self._in_flight.discard(remediation.key)
+                self.metrics["completed"] += 1
+            else:
+                self.schedule(remediation, delay)
@@ -0,0 +1,169 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+One-shot scan of the clusters, for cron jobs and CI pipelines. The clusters are scanned concurrently
+and evaluated against their rules, without applying the auto-correct actions, which are only reported.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from kafka_connect_api.kafka_connect_api import Cluster, Connector
+    from kafka_connect_watcher.config import Config
+    from kafka_connect_watcher.error_rules import AutoCorrectRule
+    from kafka_connect_watcher.sharding import Shard
+    from kafka_connect_watcher.snapshot import ConnectorState
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from time import monotonic
+
+from kafka_connect_watcher.cluster import ConnectCluster
+from kafka_connect_watcher.connectors_eval import get_connector_metrics
+from kafka_connect_watcher.logger import LOG
+from kafka_connect_watcher.reload import get_cluster_name
+from kafka_connect_watcher.snapshot import ClusterSnapshot, ConnectorSnapshot
+from kafka_connect_watcher.threads_settings import SCAN_THREADS
+
+EXIT_HEALTHY: int = 0
+EXIT_UNHEALTHY: int = 1
+EXIT_SCAN_FAILED: int = 2
+
+
+class DryRunRemediation:
+    """Stands for the remediation scheduler, recording the corrective actions instead of applying them"""
+
+    def __init__(self):
+        self.actions: list[dict] = []
+
+    def record(self, connector_name: str, action: str) -> None:
+        self.actions.append({"connector": connector_name, "action": action})
+
+    def submit(
+        self,
+        cluster: ConnectCluster,
+        connector: Connector,
+        rules: list[AutoCorrectRule],
+    ) -> bool:
+        for rule in rules:
+            self.record(connector.name, rule.action)
+        return True
+
+
+class DryRunConnector(ConnectorSnapshot):
+    """Connector which cycle, on PAUSED or UNASSIGNED state, is recorded instead of applied"""
+
+    def __init__(
+        self,
+        cluster: Cluster,
+        connector_state: ConnectorState,
+        remediation: DryRunRemediation,
+    ):
+        super().__init__(cluster, connector_state)
+        self.remediation = remediation
+
+    def cycle_connector(self, *args, **kwargs) -> None:
+        self.remediation.record(self.name, "cycle")
+
+
+class DryRunSnapshot(ClusterSnapshot):
+    def __init__(self, snapshot: ClusterSnapshot, remediation: DryRunRemediation):
+        super().__init__(snapshot.connectors, snapshot.unchanged, snapshot.cluster)
+        self.remediation = remediation
+
+    def connector(self, connector_name: str) -> DryRunConnector:
+        return DryRunConnector(
+            self.cluster, self.connectors[connector_name], self.remediation
+        )
+
+
+def scan_cluster(cluster_config: dict, config: Config) -> dict:
+    """Connects to the cluster and scans it once, returns its health report"""
+    start = monotonic()
+    remediation = DryRunRemediation()
+    report: dict = {"healthy": False}
+    connect_cluster: ConnectCluster = None
+    try:
+        connect_cluster = ConnectCluster(cluster_config, config)
+        snapshot = DryRunSnapshot(connect_cluster.get_snapshot(), remediation)
+        for handling_rule in connect_cluster.handling_rules:
+            handling_rule.execute(connect_cluster, snapshot, remediation)
+    except Exception as error:
+        LOG.exception(error)
+        LOG.error(f"Failed to scan the cluster {get_cluster_name(cluster_config)}")
+        report["error"] = str(error)
+    else:
+        report["healthy"] = not (
+            remediation.actions or connect_cluster.metrics.get("failed")
+        )
+    report["duration_seconds"] = round(monotonic() - start, 3)
+    metrics: dict = connect_cluster.metrics if connect_cluster else {"connectors": {}}
+    report["metrics"] = {
+        metric_name: value
+        for metric_name, value in metrics.items()
+        if isinstance(value, (int, float))
+    }
+    report["connectors"] = {
+        connector_name: {"state": connector.state, **get_connector_metrics(connector)}
+        for connector_name, connector in metrics["connectors"].items()
+    }
+    report["corrective_actions"] = remediation.actions
+    return report
+
+
+def scan_clusters(config: Config, shard: Shard = None) -> dict:
+    """
+    Scans all the clusters, of the shard if set, concurrently, each in its own thread up to SCAN_THREADS,
+    so that the scan takes as long as the slowest cluster rather than the sum of all the scans.
+    """
+    clusters_configs: list[dict] = config.config["clusters"]
+    if shard:
+        clusters_configs = shard.select_clusters(clusters_configs)
+    with ThreadPoolExecutor(
+        max_workers=max(1, min(len(clusters_configs), SCAN_THREADS)),
+        thread_name_prefix="scan",
+    ) as executor:
+        reports: list[dict] = list(
+            executor.map(
+                scan_cluster, clusters_configs, [config] * len(clusters_configs)
+            )
+        )
+    return {
+        "healthy": all(report["healthy"] for report in reports),
+        "clusters": {
+            get_cluster_name(cluster_config): report
+            for cluster_config, report in zip(clusters_configs, reports)
+        },
+    }
+
+
+def get_exit_code(scan_report: dict) -> int:
+    clusters_reports: list[dict] = list(scan_report["clusters"].values())
+    if any("error" in report for report in clusters_reports):
+        return EXIT_SCAN_FAILED
+    if not scan_report["healthy"]:
+        return EXIT_UNHEALTHY
+    return EXIT_HEALTHY
+
+
+def format_scan_report(scan_report: dict, output: str) -> str:
+    if output == "json":
+        return json.dumps(scan_report, indent=2)
+    lines: list[str] = []
+    for cluster_name, report in scan_report["clusters"].items():
+        if "error" in report:
+            lines.append(f"{cluster_name}: scan failed - {report['error']}")
+            continue
+        metrics: dict = report["metrics"]
+        lines.append(
+            f"{cluster_name}: {'healthy' if report['healthy'] else 'unhealthy'} - "
+            f"{metrics.get('running', 0)}/{metrics.get('count', 0)} running, "
+            f"{metrics.get('failed', 0)} failed, {metrics.get('ignored', 0)} ignored "
+            f"({report['duration_seconds']}s)"
+        )
+        for action in report["corrective_actions"]:
+            lines.append(f"  {action['connector']}: would {action['action']}")
+    return "\n".join(lines)
@@ -0,0 +1,88 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+Schedules the scans of the connect clusters, each one on its own interval.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from kafka_connect_watcher.cluster import ConnectCluster
+
+import heapq
+import threading
+from itertools import count
+
+from kafka_connect_watcher.logger import LOG
+
+
+class ClustersScheduler:
+    """
+    Keeps the clusters in a heap ordered by the time their next scan is due.
+    A cluster which scan is still in progress when the next one is due is not scanned twice: the scan is skipped
+    and counted as such. Scans missed by more than one interval are coalesced into a single one.
+    """
+
+    def __init__(self, clusters: list[ConnectCluster], now: float):
+        self._heap: list[tuple[float, int, ConnectCluster]] = []
+        self._sequence = count()
+        self._in_flight: set[ConnectCluster] = set()
+        self._lock = threading.Lock()
+        self.metrics: dict = {"scans_started": 0, "scans_skipped": 0}
+        for cluster in clusters:
+            self.add(cluster, now)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def add(self, cluster: ConnectCluster, due: float) -> None:
+        with self._lock:
+            heapq.heappush(self._heap, (due, next(self._sequence), cluster))
+
+    def remove(self, cluster: ConnectCluster) -> None:
+        """Stops scheduling the scans of the cluster. A scan in progress completes."""
+        with self._lock:
+            self._heap = [entry for entry in self._heap if entry[2] is not cluster]
+            heapq.heapify(self._heap)
+
+    def pop_due(self, now: float) -> list[ConnectCluster]:
+        """Returns the clusters due for a scan and schedules their next one"""
+        due_clusters: list[ConnectCluster] = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due, _, cluster = heapq.heappop(self._heap)
+                next_due = due + cluster.interval
+                if next_due <= now:
+                    LOG.debug(
+                        f"{cluster.name} - scans missed since {now - due:.1f}s. Coalesced into one."
+                    )
+                    next_due = now + cluster.interval
+                heapq.heappush(self._heap, (next_due, next(self._sequence), cluster))
+                if cluster in self._in_flight:
+                    LOG.warning(
+                        f"{cluster.name} - previous scan still in progress. Skipping this scan."
+                    )
+                    self.metrics["scans_skipped"] += 1
+                    cluster.metrics["scans_skipped"] = (
+                        cluster.metrics.get("scans_skipped", 0) + 1
+                    )
+                    continue
+                self._in_flight.add(cluster)
+                self.metrics["scans_started"] += 1
+                due_clusters.append(cluster)
+        return due_clusters
+
+    def done(self, cluster: ConnectCluster) -> None:
+        """Marks the scan of the cluster as completed"""
+        with self._lock:
+            self._in_flight.discard(cluster)
+
+    def time_to_next(self, now: float) -> float:
+        """Seconds until the next scan is due"""
+        with self._lock:
+            if not self._heap:
+                return float("inf")
+            return max(0.0, self._heap[0][0] - now)
@@ -0,0 +1,109 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+Shares the clusters of the configuration across watcher replicas. Each replica is given its shard index and
+the shards count, and only watches the clusters which name hashes to its shard on a consistent hashing ring,
+so that changing the shards count only moves the clusters of the shards added or removed.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from kafka_connect_watcher.cluster import ConnectCluster
+    from kafka_connect_watcher.prometheus import PrometheusExporter
+
+from bisect import bisect
+from hashlib import sha1
+from os import environ
+
+from kafka_connect_watcher.reload import get_cluster_name
+
+SHARD_INDEX_ENV: str = "WATCHER_SHARD_INDEX"
+SHARD_COUNT_ENV: str = "WATCHER_SHARD_COUNT"
+VIRTUAL_NODES: int = 128
+
+
+def hash_key(key: str) -> int:
+    """Hash of the key, stable across processes and replicas, unlike hash()"""
+    return int.from_bytes(sha1(key.encode()).digest()[:8], "big")
+
+
+class Shard:
+    """
+    Shard of a watcher replica. The ring holds VIRTUAL_NODES points per shard: a cluster belongs to the shard
+    of the first point following the hash of its name.
+    """
+
+    def __init__(self, index: int = 0, count: int = 1):
+        if count < 1:
+            raise ValueError(f"The shards count must be at least 1. Got {count}")
+        if not 0 <= index < count:
+            raise ValueError(
+                f"The shard index must be between 0 and {count - 1}. Got {index}"
+            )
+        self.index = index
+        self.count = count
+        ring: list[tuple[int, int]] = sorted(
+            (hash_key(f"shard-{shard_index}-{node}"), shard_index)
+            for shard_index in range(count)
+            for node in range(VIRTUAL_NODES)
+        )
+        self._points: list[int] = [point for point, _ in ring]
+        self._shards: list[int] = [shard_index for _, shard_index in ring]
+
+    def __repr__(self) -> str:
+        return f"{self.index + 1}/{self.count}"
+
+    @classmethod
+    def from_env(cls, index: int = None, count: int = None) -> Shard:
+        """Shard set with the CLI arguments if any, else with the WATCHER_SHARD_* environment variables"""
+        if index is None:
+            index = int(environ.get(SHARD_INDEX_ENV, 0))
+        if count is None:
+            count = int(environ.get(SHARD_COUNT_ENV, 1))
+        return cls(index, count)
+
+    @property
+    def enabled(self) -> bool:
+        return self.count > 1
+
+    @property
+    def dimensions(self) -> dict:
+        """Metrics dimensions telling the replicas apart"""
+        return {"ShardIndex": str(self.index)} if self.enabled else {}
+
+    def shard_of(self, cluster_name: str) -> int:
+        position = bisect(self._points, hash_key(cluster_name)) % len(self._points)
+        return self._shards[position]
+
+    def owns(self, cluster_config: dict) -> bool:
+        return self.shard_of(get_cluster_name(cluster_config)) == self.index
+
+    def select_clusters(self, clusters_configs: list[dict]) -> list[dict]:
+        """Clusters definitions of this shard"""
+        if not self.enabled:
+            return list(clusters_configs)
+        return [
+            cluster_config
+            for cluster_config in clusters_configs
+            if self.owns(cluster_config)
+        ]
+
+
+def process_shard_metrics(
+    shard: Shard,
+    clusters: list[ConnectCluster],
+    watcher_metrics: dict,
+    exporter: PrometheusExporter = None,
+) -> None:
+    """Adds the clusters & connectors watched by the replica to the watcher metrics, to compare the shards load"""
+    connectors: int = sum(
+        connect_cluster.metrics.get("total", 0) for connect_cluster in clusters
+    )
+    watcher_metrics["connect_clusters_total"] = len(clusters)
+    watcher_metrics["connectors_total"] = connectors
+    if exporter:
+        exporter.update_shard(shard, len(clusters), connectors)
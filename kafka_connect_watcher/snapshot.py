@@ -0,0 +1,154 @@
+#   SPDX-License-Identifier: MPL-2.0
+#   Copyright 2023 John "Preston" Mille <john@ews-network.net>
+
+"""
+In-memory snapshots of the connectors status, retrieved once per scan.
+"""
+
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from kafka_connect_api.kafka_connect_api import Cluster
+
+import sys
+
+from compose_x_common.compose_x_common import set_else_none
+from kafka_connect_api.kafka_connect_api import Connector, Task
+
+EXPANDED_CONNECTORS_PATH: str = "/connectors?expand=status"
+
+
+def intern_state(state: str) -> str:
+    """Returns the interned state, so that all the records share the same state strings"""
+    return sys.intern(state) if isinstance(state, str) else "UNKNOWN"
+
+
+class ConnectorState:
+    """
+    Compact record of the state of a connector and of its tasks, as reported when the snapshot was taken.
+    """
+
+    __slots__ = ("name", "state", "tasks_ids", "tasks_states", "connector_type")
+
+    def __init__(
+        self,
+        name: str,
+        state: str,
+        tasks_ids: tuple[int, ...] = (),
+        tasks_states: tuple[str, ...] = (),
+        connector_type: str = None,
+    ):
+        self.name: str = name
+        self.state: str = intern_state(state)
+        self.tasks_ids: tuple[int, ...] = tasks_ids
+        self.tasks_states: tuple[str, ...] = tuple(
+            intern_state(task_state) for task_state in tasks_states
+        )
+        self.connector_type: str = (
+            intern_state(connector_type) if connector_type else None
+        )
+
+    def __repr__(self) -> str:
+        return f"ConnectorState({self.name}, {self.state}, tasks={self.tasks_states})"
+
+    @classmethod
+    def from_status(cls, name: str, status: dict) -> ConnectorState:
+        tasks: list[dict] = set_else_none("tasks", status, [])
+        return cls(
+            name,
+            set_else_none("state", set_else_none("connector", status, {}), "UNKNOWN"),
+            tuple(int(_task["id"]) for _task in tasks),
+            tuple(set_else_none("state", _task, "UNKNOWN") for _task in tasks),
+            set_else_none("type", status),
+        )
+
+    @property
+    def fingerprint(self) -> tuple:
+        """Connector state and tasks states, compared from one scan to the next to detect changes"""
+        return self.state, self.tasks_states
+
+
+class TaskSnapshot(Task):
+    """
+    Connector task which state is the one reported when the snapshot was taken.
+    """
+
+    def __init__(self, connector: ConnectorSnapshot, task_id: int, state: str):
+        super().__init__(connector, task_id, {})
+        self._state: str = state
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+
+class ConnectorSnapshot(Connector):
+    """
+    Connector which state and tasks are the ones of its ConnectorState record. Only created for the connectors
+    to act on: the status and config remain retrieved live from the connect cluster, so that corrective actions
+    can evaluate the recovery of the connector.
+    """
+
+    def __init__(self, cluster: Cluster, connector_state: ConnectorState):
+        super().__init__(cluster, connector_state.name)
+        self.connector_state: ConnectorState = connector_state
+
+    @property
+    def state(self) -> str:
+        return self.connector_state.state
+
+    @property
+    def tasks(self) -> list[TaskSnapshot]:
+        return [
+            TaskSnapshot(self, task_id, task_state)
+            for task_id, task_state in zip(
+                self.connector_state.tasks_ids, self.connector_state.tasks_states
+            )
+        ]
+
+    @property
+    def connector_type(self) -> str:
+        return self.connector_state.connector_type
+
+
+class ClusterSnapshot:
+    """
+    Connectors states of a connect cluster, retrieved once at the beginning of a scan and shared by all the
+    evaluation rules of the cluster. ``unchanged`` are the connectors which state and tasks states are
+    the same as in the previous scan.
+    """
+
+    def __init__(
+        self,
+        connectors: dict[str, ConnectorState],
+        unchanged: frozenset[str] = frozenset(),
+        cluster: Cluster = None,
+    ):
+        self.connectors: dict[str, ConnectorState] = connectors
+        self.connectors_names: list[str] = list(connectors.keys())
+        self.unchanged: frozenset[str] = unchanged
+        self.cluster = cluster
+
+    def __len__(self) -> int:
+        return len(self.connectors_names)
+
+    def __getitem__(self, connector_name: str) -> ConnectorState:
+        return self.connectors[connector_name]
+
+    def connector(self, connector_name: str) -> ConnectorSnapshot:
+        """Connector to act on, i.e. cycle or remediate"""
+        return ConnectorSnapshot(self.cluster, self.connectors[connector_name])
+
+
+def import_connectors_snapshot(payload: dict) -> dict[str, ConnectorState]:
+    """
+    Maps the payload of the expanded connectors listing to ConnectorState records
+    """
+    return {
+        connector_name: ConnectorState.from_status(
+            connector_name, set_else_none("status", connector_definition, {})
+        )
+        for connector_name, connector_definition in payload.items()
+    }
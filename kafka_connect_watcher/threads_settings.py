@@ -7,3 +7,15 @@ from os import cpu_count, environ
 NUM_THREADS: int = abs(int(environ.get("CONCURRENT_THREADS", cpu_count())))
 if NUM_THREADS <= 0:
     NUM_THREADS = 1
+
+REMEDIATION_THREADS: int = abs(int(environ.get("REMEDIATION_THREADS", NUM_THREADS)))
+if REMEDIATION_THREADS <= 0:
+    REMEDIATION_THREADS = 1
+
+EVALUATION_THREADS: int = abs(int(environ.get("EVALUATION_THREADS", NUM_THREADS)))
+if EVALUATION_THREADS <= 0:
+    EVALUATION_THREADS = 1
+
+SCAN_THREADS: int = abs(int(environ.get("SCAN_THREADS", 64)))
+if SCAN_THREADS <= 0:
+    SCAN_THREADS = 1
@@ -4,9 +4,15 @@
 from __future__ import annotations
 
 import re
+from datetime import datetime as dt
+from typing import Union
 
+from compose_x_common.compose_x_common import get_duration
 
-def import_regexes(to_import: list[str]) -> list[re.Pattern]:
+
+def import_regexes(to_import: Union[list[str], str]) -> list[re.Pattern]:
+    if isinstance(to_import, str):
+        to_import = [to_import]
     compiled_regexes: list[re.Pattern] = []
     for regex in to_import:
         try:
@@ -16,3 +22,100 @@ def import_regexes(to_import: list[str]) -> list[re.Pattern]:
             print(regex)
             print(error)
     return compiled_regexes
+
+
+def get_duration_seconds(duration: Union[str, int, float]) -> float:
+    """Converts a duration expression (i.e. 30s, 1h) to seconds. Numbers are considered to be seconds already."""
+    if isinstance(duration, (int, float)):
+        return duration
+    now = dt.now()
+    return ((now + get_duration(duration)) - now).total_seconds()
+
+
+class ConnectorsFilter:
+    """
+    Matches connectors names against the include and exclude regular expressions, each list combined into
+    a single alternation compiled once. The result is memoized per connector name, connectors names
+    rarely changing from one scan to the next.
+    """
+
+    max_cache_size: int = 100_000
+
+    def __init__(
+        self, include_regexes: list[re.Pattern], exclude_regexes: list[re.Pattern]
+    ):
+        self.include = combine_regexes(include_regexes)
+        self.exclude = combine_regexes(exclude_regexes)
+        self._cache: dict[str, bool] = {}
+
+    def __contains__(self, connector_name: str) -> bool:
+        """Whether the connector has already been evaluated"""
+        return connector_name in self._cache
+
+    def is_excluded(self, connector_name: str) -> bool:
+        return self.exclude is not None and bool(self.exclude.match(connector_name))
+
+    def is_included(self, connector_name: str) -> bool:
+        return self.include is not None and bool(self.include.match(connector_name))
+
+    def matches(self, connector_name: str) -> bool:
+        """Whether the connector is not excluded and is included"""
+        result = self._cache.get(connector_name)
+        if result is None:
+            result = not self.is_excluded(connector_name) and self.is_included(
+                connector_name
+            )
+            if len(self._cache) >= self.max_cache_size:
+                self._cache.clear()
+            self._cache[connector_name] = result
+        return result
+
+
+class _RegexesAlternative:
+    """Fallback matcher for regexes which cannot be combined into a single pattern"""
+
+    def __init__(self, regexes: list[re.Pattern]):
+        self.regexes = regexes
+
+    def match(self, value: str) -> bool:
+        return any(regex.match(value) for regex in self.regexes)
+
+
+NUMBERED_GROUP_REFERENCE = re.compile(r"(?:^|[^\\])(?:\\\\)*(?:\\[1-9]|\(\?\(\d)")
+
+
+def refers_to_numbered_groups(regex: re.Pattern) -> bool:
+    """
+    Whether the regex refers to its groups by number (backreferences or conditionals), which combining it
+    with other regexes would renumber.
+    """
+    return regex.groups > 0 and bool(NUMBERED_GROUP_REFERENCE.search(regex.pattern))
+
+
+def combine_regexes(
+    regexes: list[re.Pattern],
+) -> Union[re.Pattern, _RegexesAlternative, None]:
+    """
+    Combines the regexes into a single alternation, matching when any of the regexes matches.
+    The regexes referring to their groups by number are kept apart, to keep their groups numbers.
+    """
+    if not regexes:
+        return None
+    if len(regexes) == 1:
+        return regexes[0]
+    combinable: list[re.Pattern] = [
+        regex for regex in regexes if not refers_to_numbered_groups(regex)
+    ]
+    separate: list[re.Pattern] = [
+        regex for regex in regexes if refers_to_numbered_groups(regex)
+    ]
+    if len(combinable) > 1:
+        try:
+            combinable = [
+                re.compile("|".join(f"(?:{regex.pattern})" for regex in combinable))
+            ]
+        except re.error:
+            pass
+    if len(combinable) + len(separate) == 1:
+        return (combinable + separate)[0]
+    return _RegexesAlternative(combinable + separate)
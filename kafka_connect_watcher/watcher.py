@@ -10,24 +10,43 @@ from __future__ import annotations
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
-    from kafka_connect_watcher.config import Config
+    from kafka_connect_watcher.prometheus import PrometheusExporter
 
 import signal
 import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime as dt
-from queue import Queue
-from time import sleep
+from queue import Empty, Queue
+from time import monotonic, sleep
 
 from kafka_connect_watcher.aws_emf import (
+    EmfExporter,
     handle_watcher_emf,
     init_emf_config,
-    publish_clusters_emf,
+    process_emf_exporter_metrics,
 )
 from kafka_connect_watcher.cluster import ConnectCluster
+from kafka_connect_watcher.config import Config
 from kafka_connect_watcher.logger import LOG
-from kafka_connect_watcher.threads_settings import NUM_THREADS
+from kafka_connect_watcher.notifications import (
+    NotificationDispatcher,
+    process_notifications_metrics,
+)
+from kafka_connect_watcher.reload import (
+    get_cluster_name,
+    get_config_file_mtime,
+    reload_clusters,
+)
+from kafka_connect_watcher.remediation import RemediationScheduler
+from kafka_connect_watcher.scheduler import ClustersScheduler
+from kafka_connect_watcher.sharding import Shard, process_shard_metrics
+from kafka_connect_watcher.snapshot import ClusterSnapshot
+from kafka_connect_watcher.threads_settings import EVALUATION_THREADS, NUM_THREADS
 
 FOREVER = 42
+QUEUE_GET_TIMEOUT: int = 5
+WORKERS_JOIN_TIMEOUT: int = 30
+CONFIG_CHECK_INTERVAL: int = 5
 
 
 class Watcher:
@@ -36,26 +55,62 @@ class Watcher:
     handling exceptions and graceful shutdowns.
     """
 
-    def __init__(self):
+    def __init__(self, shard: Shard = None):
         signal.signal(signal.SIGINT, self.exit_gracefully)
         signal.signal(signal.SIGTERM, self.exit_gracefully)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self.request_reload)
         self.keep_running: bool = True
+        self.reload_requested: bool = False
+        self.config: Config = None
+        self.config_file_mtime: float = None
+        self.clusters: dict[str, ConnectCluster] = {}
+        self.shard: Shard = shard if shard else Shard()
         self.connect_clusters_processing_queue = Queue()
         self._threads: list[threading.Thread] = []
+        self._workers_stopping: bool = False
+        self.scheduler: ClustersScheduler = None
+        self.prometheus_exporter: PrometheusExporter = None
+        self.remediation = RemediationScheduler()
+        self.notifications: NotificationDispatcher = None
+        self.emf_exporter = EmfExporter()
+        self.evaluation_executor = ThreadPoolExecutor(
+            max_workers=EVALUATION_THREADS, thread_name_prefix="evaluation"
+        )
+        self._scans_skipped_reported: int = 0
+        self._scans_started_reported: int = 0
         self.metrics: dict = {
             "connect_clusters_total": 0,
             "connect_clusters_healthy": 0,
             "connect_clusters_unhealthy": 0,
+            "connect_clusters_scans": 0,
+            "connect_clusters_scans_skipped": 0,
+            "connectors_total": 0,
         }
 
     def run(self, config: Config):
         LOG.info("Initializing the watcher")
-        clusters: list[ConnectCluster] = [
-            ConnectCluster(cluster, config) for cluster in config.config["clusters"]
-        ]
+        self.config = config
+        self.config_file_mtime = get_config_file_mtime(config)
+        self.clusters = {
+            get_cluster_name(cluster): ConnectCluster(cluster, config)
+            for cluster in self.shard.select_clusters(config.config["clusters"])
+        }
+        clusters: list[ConnectCluster] = list(self.clusters.values())
         self.metrics.update({"connect_clusters_total": len(clusters)})
+        if self.shard.enabled:
+            LOG.info(
+                f"Shard {self.shard} - watching {len(clusters)} of the "
+                f"{len(config.config['clusters'])} clusters"
+            )
         init_emf_config(config)
+        self.emf_exporter.start()
+        self.start_prometheus_exporter()
         LOG.info("Watcher clusters initialized.")
+        self.notifications = NotificationDispatcher.from_config(config)
+        self.notifications.start()
+        self.remediation.notifications = self.notifications
+        self.remediation.start()
         for _ in range(NUM_THREADS):
             _thread = threading.Thread(
                 target=process_cluster,
@@ -65,73 +120,218 @@ class Watcher:
             _thread.start()
             self._threads.append(_thread)
         LOG.info(
-            "Watcher threads ({}) initialized. Processing clusters & evaluation rules.".format(
-                NUM_THREADS
+            "Watcher threads ({}) and evaluation threads ({}) initialized. "
+            "Processing clusters & evaluation rules.".format(
+                NUM_THREADS, EVALUATION_THREADS
             )
         )
+        self.scheduler = ClustersScheduler(clusters, monotonic())
+        next_watcher_metrics: float = monotonic() + config.scan_intervals
+        next_config_check: float = monotonic() + CONFIG_CHECK_INTERVAL
         try:
             while self.keep_running:
-                now = dt.now()
-                LOG.info("Clusters processing started")
-                for connect_cluster in clusters:
+                now = monotonic()
+                if now >= next_config_check:
+                    next_config_check = now + CONFIG_CHECK_INTERVAL
+                    if get_config_file_mtime(self.config) != self.config_file_mtime:
+                        self.reload_requested = True
+                if self.reload_requested:
+                    self.reload_config(now)
+                for connect_cluster in self.scheduler.pop_due(now):
                     self.connect_clusters_processing_queue.put(
                         [
                             self,
-                            config,
+                            self.config,
                             connect_cluster,
                         ],
                         False,
                     )
-                self.connect_clusters_processing_queue.join()
-                LOG.info(
-                    "Clusters processing finished - {}s".format(
-                        (dt.now() - now).total_seconds()
+                if now >= next_watcher_metrics:
+                    self.metrics["connect_clusters_scans_skipped"] = (
+                        self.scheduler.metrics["scans_skipped"]
+                        - self._scans_skipped_reported
+                    )
+                    self._scans_skipped_reported = self.scheduler.metrics[
+                        "scans_skipped"
+                    ]
+                    self.metrics["connect_clusters_scans"] = (
+                        self.scheduler.metrics["scans_started"]
+                        - self._scans_started_reported
+                    )
+                    self._scans_started_reported = self.scheduler.metrics[
+                        "scans_started"
+                    ]
+                    process_shard_metrics(
+                        self.shard,
+                        list(self.clusters.values()),
+                        self.metrics,
+                        self.prometheus_exporter,
+                    )
+                    process_notifications_metrics(
+                        self.notifications, self.metrics, self.prometheus_exporter
+                    )
+                    process_emf_exporter_metrics(self.emf_exporter, self.metrics)
+                    if self.config.emf_watcher_config:
+                        handle_watcher_emf(self.config, self)
+                    LOG.debug(f"Watcher metrics: {self.metrics}")
+                    self.metrics.update(
+                        {
+                            "connect_clusters_healthy": 0,
+                            "connect_clusters_unhealthy": 0,
+                        }
+                    )
+                    next_watcher_metrics = now + self.config.scan_intervals
+                sleep(
+                    min(
+                        1.0,
+                        self.scheduler.time_to_next(now),
+                        max(0.0, next_watcher_metrics - now),
                     )
                 )
-                if config.emf_watcher_config:
-                    handle_watcher_emf(config, self)
-                for _second in range(1, config.scan_intervals):
-                    sleep(1)
-                    if not self.keep_running:
-                        break
-                self.metrics.update(
-                    {"connect_clusters_healthy": 0, "connect_clusters_unhealthy": 0}
-                )
-                LOG.debug(f"Watcher metrics: {self.metrics}")
         except KeyboardInterrupt:
             self.keep_running = False
             LOG.debug("\rExited due to Keyboard interrupt")
+        finally:
+            self.stop_workers()
+            for _thread in self._threads:
+                _thread.join(WORKERS_JOIN_TIMEOUT)
+            self.evaluation_executor.shutdown(wait=True, cancel_futures=True)
+            self.remediation.stop()
+            self.notifications.stop()
+            self.emf_exporter.stop(WORKERS_JOIN_TIMEOUT)
+            LOG.info("Watcher stopped")
+
+    def start_prometheus_exporter(self) -> None:
+        if self.prometheus_exporter or not any(
+            connect_cluster.prometheus_enabled
+            for connect_cluster in self.clusters.values()
+        ):
+            return
+        from kafka_connect_watcher.prometheus import PrometheusExporter
+
+        self.prometheus_exporter = PrometheusExporter.from_config(self.config)
+        self.prometheus_exporter.start()
+
+    def reload_config(self, now: float) -> None:
+        """
+        Reloads the configuration file. The clusters which definition did not change keep their scans schedule,
+        the removed and changed ones are unscheduled and their HTTP sessions closed, the new and changed ones
+        are scanned right away.
+        An invalid configuration is logged and the watcher keeps running with the current one.
+        """
+        self.reload_requested = False
+        self.config_file_mtime = get_config_file_mtime(self.config)
+        if not self.config.config_file_path:
+            LOG.warning("The configuration was not loaded from a file. Not reloading.")
+            return
+        try:
+            config = Config(self.config.config_file_path)
+            clusters, changes = reload_clusters(
+                self.clusters, self.config, config, self.shard
+            )
+        except Exception as error:
+            LOG.exception(error)
+            LOG.error(
+                f"Failed to reload the configuration from {self.config.config_file_path}. "
+                "Keeping the current configuration."
+            )
+            return
+        for name in changes.clusters_removed + changes.clusters_changed:
+            self.scheduler.remove(self.clusters[name])
+            self.clusters[name].api.close()
+        if self.prometheus_exporter:
+            for name in changes.clusters_removed:
+                self.prometheus_exporter.remove_cluster(name)
+        for name in changes.clusters_added + changes.clusters_changed:
+            self.scheduler.add(clusters[name], now)
+        self.config = config
+        self.clusters = clusters
+        self.metrics.update({"connect_clusters_total": len(clusters)})
+        init_emf_config(config)
+        self.start_prometheus_exporter()
+        LOG.info(f"Configuration reloaded: {changes}")
+
+    def request_reload(self, signum, frame):
+        LOG.info(f"Received signal {signum}. Reloading the configuration")
+        self.reload_requested = True
 
-    def exit_gracefully(self, pid, pelse):
-        print(pid, pelse)
+    def stop_workers(self) -> None:
+        """
+        Sends a poison pill to each worker thread. The workers stop once they processed the clusters
+        queued before the pill.
+        """
+        if self._workers_stopping:
+            return
+        self._workers_stopping = True
+        for _ in self._threads:
+            self.connect_clusters_processing_queue.put([None, None, None], False)
+
+    def exit_gracefully(self, signum, frame):
+        """
+        Only flags the watcher to stop: the main loop stops the workers on its way out. Putting the poison pills
+        from the signal handler could deadlock on the queue lock, if the signal lands during a put.
+        """
+        LOG.info(f"Received signal {signum}. Stopping the watcher")
         self.keep_running = False
-        exit(0)
 
 
 def process_error_rules(
-    handling_rule, connect_cluster: ConnectCluster, watcher: Watcher
+    handling_rule,
+    connect_cluster: ConnectCluster,
+    watcher: Watcher,
+    snapshot: ClusterSnapshot,
 ):
     try:
-        handling_rule.execute(connect_cluster)
+        handling_rule.execute(
+            connect_cluster,
+            snapshot,
+            watcher.remediation,
+            watcher.evaluation_executor,
+        )
         watcher.metrics["connect_clusters_healthy"] += 1
     except Exception as error:
         watcher.metrics["connect_clusters_unhealthy"] += 1
         LOG.exception(error)
         LOG.error(f"Failed to process the cluster {connect_cluster.name}")
-    try:
-        if connect_cluster.emf_config:
-            publish_clusters_emf(connect_cluster)
-    except Exception as error:
-        LOG.exception(error)
-        LOG.error(f"Failed to export EMF metrics for cluster {connect_cluster.name}")
 
 
 def process_cluster(queue: Queue):
+    """
+    Worker processing the clusters put in the queue. Blocks on the queue until a cluster is available,
+    and stops when getting a poison pill (no cluster).
+    """
     while FOREVER:
-        if not queue.empty():
-            watcher, config, connect_cluster = queue.get()
+        try:
+            watcher, config, connect_cluster = queue.get(timeout=QUEUE_GET_TIMEOUT)
+        except Empty:
+            continue
+        try:
             if connect_cluster is None:
                 break
-            for handling_rule in connect_cluster.handling_rules:
-                process_error_rules(handling_rule, connect_cluster, watcher)
+            now = dt.now()
+            connect_cluster.metrics["connectors"] = {}
+            try:
+                snapshot = connect_cluster.get_snapshot()
+            except Exception as error:
+                watcher.metrics["connect_clusters_unhealthy"] += 1
+                LOG.exception(error)
+                LOG.error(
+                    f"Failed to retrieve the connectors of the cluster {connect_cluster.name}"
+                )
+                watcher.scheduler.done(connect_cluster)
+                continue
+            try:
+                for handling_rule in connect_cluster.handling_rules:
+                    process_error_rules(
+                        handling_rule, connect_cluster, watcher, snapshot
+                    )
+                if watcher.prometheus_exporter and connect_cluster.prometheus_enabled:
+                    watcher.prometheus_exporter.update(connect_cluster)
+                watcher.emf_exporter.submit(connect_cluster)
+            finally:
+                watcher.scheduler.done(connect_cluster)
+            LOG.info(
+                f"{connect_cluster.name} - processing finished - {(dt.now() - now).total_seconds()}s"
+            )
+        finally:
             queue.task_done()
@@ -1,3 +1,33 @@
+from kafka_connect_watcher.config import Config
+from kafka_connect_watcher.snapshot import ClusterSnapshot
+
+SNS_TOPIC: str = "arn:aws:sns:eu-west-1:123456789:test-sns-topic"
+RESTART_RULE: dict = {"auto_correct_actions": [{"action": "restart"}]}
+PAUSE_RULE: dict = {
+    "auto_correct_actions": [
+        {"action": "pause", "notify": [{"target": "sns.main_topic"}]}
+    ]
+}
+
+
+def make_cluster(hostname: str, rules: list = None, **settings) -> dict:
+    cluster: dict = {"hostname": hostname, "port": 8083, **settings}
+    if rules:
+        cluster["evaluation_rules"] = rules
+    return cluster
+
+
+def make_configuration(clusters: list, channels: dict = None) -> dict:
+    configuration: dict = {"clusters": clusters}
+    if channels:
+        configuration["notification_channels"] = {"sns": channels}
+    return configuration
+
+
+def make_config(clusters: list, channels: dict = None) -> Config:
+    return Config(configuration=make_configuration(clusters, channels))
+
+
 class MockClusterConfig:
     def __init__(self):
         self.name = "cluster_config_name"
@@ -33,5 +63,18 @@ class MockConnector:
         self.state = state
         self.tasks = tasks
 
+    @property
+    def tasks_ids(self):
+        return tuple(range(len(self.tasks)))
+
+    @property
+    def tasks_states(self):
+        return tuple(task.state for task in self.tasks)
+
     def cycle_connector(self):
         pass
+
+
+class MockClusterSnapshot(ClusterSnapshot):
+    def connector(self, connector_name):
+        return self.connectors[connector_name]
@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+import pytest
+
+from kafka_connect_watcher.api import AdaptiveRateLimiter, ClusterApi
+
+
+class CountingConnectServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), ConnectStubHandler)
+        self.connections: int = 0
+        self.in_flight: int = 0
+        self.max_in_flight: int = 0
+        self.status_code: int = 200
+        self._lock = threading.Lock()
+
+    def process_request(self, request, client_address):
+        with self._lock:
+            self.connections += 1
+        super().process_request(request, client_address)
+
+
+class ConnectStubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        with self.server._lock:
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(
+                self.server.max_in_flight, self.server.in_flight
+            )
+        time.sleep(0.01)
+        with self.server._lock:
+            self.server.in_flight -= 1
+        body = json.dumps(
+            {
+                "connector": {"state": "RUNNING"},
+                "tasks": [{"id": 0, "state": "RUNNING"}],
+            }
+        ).encode()
+        self.send_response(self.server.status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def connect_server():
+    server = CountingConnectServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_cluster_api_reuses_connections(connect_server):
+    api = ClusterApi("127.0.0.1", port=connect_server.server_address[1], pool_size=4)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        statuses = list(
+            executor.map(
+                lambda index: api.get(f"/connectors/connector-{index}/status"),
+                range(100),
+            )
+        )
+    api.close()
+    assert len(statuses) == 100
+    assert statuses[0]["connector"]["state"] == "RUNNING"
+    assert 1 <= connect_server.connections <= 4
+
+
+def test_cluster_api_timeouts():
+    api = ClusterApi(
+        "localhost", port=8083, connect_timeout=1, read_timeout=2, total_timeout=3
+    )
+    assert api.timeout.connect_timeout == 1
+    assert api.timeout.read_timeout == 2
+    assert api.timeout.total == 3
+
+
+def test_cluster_api_limits_concurrent_requests(connect_server):
+    api = ClusterApi(
+        "127.0.0.1",
+        port=connect_server.server_address[1],
+        pool_size=8,
+        max_concurrent_requests=2,
+        rate_limiter=AdaptiveRateLimiter(max_rate=1000),
+    )
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: api.get("/connectors/connector/status"), range(40)))
+    api.close()
+    assert connect_server.max_in_flight <= 2
+
+
+def test_cluster_api_lowers_rate_when_throttled(connect_server):
+    connect_server.status_code = 503
+    limiter = AdaptiveRateLimiter(max_rate=50)
+    api = ClusterApi(
+        "127.0.0.1", port=connect_server.server_address[1], rate_limiter=limiter
+    )
+    with pytest.raises(Exception):
+        api.get("/connectors/connector/status")
+    api.close()
+    assert limiter.rate == 25
+    assert limiter.metrics["throttled"] == 1
+
+
+def test_rate_limiter_token_bucket():
+    limiter = AdaptiveRateLimiter(max_rate=10, burst=2)
+    with patch("kafka_connect_watcher.api.monotonic", return_value=100.0):
+        limiter._updated_at = 100.0
+        waits = [limiter.reserve() for _ in range(4)]
+    assert waits == pytest.approx([0, 0, 0.1, 0.2])
+
+
+def test_rate_limiter_aimd():
+    limiter = AdaptiveRateLimiter(max_rate=40, min_rate=4)
+    with patch("kafka_connect_watcher.api.monotonic", return_value=100.0):
+        limiter.on_response(429)
+        limiter.on_response(503)
+    assert limiter.rate == 20
+    for seconds in (102.0, 104.0, 106.0):
+        with patch("kafka_connect_watcher.api.monotonic", return_value=seconds):
+            limiter.on_response(500)
+    assert limiter.rate == 4
+    for _ in range(100):
+        limiter.on_response(200)
+    assert 4 < limiter.rate < 40
+    for _ in range(2000):
+        limiter.on_response(200)
+    assert limiter.rate == 40
+
+
+def test_rate_limiter_retry_after():
+    limiter = AdaptiveRateLimiter(max_rate=10)
+    limiter._updated_at = 100.0
+    with patch("kafka_connect_watcher.api.monotonic", return_value=100.0):
+        limiter.on_response(429, "5")
+        assert limiter.reserve() == pytest.approx(5 + 1 / limiter.rate)
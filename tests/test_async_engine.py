@@ -0,0 +1,177 @@
+import asyncio
+import os
+import signal
+import sys
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiohttp import ClientSession, web
+
+from kafka_connect_watcher.api import AdaptiveRateLimiter
+from kafka_connect_watcher.async_engine import (
+    AsyncConnectApi,
+    AsyncRemediations,
+    AsyncWatcher,
+    execute_rule,
+    get_snapshot,
+)
+from kafka_connect_watcher.error_rules import EvaluationRule
+from kafka_connect_watcher.snapshot import ClusterSnapshot
+
+CONNECTORS_STATUS: dict = {
+    "healthy": {
+        "status": {
+            "connector": {"state": "RUNNING"},
+            "tasks": [{"id": 0, "state": "RUNNING"}],
+        }
+    },
+    "failed-task": {
+        "status": {
+            "connector": {"state": "RUNNING"},
+            "tasks": [{"id": 0, "state": "RUNNING"}, {"id": 1, "state": "FAILED"}],
+        }
+    },
+    "paused": {
+        "status": {"connector": {"state": "PAUSED"}, "tasks": []},
+    },
+}
+
+
+async def run_against_stub_cluster(evaluation_rule: EvaluationRule) -> tuple:
+    requests: list = []
+
+    async def connectors(request):
+        requests.append(request.path_qs)
+        return web.json_response(CONNECTORS_STATUS)
+
+    async def restart(request):
+        requests.append(request.path_qs)
+        return web.Response(status=204)
+
+    async def status(request):
+        requests.append(request.path_qs)
+        return web.json_response(
+            {
+                "connector": {"state": "RUNNING"},
+                "tasks": [{"id": 0, "state": "RUNNING"}],
+            }
+        )
+
+    app = web.Application()
+    app.router.add_get("/connectors", connectors)
+    app.router.add_post("/connectors/{name}/restart", restart)
+    app.router.add_get("/connectors/{name}/status", status)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    connect = MagicMock()
+    connect.name = "stub"
+    connect.metrics = {"connectors": {}}
+    connect.build_snapshot.side_effect = ClusterSnapshot
+    connect.max_concurrent_requests = 2
+    connect.rate_limiter = AdaptiveRateLimiter()
+    connect.http_timeouts = {
+        "connect_timeout": 5,
+        "read_timeout": 5,
+        "total_timeout": None,
+    }
+    connect.api.url = f"http://127.0.0.1:{port}"
+    connect.api.username = None
+    connect.api.verify_ssl = False
+    try:
+        async with ClientSession() as session:
+            api = AsyncConnectApi(connect, session)
+            snapshot = await get_snapshot(connect, api)
+            await execute_rule(evaluation_rule, connect, api, snapshot)
+    finally:
+        await runner.cleanup()
+    return connect, requests
+
+
+def test_async_execute_rule(monkeypatch):
+    real_sleep = asyncio.sleep
+
+    async def no_wait(_delay):
+        await real_sleep(0)
+
+    monkeypatch.setattr("kafka_connect_watcher.async_engine.asyncio.sleep", no_wait)
+    rule = EvaluationRule(
+        {"ignore_paused": True, "auto_correct_actions": [{"action": "restart"}]},
+        MagicMock(notification_channels={}),
+    )
+    connect, requests = asyncio.run(run_against_stub_cluster(rule))
+    assert requests[0] == "/connectors?expand=status"
+    assert "/connectors/failed-task/restart" in requests
+    assert "/connectors/healthy/restart" not in requests
+    assert connect.metrics["total"] == 3
+    assert connect.metrics["running"] == 1
+    assert connect.metrics["failed"] == 1
+    assert connect.metrics["connectors"]["failed-task"].tasks_states == (
+        "RUNNING",
+        "FAILED",
+    )
+
+
+def test_async_execute_rule_remediates_in_background():
+    rule = EvaluationRule(
+        {
+            "auto_correct_actions": [
+                {"action": "restart", "max_backoff": 300, "max_attempts": 5}
+            ]
+        },
+        MagicMock(notification_channels={}),
+    )
+    connector = MagicMock()
+    connector.name = "failed-task"
+    connector.state = "FAILED"
+    connect = MagicMock()
+    connect.name = "stub"
+    connect.metrics = {"connectors": {}}
+    snapshot = MagicMock(connectors_names=["failed-task"])
+    snapshot.__getitem__.return_value = connector
+    snapshot.__len__.return_value = 1
+    api = MagicMock()
+    api.get = AsyncMock(return_value={"connector": {"state": "FAILED"}, "tasks": []})
+
+    async def scan_twice():
+        remediations = AsyncRemediations()
+        await asyncio.wait_for(
+            execute_rule(rule, connect, api, snapshot, remediations), timeout=1
+        )
+        await asyncio.wait_for(
+            execute_rule(rule, connect, api, snapshot, remediations), timeout=1
+        )
+        in_flight = len(remediations)
+        await remediations.cancel()
+        return in_flight
+
+    assert asyncio.run(scan_twice()) == 1
+    assert connect.metrics["failed"] == 1
+
+
+def test_async_watcher_ignores_sighup():
+    watcher = AsyncWatcher()
+
+    async def send_sighup():
+        watcher._stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        watcher.add_signal_handlers(loop)
+        try:
+            os.kill(os.getpid(), signal.SIGHUP)
+            await asyncio.sleep(0.1)
+        finally:
+            for _signal in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+                loop.remove_signal_handler(_signal)
+
+    asyncio.run(send_sighup())
+    assert watcher.keep_running is True
+    assert not watcher._stop_event.is_set()
+
+
+def test_async_watcher_requires_aiohttp(monkeypatch):
+    monkeypatch.setitem(sys.modules, "aiohttp", None)
+    with pytest.raises(ImportError, match=r"kafka-connect-watcher\[async\]"):
+        AsyncWatcher()
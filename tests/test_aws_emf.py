@@ -1,17 +1,26 @@
+import json
 from unittest.mock import MagicMock, patch
 
 import pytest
+from aws_embedded_metrics.logger.metrics_context import MetricsContext
+from aws_embedded_metrics.serializers.log_serializer import LogSerializer
+from aws_embedded_metrics.sinks.agent_sink import AgentSink
+from aws_embedded_metrics.sinks.stdout_sink import StdoutSink
+from aws_embedded_metrics.storage_resolution import StorageResolution
 
 from kafka_connect_watcher.aws_emf import (
+    ClusterMetricsSnapshot,
+    EmfBatchWriter,
+    EmfExporter,
     handle_watcher_emf,
     init_emf_config,
-    publish_cluster_metrics,
-    publish_clusters_emf,
-    publish_connector_metrics,
+    join_documents,
+    process_emf_exporter_metrics,
     publish_watcher_emf_metrics,
 )
 from kafka_connect_watcher.cluster import ConnectCluster
 from kafka_connect_watcher.config import Config
+from kafka_connect_watcher.snapshot import ConnectorState
 from kafka_connect_watcher.watcher import Watcher
 
 
@@ -40,77 +49,122 @@ def test_init_emf_config():
         assert mock_emf_config.log_group_name == "test_log_group"
 
 
-@patch("kafka_connect_watcher.aws_emf.LOG")
-def test_publish_cluster_metrics(mock_log):
-    cluster = MagicMock()
-    cluster.name = "test_cluster"
-    cluster.emf_config.emf_resolution = 60
-    cluster.metrics = {"metric1": 100, "metric2": "invalid"}
-
-    metrics = MagicMock()
-
-    publish_cluster_metrics(cluster, metrics)
-
-    metrics.reset_dimensions.assert_called_once_with(use_default=False)
-    metrics.set_property.assert_called_once_with(
-        "ConnectDetails", {"designation": "test_cluster"}
+def test_emf_batch_writer():
+    documents: list = []
+    sink = MagicMock()
+    sink.accept.side_effect = lambda context: documents.extend(
+        json.loads(document) for document in LogSerializer.serialize(context)
     )
-    metrics.put_dimensions.assert_called_once()
-    metrics.put_metric.assert_called_once_with("metric1", 100, None, 60)
-
-
-@patch("kafka_connect_watcher.aws_emf.LOG")
-def test_publish_connector_metrics(mock_log):
+    environment = MagicMock()
+    environment.get_sink.return_value = sink
     cluster = MagicMock()
     cluster.name = "test_cluster"
-    cluster.emf_config.emf_resolution = 60
     cluster.emf_config.namespace = "test_namespace"
+    cluster.emf_config.emf_resolution = StorageResolution.STANDARD
     cluster.emf_config.dimensions = {"key": "value"}
-
-    metrics = MagicMock()
-    connector_name = "test_connector"
-    connector_metrics = {"metric1": 100}
-
-    publish_connector_metrics(cluster, connector_name, connector_metrics, metrics)
-
-    metrics.set_namespace.assert_called_once_with("test_namespace")
-    metrics.reset_dimensions.assert_called_once_with(use_default=False)
-    metrics.set_property.assert_called_once_with(
-        "ConnectDetails", {"designation": "test_cluster"}
-    )
-    metrics.put_dimensions.assert_called_once_with(
-        {
-            "key": "value",
-            "ConnectorName": "test_connector",
-            "ConnectCluster": "test_cluster",
-        }
-    )
-    metrics.put_metric.assert_called_once_with("metric1", 100, None, 60)
-
-
-@patch("kafka_connect_watcher.aws_emf.publish_cluster_metrics")
-@patch("kafka_connect_watcher.aws_emf.publish_connector_metrics")
-def test_publish_clusters_emf(mock_publish_connector, mock_publish_cluster):
+    cluster.metrics = {
+        "total": 2,
+        "running": 1,
+        "connectors": {
+            f"connector{index}": ConnectorState(
+                f"connector{index}", "RUNNING", (0,), ("RUNNING",)
+            )
+            for index in range(2)
+        },
+    }
+
+    writer = EmfBatchWriter(environment)
+    assert writer.write(cluster) == 3
+    assert writer.documents == 3
+    environment.get_sink.assert_called_once_with()
+    cluster_document, *connectors_documents = documents
+    assert cluster_document["ConnectCluster"] == "test_cluster"
+    assert cluster_document["total"] == 2
+    cluster_directive = cluster_document["_aws"]["CloudWatchMetrics"][0]
+    assert cluster_directive["Dimensions"] == [["key", "ConnectCluster"]]
+    assert cluster_directive["Namespace"] == MetricsContext.empty().namespace
+    assert [metric["Name"] for metric in cluster_directive["Metrics"]] == [
+        "total",
+        "running",
+    ]
+    assert [document["ConnectorName"] for document in connectors_documents] == [
+        "connector0",
+        "connector1",
+    ]
+    connector_directive = connectors_documents[0]["_aws"]["CloudWatchMetrics"][0]
+    assert connector_directive["Dimensions"] == [
+        ["key", "ConnectCluster", "ConnectorName"]
+    ]
+    assert connector_directive["Namespace"] == "test_namespace"
+    assert cluster.emf_config.dimensions == {"key": "value"}
+
+
+def make_batch_cluster(connectors: int) -> MagicMock:
     cluster = MagicMock()
-    cluster.emf_config.enabled = True
-    cluster.metrics = {"connectors": {"connector1": {"metric1": 100}}}
+    cluster.name = "test_cluster"
+    cluster.emf_config.namespace = "test_namespace"
+    cluster.emf_config.emf_resolution = StorageResolution.STANDARD
+    cluster.emf_config.dimensions = {}
+    cluster.unchanged_connectors = frozenset()
+    cluster.metrics = {
+        "total": connectors,
+        "connectors": {
+            f"connector{index}": ConnectorState(
+                f"connector{index}", "RUNNING", (0,), ("RUNNING",)
+            )
+            for index in range(connectors)
+        },
+    }
+    return cluster
+
+
+def test_emf_batch_writer_writes_stdout_once():
+    environment = MagicMock()
+    environment.get_sink.return_value = StdoutSink()
+    with patch("kafka_connect_watcher.aws_emf.sys.stdout") as stdout_mock:
+        assert EmfBatchWriter(environment).write(make_batch_cluster(3)) == 4
+    stdout_mock.write.assert_called_once()
+    lines = stdout_mock.write.call_args.args[0].splitlines()
+    assert [json.loads(line).get("ConnectorName") for line in lines] == [
+        None,
+        "connector0",
+        "connector1",
+        "connector2",
+    ]
+
+
+@patch("aws_embedded_metrics.sinks.agent_sink.get_socket_client")
+def test_emf_batch_writer_sends_to_agent_once(get_socket_client_mock):
+    sink = AgentSink("test_log_group")
+    environment = MagicMock()
+    environment.get_sink.return_value = sink
+    writer = EmfBatchWriter(environment)
+    assert writer.write(make_batch_cluster(3)) == 4
+    client = get_socket_client_mock.return_value
+    client.send_message.assert_called_once()
+    documents = [
+        json.loads(line)
+        for line in client.send_message.call_args.args[0].decode().splitlines()
+    ]
+    assert len(documents) == 4
+    assert all(
+        document["_aws"]["LogGroupName"] == "test_log_group" for document in documents
+    )
 
-    with patch(
-        "kafka_connect_watcher.aws_emf.get_event_loop", side_effect=RuntimeError
-    ), patch("kafka_connect_watcher.aws_emf.new_event_loop") as mock_new_loop, patch(
-        "kafka_connect_watcher.aws_emf.set_event_loop"
-    ) as mock_set_loop:
-        mock_loop = MagicMock()
-        mock_new_loop.return_value = mock_loop
+    sink.endpoint = sink.endpoint._replace(scheme="udp")
+    client.send_message.reset_mock()
+    with patch("kafka_connect_watcher.aws_emf.UDP_MAX_PAYLOAD_BYTES", 1000):
+        writer.write(make_batch_cluster(20))
+    payloads = [call.args[0] for call in client.send_message.call_args_list]
+    assert len(payloads) > 1
+    assert all(len(payload) <= 1000 for payload in payloads)
+    assert sum(payload.count(b"\n") for payload in payloads) == 21
 
-        publish_clusters_emf(cluster)
 
-        mock_new_loop.assert_called_once()
-        mock_set_loop.assert_called_once_with(mock_loop)
-        mock_publish_cluster.assert_called_once_with(cluster)
-        mock_publish_connector.assert_called_once_with(
-            cluster, "connector1", {"metric1": 100}
-        )
+def test_join_documents():
+    assert join_documents(["a", "b", "c"]) == [b"a\nb\nc\n"]
+    assert join_documents(["a", "b", "c"], 4) == [b"a\nb\n", b"c\n"]
+    assert join_documents([]) == []
 
 
 @patch("kafka_connect_watcher.aws_emf.LOG")
@@ -143,3 +197,56 @@ def test_handle_watcher_emf(mock_publish_watcher):
     handle_watcher_emf(config, watcher)
 
     mock_publish_watcher.assert_called_once_with(config, watcher)
+
+
+def make_emf_cluster(name: str) -> MagicMock:
+    cluster = MagicMock()
+    cluster.name = name
+    cluster.emf_config.enabled = True
+    cluster.metrics = {
+        "total": 1,
+        "connectors": {"connector1": ConnectorState("connector1", "RUNNING")},
+    }
+    return cluster
+
+
+def test_emf_exporter_snapshots_are_read_only():
+    cluster = make_emf_cluster("cluster")
+    snapshot = ClusterMetricsSnapshot(cluster)
+    cluster.metrics["total"] = 2
+    cluster.metrics["connectors"]["connector2"] = ConnectorState("connector2", "FAILED")
+    assert snapshot.metrics["total"] == 1
+    assert list(snapshot.metrics["connectors"]) == ["connector1"]
+    with pytest.raises(TypeError):
+        snapshot.metrics["connectors"]["connector1"] = None
+
+
+def test_emf_exporter_drops_oldest_snapshots():
+    writer = MagicMock()
+    exporter = EmfExporter(writer, max_snapshots=2)
+    for name in ("first", "second", "third"):
+        exporter.submit(make_emf_cluster(name))
+    exporter.start()
+    exporter.stop(timeout=5)
+    assert [call.args[0].name for call in writer.write.call_args_list] == [
+        "second",
+        "third",
+    ]
+    metrics = exporter.collect_metrics()
+    assert metrics["dropped"] == 1
+    assert metrics["exported"] == 2
+    assert metrics["queue_depth"] == 0
+
+
+def test_emf_exporter_survives_sink_failures():
+    writer = MagicMock()
+    writer.write.side_effect = [OSError("agent unreachable"), 2]
+    exporter = EmfExporter(writer)
+    exporter.start()
+    exporter.submit(make_emf_cluster("first"))
+    exporter.submit(make_emf_cluster("second"))
+    exporter.stop(timeout=5)
+    watcher_metrics: dict = {}
+    process_emf_exporter_metrics(exporter, watcher_metrics)
+    assert watcher_metrics["emf_snapshots_failed"] == 1
+    assert writer.write.call_count == 2
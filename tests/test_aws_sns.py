@@ -0,0 +1,115 @@
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+from botocore.exceptions import ClientError
+
+from kafka_connect_watcher.aws_sns import JINJA_ENVIRONMENT, SnsChannel
+
+TOPIC_ARN: str = "arn:aws:sns:eu-west-1:123456789012:watcher"
+ROLE_ARN: str = "arn:aws:iam::123456789012:role/watcher"
+
+
+def assume_role_return(expires_in: timedelta) -> tuple:
+    session = MagicMock()
+    return session, {
+        "Credentials": {"Expiration": datetime.now(tz=timezone.utc) + expires_in}
+    }
+
+
+@patch("kafka_connect_watcher.aws_sns.Session")
+def test_sns_channel_reuses_client(session_mock):
+    channel = SnsChannel("alerts", {"topic_arn": TOPIC_ARN})
+    for index in range(5):
+        channel.publish("subject", f"message {index}")
+    session_mock.assert_called_once_with()
+    session_mock.return_value.client.assert_called_once_with("sns")
+    assert session_mock.return_value.client.return_value.publish.call_count == 5
+
+
+@patch("kafka_connect_watcher.aws_sns.get_assume_role_session")
+def test_sns_channel_assumes_role_once(assume_role_mock):
+    assume_role_mock.return_value = assume_role_return(timedelta(minutes=15))
+    channel = SnsChannel("alerts", {"topic_arn": TOPIC_ARN, "role_arn": ROLE_ARN})
+    for _ in range(200):
+        channel.publish("subject", "message")
+    assume_role_mock.assert_called_once()
+    assert assume_role_mock.call_args.kwargs["include_full_return"] is True
+
+
+@patch("kafka_connect_watcher.aws_sns.get_assume_role_session")
+def test_sns_channel_refreshes_client_before_expiration(assume_role_mock):
+    assume_role_mock.side_effect = [
+        assume_role_return(timedelta(minutes=1)),
+        assume_role_return(timedelta(minutes=15)),
+    ]
+    channel = SnsChannel("alerts", {"topic_arn": TOPIC_ARN, "role_arn": ROLE_ARN})
+    expiring_client = channel.client
+    refreshed_client = channel.client
+    assert expiring_client is not refreshed_client
+    assert channel.client is refreshed_client
+    assert assume_role_mock.call_count == 2
+
+
+@patch("kafka_connect_watcher.aws_sns.Session")
+def test_sns_channel_resets_client_on_expired_token(session_mock):
+    client = session_mock.return_value.client.return_value
+    client.publish.side_effect = ClientError(
+        {"Error": {"Code": "ExpiredToken", "Message": "expired"}}, "Publish"
+    )
+    channel = SnsChannel("alerts", {"topic_arn": TOPIC_ARN})
+    assert channel.publish("subject", "message") is False
+    assert channel._client is None
+
+
+@patch("kafka_connect_watcher.aws_sns.Session")
+def test_sns_channel_templates_compiled_once(session_mock, tmp_path):
+    custom_template = tmp_path / "custom.j2"
+    custom_template.write_text("{{CONNECTOR_NAME}} failed on {{CONNECT_CLUSTER_ID}}")
+    channel = SnsChannel(
+        "alerts",
+        {"topic_arn": TOPIC_ARN, "template": {"custom": str(custom_template)}},
+    )
+    other_channel = SnsChannel("others", {"topic_arn": TOPIC_ARN})
+    assert (
+        channel.messages_templates["email"] is other_channel.messages_templates["email"]
+    )
+
+    cluster, connector = MagicMock(), MagicMock()
+    cluster.name = "cluster"
+    connector.name = "connector"
+    connector.status = {"connector": {"state": "FAILED"}}
+    with patch.object(
+        JINJA_ENVIRONMENT, "compile", wraps=JINJA_ENVIRONMENT.compile
+    ) as compile_mock:
+        for _ in range(10):
+            channel.send_error_notification(cluster, connector)
+    compile_mock.assert_not_called()
+    message = json.loads(
+        session_mock.return_value.client.return_value.publish.call_args.kwargs[
+            "Message"
+        ]
+    )
+    assert message["custom"] == "connector failed on cluster"
+
+
+@patch("kafka_connect_watcher.aws_sns.Session")
+def test_sns_channel_digest_default_message_is_json(session_mock):
+    channel = SnsChannel("alerts", {"topic_arn": TOPIC_ARN})
+    assert channel.send_digest_notification(
+        "cluster",
+        [
+            ("connector-1", {"connector": {"state": "FAILED"}}),
+            ("connector-2", {"connector": {"state": "FAILED"}}),
+        ],
+    )
+    message = json.loads(
+        session_mock.return_value.client.return_value.publish.call_args.kwargs[
+            "Message"
+        ]
+    )
+    assert [alert["connector_name"] for alert in json.loads(message["default"])] == [
+        "connector-1",
+        "connector-2",
+    ]
+    assert message["email"].count("\n") >= 1
@@ -3,8 +3,13 @@ from os import path
 
 import pytest
 import yaml
+from jsonschema import ValidationError
 
-from kafka_connect_watcher.config import Config
+from kafka_connect_watcher.config import (
+    Config,
+    get_config_validator,
+    validate_config,
+)
 
 
 @pytest.mark.parametrize(
@@ -45,3 +50,33 @@ from kafka_connect_watcher.config import Config
 def test_config_parsing(config_path, expected):
     actual = Config(path.abspath(f"tests/fixtures/configs/{config_path}"))
     assert actual.config == expected
+
+
+def test_config_validator_is_cached():
+    assert get_config_validator() is get_config_validator()
+    Config(configuration={"clusters": [{"hostname": "localhost"}]})
+    assert get_config_validator.cache_info().misses == 1
+
+
+def test_config_validation_reports_all_errors():
+    with pytest.raises(ValidationError) as error:
+        Config(
+            configuration={
+                "clusters": [{"hostname": "localhost", "port": "not-a-port"}],
+                "watch_interval": [],
+                "unknown_setting": True,
+            }
+        )
+    assert len(error.value.context) == 3
+    assert "$.clusters[0].port" in error.value.message
+    assert "$.watch_interval" in error.value.message
+
+
+def test_loaded_config_validates_again():
+    config = Config(path.abspath("tests/fixtures/configs/test_config.yaml"))
+    validate_config(config.config)
+    assert Config(configuration=config.config).config == config.config
+    seconds_config = Config(
+        configuration={"clusters": [{"hostname": "localhost", "interval": 1}]}
+    )
+    assert seconds_config.config["clusters"][0]["interval"] == 2
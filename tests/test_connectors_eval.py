@@ -3,9 +3,17 @@ from unittest.mock import Mock
 
 import pytest
 
-from kafka_connect_watcher.connectors_eval import evaluate_connector_status
+from kafka_connect_watcher.connectors_eval import (
+    ConnectorsTally,
+    count_tasks_states,
+    evaluate_connector,
+    evaluate_connector_status,
+    get_connector_metrics,
+)
+from kafka_connect_watcher.snapshot import ConnectorState
 
 from .fixtures.mock_config import (
+    MockClusterSnapshot,
     MockConnectCluster,
     MockConnector,
     MockEvaluationRule,
@@ -51,21 +59,67 @@ def test_evaluate_connector_status(
     )
     connect = MockConnectCluster()
     connectors = []
-    connectors_to_fix = []
     for connector_state in connector_states:
         tasks = []
         for task_state in task_states:
             tasks.append(MockTask(state=task_state))
         connectors.append(MockConnector(state=connector_state, tasks=tasks))
+    snapshot = MockClusterSnapshot(
+        {connector.name: connector for connector in connectors}
+    )
     for connector in connectors:
         connector_queue.put(
-            [rule, connect, connector, 0, 0, 0, connectors_to_fix],
+            [rule, connect, snapshot, connector],
             False,
         )
     mock_cycle = mocker.patch(
         "tests.fixtures.mock_config.MockConnector.cycle_connector"
     )
-    evaluate_connector_status(connector_queue)
-    assert len(connectors_to_fix) == len_connectors_to_fix
+    tally = evaluate_connector_status(connector_queue, ConnectorsTally())
+    assert len(tally.connectors_to_fix) == len_connectors_to_fix
+    assert tally.running + tally.paused + tally.unassigned + len(
+        tally.connectors_to_fix
+    ) == len(connectors)
     if cycle_connector:
         mock_cycle.assert_called_once_with()
+
+
+def test_connectors_tally_merge_all():
+    first, second = ConnectorsTally(), ConnectorsTally()
+    first.add("RUNNING", MockConnector())
+    first.add("FAILED", MockConnector(name="failed"))
+    second.add("RUNNING", MockConnector())
+    second.add("PAUSED", MockConnector())
+    second.add("UNASSIGNED", MockConnector())
+    merged = ConnectorsTally.merge_all([first, second])
+    assert (merged.running, merged.paused, merged.unassigned) == (2, 1, 1)
+    assert [connector.name for connector in merged.connectors_to_fix] == ["failed"]
+
+
+def test_connector_metrics_and_verdict_from_tasks_tally():
+    connector = ConnectorState(
+        "connector",
+        "RUNNING",
+        (0, 1, 2, 3, 4),
+        ("RUNNING", "PAUSED", "RESTARTING", "FAILED", "RUNNING"),
+    )
+    tasks_states = count_tasks_states(connector)
+    assert get_connector_metrics(connector, tasks_states) == {
+        "tasks": 5,
+        "running": 2,
+        "failed": 1,
+        "unassigned": 0,
+        "paused": 1,
+        "restarting": 1,
+    }
+    assert evaluate_connector(MockEvaluationRule(), connector, tasks_states) == (
+        "FAILED",
+        False,
+    )
+    paused_task = ConnectorState("paused", "RUNNING", (0, 1), ("RUNNING", "PAUSED"))
+    assert evaluate_connector(MockEvaluationRule(ignore_paused=True), paused_task) == (
+        "RUNNING",
+        False,
+    )
+    no_tasks = ConnectorState("no-tasks", "RUNNING")
+    assert evaluate_connector(MockEvaluationRule(), no_tasks) == ("RUNNING", False)
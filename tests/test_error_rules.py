@@ -1,3 +1,5 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import MagicMock, PropertyMock, patch
 
 import pytest
@@ -5,8 +7,10 @@ import pytest
 from kafka_connect_watcher.error_rules import AutoCorrectRule, EvaluationRule
 from tests.fixtures.mock_config import (
     MockClusterConfig,
+    MockClusterSnapshot,
     MockConnectCluster,
     MockConnector,
+    MockTask,
 )
 
 
@@ -111,3 +115,69 @@ def test_backoff_logic_with_mock_connector(
     sleep_durations = [call.args[0] for call in mock_sleep.call_args_list]
     backoff_durations = sleep_durations[: len(expected_sleep_calls)]
     assert backoff_durations == expected_sleep_calls
+
+
+@patch("kafka_connect_watcher.error_rules.EVALUATION_THREADS", 32)
+def test_execute_counts_connectors_across_threads():
+    rule = EvaluationRule({}, MagicMock(notification_channels={}))
+    states = ("RUNNING", "PAUSED", "UNASSIGNED", "FAILED")
+    connectors = {
+        f"connector-{index}": MockConnector(
+            state=states[index % len(states)],
+            name=f"connector-{index}",
+            tasks=[MockTask()],
+        )
+        for index in range(10000)
+    }
+    for connector in connectors.values():
+        connector.cycle_connector = MagicMock()
+    connect = MockConnectCluster()
+    with ThreadPoolExecutor(max_workers=32) as executor:
+        rule.execute(connect, MockClusterSnapshot(connectors), executor=executor)
+    assert connect.metrics["total"] == 10000
+    assert connect.metrics["count"] == 10000
+    assert connect.metrics["running"] == 2500
+    assert connect.metrics["unassigned"] == 2500
+    assert connect.metrics["failed"] == 2500
+    assert len(connect.metrics["connectors"]) == 10000
+
+
+def test_execute_reuses_unchanged_running_connectors():
+    rule = EvaluationRule({}, MagicMock(notification_channels={}))
+    connectors = {
+        name: MockConnector(state=state, name=name, tasks=[MockTask()])
+        for name, state in (("running", "RUNNING"), ("failed", "FAILED"))
+    }
+    for connector in connectors.values():
+        connector.cycle_connector = MagicMock()
+    connect = MockConnectCluster()
+    rule.execute(connect, MockClusterSnapshot(connectors))
+    assert rule.running_connectors == frozenset({"running"})
+
+    with patch(
+        "kafka_connect_watcher.connectors_eval.evaluate_connector",
+        return_value=("FAILED", False),
+    ) as evaluate_mock:
+        rule.execute(
+            connect, MockClusterSnapshot(connectors, frozenset({"running", "failed"}))
+        )
+    assert evaluate_mock.call_count == 1
+    assert evaluate_mock.call_args.args[1].name == "failed"
+    assert connect.metrics["running"] == 1
+    assert connect.metrics["failed"] == 1
+
+
+@patch("kafka_connect_watcher.error_rules.EVALUATION_THREADS", 4)
+def test_execute_reuses_the_evaluation_executor_threads():
+    rule = EvaluationRule({}, MagicMock(notification_channels={}))
+    connectors = {
+        f"connector-{index}": MockConnector(name=f"connector-{index}")
+        for index in range(100)
+    }
+    threads_count = threading.active_count()
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        for _ in range(20):
+            rule.execute(
+                MockConnectCluster(), MockClusterSnapshot(connectors), executor=executor
+            )
+            assert threading.active_count() <= threads_count + 4
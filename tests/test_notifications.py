@@ -0,0 +1,124 @@
+from unittest.mock import MagicMock
+
+from kafka_connect_watcher.notifications import (
+    NotificationDispatcher,
+    connector_error_fingerprint,
+    process_notifications_metrics,
+)
+
+FAILED_STATUS: dict = {
+    "connector": {"state": "RUNNING"},
+    "tasks": [
+        {"id": 0, "state": "RUNNING"},
+        {"id": 1, "state": "FAILED", "trace": "Boom\n\tat some.Class(Class.java:1)"},
+    ],
+}
+
+
+def make_channel() -> MagicMock:
+    channel = MagicMock()
+    channel.get_connector_status.side_effect = lambda connector: connector.status
+    channel.__repr__ = lambda _: "sns.alerts"
+    return channel
+
+
+def make_connector(name: str, status: dict = None) -> MagicMock:
+    connector = MagicMock()
+    connector.name = name
+    connector.status = status if status else FAILED_STATUS
+    return connector
+
+
+def make_cluster(name: str = "cluster") -> MagicMock:
+    cluster = MagicMock()
+    cluster.name = name
+    return cluster
+
+
+def test_connector_error_fingerprint():
+    same_error = {
+        "connector": {"state": "RUNNING", "worker_id": "10.0.0.2:8083"},
+        "tasks": [
+            {"id": 1, "state": "FAILED", "trace": "Boom\n\tat other.Class"},
+            {"id": 0, "state": "RUNNING"},
+        ],
+    }
+    other_error = {
+        "connector": {"state": "RUNNING"},
+        "tasks": [{"id": 0, "state": "FAILED", "trace": "Other"}],
+    }
+    assert connector_error_fingerprint(FAILED_STATUS) == connector_error_fingerprint(
+        same_error
+    )
+    assert connector_error_fingerprint(FAILED_STATUS) != connector_error_fingerprint(
+        other_error
+    )
+    assert connector_error_fingerprint("no status")
+
+
+def test_dispatcher_coalesces_alerts_per_cluster():
+    channel = make_channel()
+    dispatcher = NotificationDispatcher(coalesce_window=60)
+    dispatcher.start()
+    for index in range(50):
+        dispatcher.submit(channel, make_cluster(), make_connector(f"connector-{index}"))
+    dispatcher.submit(channel, make_cluster("other"), make_connector("connector-0"))
+    dispatcher.stop()
+    assert channel.send_digest_notification.call_count == 2
+    digests = {
+        call.args[0]: call.args[1]
+        for call in channel.send_digest_notification.call_args_list
+    }
+    assert len(digests["cluster"]) == 50
+    assert len(digests["other"]) == 1
+    metrics = dispatcher.collect_metrics()
+    assert metrics["sent"] == 51
+    assert metrics["digests"] == 2
+    assert metrics["queue_depth"] == 0
+    assert metrics["latency_seconds_max"] > 0
+
+
+def test_dispatcher_suppresses_duplicates():
+    channel = make_channel()
+    dispatcher = NotificationDispatcher(suppress_duplicates_for=3600)
+    cluster = make_cluster()
+    assert dispatcher.submit(channel, cluster, make_connector("connector")) is True
+    assert dispatcher.submit(channel, cluster, make_connector("connector")) is False
+    other_error = {"connector": {"state": "FAILED"}, "tasks": []}
+    assert (
+        dispatcher.submit(channel, cluster, make_connector("connector", other_error))
+        is True
+    )
+    metrics = dispatcher.collect_metrics()
+    assert metrics["queued"] == 2
+    assert metrics["suppressed"] == 1
+
+
+def test_dispatcher_drops_alerts_when_queue_full():
+    channel = make_channel()
+    dispatcher = NotificationDispatcher(queue_size=2)
+    results = [
+        dispatcher.submit(channel, make_cluster(), make_connector(f"connector-{index}"))
+        for index in range(3)
+    ]
+    assert results == [True, True, False]
+    watcher_metrics: dict = {}
+    exporter = MagicMock()
+    process_notifications_metrics(dispatcher, watcher_metrics, exporter)
+    assert watcher_metrics["notifications_dropped"] == 1
+    assert watcher_metrics["notifications_queue_depth"] == 2
+    exporter.update_notifications.assert_called_once()
+
+
+def test_dispatcher_counts_failed_publish_and_retries():
+    channel = make_channel()
+    channel.send_digest_notification.return_value = False
+    dispatcher = NotificationDispatcher(coalesce_window=0)
+    cluster = make_cluster()
+    dispatcher.start()
+    assert dispatcher.submit(channel, cluster, make_connector("connector")) is True
+    dispatcher.stop()
+    metrics = dispatcher.collect_metrics()
+    assert metrics["failed"] == 1
+    assert metrics["sent"] == 0
+    assert dispatcher.submit(channel, cluster, make_connector("connector")) is True
@@ -0,0 +1,129 @@
+from unittest.mock import MagicMock
+
+from prometheus_client import CollectorRegistry
+
+from kafka_connect_watcher.prometheus import PrometheusExporter
+from kafka_connect_watcher.snapshot import ConnectorState
+
+
+def get_connector_tasks(registry, connector, state):
+    return registry.get_sample_value(
+        "kafka_connect_watcher_connector_tasks",
+        {"cluster": "cluster", "connector": connector, "state": state},
+    )
+
+
+def test_prometheus_exporter_update():
+    registry = CollectorRegistry()
+    exporter = PrometheusExporter(registry=registry)
+    cluster = MagicMock()
+    cluster.name = "cluster"
+    cluster.metrics = {
+        "total": 2,
+        "running": 1,
+        "failed": 1,
+        "scans_skipped": 2,
+        "connectors": {
+            "healthy": ConnectorState("healthy", "RUNNING", (0,), ("RUNNING",)),
+            "failed": ConnectorState(
+                "failed", "RUNNING", (0, 1), ("RUNNING", "FAILED")
+            ),
+        },
+    }
+    exporter.update(cluster)
+    assert (
+        registry.get_sample_value(
+            "kafka_connect_watcher_cluster_connectors",
+            {"cluster": "cluster", "status": "failed"},
+        )
+        == 1
+    )
+    assert (
+        registry.get_sample_value(
+            "kafka_connect_watcher_cluster_scans_skipped_total", {"cluster": "cluster"}
+        )
+        == 2
+    )
+    assert get_connector_tasks(registry, "failed", "failed") == 1
+
+    del cluster.metrics["connectors"]["failed"]
+    cluster.metrics["scans_skipped"] = 3
+    exporter.update(cluster)
+    assert get_connector_tasks(registry, "failed", "failed") is None
+    assert get_connector_tasks(registry, "healthy", "running") == 1
+    assert (
+        registry.get_sample_value(
+            "kafka_connect_watcher_cluster_scans_total", {"cluster": "cluster"}
+        )
+        == 2
+    )
+    assert (
+        registry.get_sample_value(
+            "kafka_connect_watcher_cluster_scans_skipped_total", {"cluster": "cluster"}
+        )
+        == 3
+    )
+
+
+def test_prometheus_exporter_update_notifications():
+    registry = CollectorRegistry()
+    exporter = PrometheusExporter(registry=registry)
+    metrics = {
+        "queued": 10,
+        "dropped": 1,
+        "suppressed": 4,
+        "sent": 8,
+        "failed": 0,
+        "queue_depth": 2,
+        "latency_seconds_max": 30.5,
+    }
+    exporter.update_notifications(metrics)
+    exporter.update_notifications(metrics)
+    assert (
+        registry.get_sample_value(
+            "kafka_connect_watcher_notifications_total", {"outcome": "sent"}
+        )
+        == 16
+    )
+    assert (
+        registry.get_sample_value("kafka_connect_watcher_notifications_queue_depth")
+        == 2
+    )
+    assert (
+        registry.get_sample_value(
+            "kafka_connect_watcher_notifications_latency_seconds_max"
+        )
+        == 30.5
+    )
+
+
+def test_prometheus_exporter_remove_cluster():
+    registry = CollectorRegistry()
+    exporter = PrometheusExporter(registry=registry)
+    cluster = MagicMock()
+    cluster.name = "cluster"
+    cluster.metrics = {
+        "total": 1,
+        "running": 1,
+        "scans_skipped": 1,
+        "connectors": {
+            "healthy": ConnectorState("healthy", "RUNNING", (0,), ("RUNNING",)),
+        },
+    }
+    exporter.update(cluster)
+    assert get_connector_tasks(registry, "healthy", "running") == 1
+
+    exporter.remove_cluster("cluster")
+    exporter.remove_cluster("unknown")
+    assert get_connector_tasks(registry, "healthy", "running") is None
+    for metric_name, labels in (
+        ("kafka_connect_watcher_cluster_connectors", {"status": "running"}),
+        ("kafka_connect_watcher_cluster_scans_total", {}),
+        ("kafka_connect_watcher_cluster_scans_skipped_total", {}),
+    ):
+        assert (
+            registry.get_sample_value(metric_name, {"cluster": "cluster", **labels})
+            is None
+        )
+    assert exporter._connectors_labels == {}
+    assert exporter._scans_skipped == {}
@@ -0,0 +1,130 @@
+import pytest
+
+from kafka_connect_watcher.cluster import ConnectCluster
+from kafka_connect_watcher.config import Config
+from kafka_connect_watcher.reload import get_cluster_name, reload_clusters
+from kafka_connect_watcher.scheduler import ClustersScheduler
+from tests.fixtures.mock_config import (
+    PAUSE_RULE,
+    RESTART_RULE,
+    SNS_TOPIC,
+    make_cluster,
+    make_config,
+)
+
+
+def test_get_cluster_name():
+    assert get_cluster_name({"hostname": "connect"}) == "connect_8083"
+    assert get_cluster_name({"hostname": "connect", "port": 8084}) == "connect_8084"
+    assert get_cluster_name({"hostname": "connect", "name": "main"}) == "main"
+
+
+def test_reload_keeps_unchanged_clusters_and_rules():
+    channels: dict = {"main_topic": {"topic_arn": SNS_TOPIC}}
+    current = make_config(
+        [
+            make_cluster("unchanged", [RESTART_RULE, PAUSE_RULE]),
+            make_cluster("rules", [RESTART_RULE]),
+            make_cluster("settings", [RESTART_RULE]),
+            make_cluster("removed", [RESTART_RULE]),
+        ],
+        channels,
+    )
+    clusters: dict = {
+        get_cluster_name(cluster): ConnectCluster(cluster, current)
+        for cluster in current.config["clusters"]
+    }
+    unchanged_rules: list = list(clusters["unchanged_8083"].handling_rules)
+    restart_rule = clusters["rules_8083"].handling_rules[0]
+
+    config = make_config(
+        [
+            make_cluster("unchanged", [RESTART_RULE, PAUSE_RULE]),
+            make_cluster("rules", [RESTART_RULE, PAUSE_RULE]),
+            make_cluster("settings", [RESTART_RULE], interval="30s"),
+            make_cluster("added", [RESTART_RULE]),
+        ],
+        channels,
+    )
+    reloaded, changes = reload_clusters(clusters, current, config)
+
+    assert reloaded["unchanged_8083"] is clusters["unchanged_8083"]
+    assert reloaded["unchanged_8083"].handling_rules == unchanged_rules
+    assert reloaded["rules_8083"] is clusters["rules_8083"]
+    assert reloaded["rules_8083"].handling_rules[0] is restart_rule
+    assert len(reloaded["rules_8083"].handling_rules) == 2
+    assert reloaded["settings_8083"] is not clusters["settings_8083"]
+    assert reloaded["settings_8083"].interval == 30
+    assert changes.clusters_added == ["added_8083"]
+    assert changes.clusters_removed == ["removed_8083"]
+    assert changes.clusters_changed == ["settings_8083"]
+    assert changes.clusters_rules_changed == ["rules_8083"]
+    assert (
+        config.notification_channels["sns.main_topic"]
+        is current.notification_channels["sns.main_topic"]
+    )
+    pause_rule = reloaded["unchanged_8083"].handling_rules[1].auto_correct_rules[0]
+    assert pause_rule.notification_channels == [
+        current.notification_channels["sns.main_topic"]
+    ]
+
+
+def test_reload_rebuilds_changed_channels():
+    current = make_config(
+        [make_cluster("connect", [PAUSE_RULE])],
+        {"main_topic": {"topic_arn": SNS_TOPIC}},
+    )
+    config = make_config(
+        [make_cluster("connect", [PAUSE_RULE])],
+        {"main_topic": {"topic_arn": f"{SNS_TOPIC}-new"}},
+    )
+    clusters: dict = {
+        "connect_8083": ConnectCluster(current.config["clusters"][0], current)
+    }
+    reloaded, changes = reload_clusters(clusters, current, config)
+    assert changes.channels_changed == ["sns.main_topic"]
+    assert not changes.clusters_rules_changed
+    pause_rule = reloaded["connect_8083"].handling_rules[0].auto_correct_rules[0]
+    assert pause_rule.notification_channels == [
+        config.notification_channels["sns.main_topic"]
+    ]
+    assert repr(changes) == "channels_changed=['sns.main_topic']"
+
+
+def test_failed_reload_leaves_running_clusters_unchanged(monkeypatch):
+    current = make_config([make_cluster("rules", [RESTART_RULE])])
+    clusters: dict = {
+        "rules_8083": ConnectCluster(current.config["clusters"][0], current)
+    }
+    rules: list = list(clusters["rules_8083"].handling_rules)
+    definition: dict = clusters["rules_8083"].original_definition
+
+    def build_cluster(cluster_config, watcher_config):
+        if cluster_config["hostname"] == "broken":
+            raise ValueError("broken cluster")
+        return ConnectCluster(cluster_config, watcher_config)
+
+    monkeypatch.setattr("kafka_connect_watcher.reload.ConnectCluster", build_cluster)
+    config = make_config(
+        [
+            make_cluster("rules", [RESTART_RULE, PAUSE_RULE]),
+            make_cluster("broken", [RESTART_RULE]),
+        ]
+    )
+    with pytest.raises(ValueError):
+        reload_clusters(clusters, current, config)
+    assert clusters["rules_8083"].handling_rules == rules
+    assert clusters["rules_8083"].original_definition == definition
+
+
+def test_scheduler_remove():
+    class DummyCluster:
+        interval = 5
+        metrics: dict = {}
+
+    kept, removed = DummyCluster(), DummyCluster()
+    scheduler = ClustersScheduler([kept, removed], now=0)
+    scheduler.remove(removed)
+    assert scheduler.pop_due(0) == [kept]
+    scheduler.add(removed, 1)
+    assert scheduler.pop_due(1) == [removed]
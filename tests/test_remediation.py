@@ -0,0 +1,180 @@
+import threading
+import time
+from unittest.mock import MagicMock, PropertyMock, call, patch
+
+from kafka_connect_watcher.error_rules import AutoCorrectRule, EvaluationRule
+from kafka_connect_watcher.remediation import Remediation, RemediationScheduler
+from tests.fixtures.mock_config import (
+    MockClusterSnapshot,
+    MockConnectCluster,
+    MockConnector,
+    MockTask,
+)
+
+FAILED_STATUS: dict = {"connector": {"state": "FAILED"}, "tasks": [{"state": "FAILED"}]}
+RUNNING_STATUS: dict = {
+    "connector": {"state": "RUNNING"},
+    "tasks": [{"state": "RUNNING"}],
+}
+
+
+def failed_connector(statuses: list[dict]) -> MockConnector:
+    connector = MockConnector(state="FAILED", tasks=[MockTask("FAILED")])
+    connector.config = {"connector.class": "TestClass"}
+    connector.restart = MagicMock()
+    connector.pause = MagicMock()
+
+    def status_side_effect():
+        yield from statuses
+        while True:
+            yield statuses[-1]
+
+    type(connector).status = PropertyMock(side_effect=status_side_effect())
+    return connector
+
+
+def test_remediation_steps_follow_backoff():
+    rule = AutoCorrectRule(
+        {"action": "restart", "max_backoff": 20, "max_attempts": 3}, watcher_config={}
+    )
+    connector = failed_connector([FAILED_STATUS])
+    remediation = Remediation([rule], MockConnectCluster(), connector)
+    assert [remediation.step() for _ in range(3)] == [5, 10, 20]
+    connector.restart.assert_not_called()
+    assert remediation.step() == rule.initial_delay
+    connector.restart.assert_called_once()
+    assert remediation.step() is None
+
+
+def test_remediation_skips_recovered_connector():
+    rule = AutoCorrectRule(
+        {"action": "restart", "max_backoff": 20, "max_attempts": 3}, watcher_config={}
+    )
+    connector = failed_connector([FAILED_STATUS, RUNNING_STATUS])
+    remediation = Remediation([rule], MockConnectCluster(), connector)
+    assert remediation.step() == 5
+    assert remediation.step() is None
+    connector.restart.assert_not_called()
+
+
+def test_remediation_applies_rules_in_order():
+    pause_rule = AutoCorrectRule(
+        {"action": "pause", "max_backoff": 5, "max_attempts": 1}, watcher_config={}
+    )
+    restart_rule = AutoCorrectRule({"action": "restart"}, watcher_config={})
+    connector = failed_connector([FAILED_STATUS])
+    actions = MagicMock()
+    actions.attach_mock(connector.pause, "pause")
+    actions.attach_mock(connector.restart, "restart")
+    remediation = Remediation(
+        [pause_rule, restart_rule], MockConnectCluster(), connector
+    )
+    assert remediation.step() == 5
+    assert actions.mock_calls == []
+    assert remediation.step() == pause_rule.initial_delay
+    assert actions.mock_calls == [call.pause()]
+    assert remediation.step() == restart_rule.initial_delay
+    assert actions.mock_calls == [call.pause(), call.restart()]
+    assert remediation.step() is None
+
+
+def test_scheduler_does_not_block_and_deduplicates():
+    rule = AutoCorrectRule(
+        {"action": "restart", "max_backoff": 300, "max_attempts": 5}, watcher_config={}
+    )
+    connector = failed_connector([FAILED_STATUS])
+    cluster = MockConnectCluster()
+    scheduler = RemediationScheduler(max_workers=2)
+    scheduler.start()
+    try:
+        start = time.monotonic()
+        assert scheduler.submit(cluster, connector, [rule]) is True
+        assert scheduler.submit(cluster, connector, [rule]) is False
+        assert scheduler.submit(cluster, connector, [rule, rule]) is False
+        assert time.monotonic() - start < 1
+        assert len(scheduler) == 1
+        assert scheduler.metrics["deduplicated"] == 2
+    finally:
+        scheduler.stop()
+    connector.restart.assert_not_called()
+
+
+def test_scheduler_logs_only_accepted_remediations():
+    rule = AutoCorrectRule({"action": "restart"}, watcher_config={})
+    connector = failed_connector([FAILED_STATUS])
+    cluster = MockConnectCluster()
+    scheduler = RemediationScheduler(max_workers=1)
+    with patch("kafka_connect_watcher.remediation.LOG") as log_mock:
+        assert scheduler.submit(cluster, connector, [rule]) is True
+        assert scheduler.submit(cluster, connector, [rule]) is False
+    log_mock.info.assert_not_called()
+
+
+def test_scheduler_runs_steps_on_timers():
+    rule = MagicMock(
+        action="restart",
+        config={"max_backoff": 1, "max_attempts": 2},
+        initial_delay=0.01,
+    )
+    rule.backoff_delays.return_value = [0.01, 0.02]
+    rule.is_recovered = AutoCorrectRule.is_recovered
+    rule.apply_action.return_value = True
+    connector = failed_connector([FAILED_STATUS])
+    done = threading.Event()
+    scheduler = RemediationScheduler(max_workers=1)
+    scheduler.start()
+    try:
+        scheduler.submit(MockConnectCluster(), connector, [rule])
+        deadline = time.monotonic() + 5
+        while len(scheduler) and time.monotonic() < deadline:
+            done.wait(0.01)
+    finally:
+        scheduler.stop()
+    assert len(scheduler) == 0
+    assert scheduler.metrics["completed"] == 1
+    rule.apply_action.assert_called_once()
+
+
+def test_evaluation_rule_submits_to_scheduler():
+    rule = EvaluationRule(
+        {"auto_correct_actions": [{"action": "restart"}]},
+        MagicMock(notification_channels={}),
+    )
+    connector = MockConnector(state="FAILED", tasks=[MockTask("FAILED")])
+    remediation = MagicMock()
+    rule.execute(
+        MockConnectCluster(),
+        MockClusterSnapshot({connector.name: connector}),
+        remediation,
+    )
+    remediation.submit.assert_called_once()
+    assert remediation.submit.call_args.args[1] is connector
+
+
+def test_evaluation_rule_submits_to_idle_scheduler(monkeypatch):
+    rule = EvaluationRule(
+        {"auto_correct_actions": [{"action": "restart", "max_backoff": 20}]},
+        MagicMock(notification_channels={}),
+    )
+    connector = failed_connector([FAILED_STATUS])
+    sleeping_threads: list[int] = []
+    real_sleep = time.sleep
+
+    def record_sleep(seconds):
+        sleeping_threads.append(threading.get_ident())
+        real_sleep(min(seconds, 0.01))
+
+    monkeypatch.setattr(time, "sleep", record_sleep)
+    scheduler = RemediationScheduler(max_workers=1)
+    scheduler.start()
+    try:
+        assert len(scheduler) == 0
+        rule.execute(
+            MockConnectCluster(),
+            MockClusterSnapshot({connector.name: connector}),
+            scheduler,
+        )
+        assert scheduler.metrics["submitted"] == 1
+    finally:
+        scheduler.stop()
+    assert threading.get_ident() not in sleeping_threads
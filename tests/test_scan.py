@@ -0,0 +1,144 @@
+import json
+import sys
+import time
+
+import pytest
+
+from kafka_connect_watcher.cli import start_watcher
+from kafka_connect_watcher.cluster import ConnectCluster
+from kafka_connect_watcher.scan import (
+    EXIT_HEALTHY,
+    EXIT_SCAN_FAILED,
+    EXIT_UNHEALTHY,
+    format_scan_report,
+    get_exit_code,
+    scan_clusters,
+)
+from kafka_connect_watcher.snapshot import ClusterSnapshot, import_connectors_snapshot
+from tests.fixtures.mock_config import (
+    RESTART_RULE,
+    make_cluster,
+    make_config,
+    make_configuration,
+)
+
+SCAN_RULES: list = [{"ignore_paused": False, **RESTART_RULE}]
+
+
+def connector_status(state: str, tasks_states: list) -> dict:
+    return {
+        "status": {
+            "connector": {"state": state},
+            "tasks": [
+                {"id": task_id, "state": task_state}
+                for task_id, task_state in enumerate(tasks_states)
+            ],
+        }
+    }
+
+
+PAYLOADS: dict = {
+    "healthy": {
+        "sink": connector_status("RUNNING", ["RUNNING", "RUNNING"]),
+        "source": connector_status("RUNNING", ["RUNNING"]),
+    },
+    "unhealthy": {
+        "sink": connector_status("RUNNING", ["RUNNING"]),
+        "failing": connector_status("RUNNING", ["RUNNING", "FAILED"]),
+        "paused": connector_status("PAUSED", ["PAUSED"]),
+    },
+}
+
+
+@pytest.fixture
+def clusters_payloads(monkeypatch):
+    def get_snapshot(connect_cluster):
+        time.sleep(0.2)
+        if connect_cluster.hostname not in PAYLOADS:
+            print(f"HTTPConnectionPool(host='{connect_cluster.hostname}', port=8083)")
+            raise ConnectionError(f"{connect_cluster.hostname} unreachable")
+        return ClusterSnapshot(
+            import_connectors_snapshot(PAYLOADS[connect_cluster.hostname])
+        )
+
+    monkeypatch.setattr(ConnectCluster, "get_snapshot", get_snapshot)
+
+
+def test_scan_reports_clusters_health(clusters_payloads):
+    scan_report = scan_clusters(
+        make_config(
+            [make_cluster("healthy", SCAN_RULES), make_cluster("unhealthy", SCAN_RULES)]
+        )
+    )
+    assert get_exit_code(scan_report) == EXIT_UNHEALTHY
+    healthy = scan_report["clusters"]["healthy_8083"]
+    assert healthy["healthy"] is True
+    assert healthy["metrics"]["running"] == 2
+    assert healthy["connectors"]["sink"]["running"] == 2
+    assert healthy["corrective_actions"] == []
+    unhealthy = scan_report["clusters"]["unhealthy_8083"]
+    assert unhealthy["healthy"] is False
+    assert unhealthy["metrics"]["failed"] == 1
+    assert unhealthy["connectors"]["failing"]["failed"] == 1
+    assert sorted(
+        (action["connector"], action["action"])
+        for action in unhealthy["corrective_actions"]
+    ) == [("failing", "restart"), ("paused", "cycle")]
+    assert json.loads(format_scan_report(scan_report, "json")) == scan_report
+    assert "would restart" in format_scan_report(scan_report, "text")
+
+
+def test_scan_clusters_concurrently(clusters_payloads):
+    start = time.monotonic()
+    scan_report = scan_clusters(
+        make_config(
+            [
+                make_cluster("healthy", SCAN_RULES),
+                make_cluster("healthy-2", SCAN_RULES),
+                make_cluster("healthy-3", SCAN_RULES),
+            ]
+        )
+    )
+    assert time.monotonic() - start < 0.5
+    assert get_exit_code(scan_report) == EXIT_SCAN_FAILED
+    assert "unreachable" in scan_report["clusters"]["healthy-2_8083"]["error"]
+
+
+def test_scan_cli_once_json(clusters_payloads, monkeypatch, tmp_path, capsys):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(
+        json.dumps(make_configuration([make_cluster("healthy", SCAN_RULES)]))
+    )
+    monkeypatch.setattr(
+        sys, "argv", ["prog", "scan", "-c", str(config_file), "--once", "-o", "json"]
+    )
+    with pytest.raises(SystemExit) as exit_info:
+        start_watcher()
+    assert exit_info.value.code == EXIT_HEALTHY
+    assert json.loads(capsys.readouterr().out)["healthy"] is True
+
+
+def test_scan_cli_stdout_is_report_only(
+    clusters_payloads, monkeypatch, tmp_path, capsys
+):
+    config_file = tmp_path / "config.json"
+    config_file.write_text(
+        json.dumps(
+            make_configuration(
+                [
+                    make_cluster("healthy", SCAN_RULES),
+                    make_cluster("unreachable", SCAN_RULES),
+                ]
+            )
+        )
+    )
+    monkeypatch.setattr(
+        sys, "argv", ["prog", "scan", "-c", str(config_file), "--once", "-o", "json"]
+    )
+    with pytest.raises(SystemExit) as exit_info:
+        start_watcher()
+    assert exit_info.value.code == EXIT_SCAN_FAILED
+    captured = capsys.readouterr()
+    scan_report = json.loads(captured.out)
+    assert "unreachable" in scan_report["clusters"]["unreachable_8083"]["error"]
+    assert "HTTPConnectionPool" in captured.err
@@ -0,0 +1,50 @@
+from kafka_connect_watcher.scheduler import ClustersScheduler
+
+
+class DummyCluster:
+    def __init__(self, name: str, interval: int):
+        self.name = name
+        self.interval = interval
+        self.metrics = {"connectors": {}}
+
+
+def test_clusters_scanned_on_their_own_interval():
+    fast = DummyCluster("fast", 5)
+    slow = DummyCluster("slow", 30)
+    scheduler = ClustersScheduler([fast, slow], now=0)
+    assert scheduler.pop_due(0) == [fast, slow]
+    scheduler.done(fast)
+    scheduler.done(slow)
+    assert scheduler.time_to_next(0) == 5
+    assert scheduler.pop_due(4) == []
+    assert scheduler.pop_due(5) == [fast]
+    scheduler.done(fast)
+    assert scheduler.pop_due(10) == [fast]
+    scheduler.done(fast)
+    assert scheduler.pop_due(30) == [fast, slow]
+
+
+def test_overrun_scan_is_skipped_and_counted():
+    slow_scan = DummyCluster("slow-scan", 5)
+    other = DummyCluster("other", 5)
+    scheduler = ClustersScheduler([slow_scan, other], now=0)
+    assert scheduler.pop_due(0) == [slow_scan, other]
+    scheduler.done(other)
+    assert scheduler.pop_due(5) == [other]
+    assert scheduler.metrics["scans_skipped"] == 1
+    assert slow_scan.metrics["scans_skipped"] == 1
+    scheduler.done(slow_scan)
+    scheduler.done(other)
+    assert scheduler.pop_due(10) == [slow_scan, other]
+
+
+def test_missed_scans_are_coalesced():
+    cluster = DummyCluster("cluster", 5)
+    scheduler = ClustersScheduler([cluster], now=0)
+    scheduler.pop_due(0)
+    scheduler.done(cluster)
+    assert scheduler.pop_due(27) == [cluster]
+    scheduler.done(cluster)
+    assert scheduler.pop_due(31) == []
+    assert scheduler.pop_due(32) == [cluster]
+    assert scheduler.metrics["scans_started"] == 3
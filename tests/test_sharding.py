@@ -0,0 +1,76 @@
+from unittest.mock import MagicMock
+
+import pytest
+from prometheus_client import CollectorRegistry
+
+from kafka_connect_watcher.prometheus import PrometheusExporter
+from kafka_connect_watcher.sharding import (
+    SHARD_COUNT_ENV,
+    SHARD_INDEX_ENV,
+    Shard,
+    process_shard_metrics,
+)
+
+CLUSTERS: list = [{"hostname": f"connect-{index}"} for index in range(1000)]
+
+
+def shards_clusters(count: int) -> list[set]:
+    return [
+        {
+            cluster["hostname"]
+            for cluster in Shard(index, count).select_clusters(CLUSTERS)
+        }
+        for index in range(count)
+    ]
+
+
+@pytest.mark.parametrize(["index", "count"], ((0, 0), (2, 2), (-1, 2)))
+def test_invalid_shard(index, count):
+    with pytest.raises(ValueError):
+        Shard(index, count)
+
+
+def test_shards_partition_the_clusters():
+    shards = shards_clusters(4)
+    assert sum(len(clusters) for clusters in shards) == len(CLUSTERS)
+    assert set().union(*shards) == {cluster["hostname"] for cluster in CLUSTERS}
+    assert all(150 < len(clusters) < 350 for clusters in shards)
+    assert Shard().select_clusters(CLUSTERS) == CLUSTERS
+
+
+def test_adding_a_shard_only_moves_clusters_to_it():
+    before, after = shards_clusters(4), shards_clusters(5)
+    for index in range(4):
+        assert after[index] <= before[index]
+    assert 100 < len(after[4]) < 300
+
+
+def test_shard_from_env(monkeypatch):
+    monkeypatch.setenv(SHARD_INDEX_ENV, "1")
+    monkeypatch.setenv(SHARD_COUNT_ENV, "3")
+    shard = Shard.from_env()
+    assert (shard.index, shard.count) == (1, 3)
+    assert shard.dimensions == {"ShardIndex": "1"}
+    shard = Shard.from_env(index=2)
+    assert (shard.index, shard.count) == (2, 3)
+    monkeypatch.delenv(SHARD_INDEX_ENV)
+    monkeypatch.delenv(SHARD_COUNT_ENV)
+    assert Shard.from_env().dimensions == {}
+
+
+def test_process_shard_metrics():
+    registry = CollectorRegistry()
+    exporter = PrometheusExporter(registry=registry)
+    clusters = [MagicMock(metrics={"total": 10}), MagicMock(metrics={"connectors": {}})]
+    watcher_metrics: dict = {}
+    process_shard_metrics(Shard(1, 2), clusters, watcher_metrics, exporter)
+    assert watcher_metrics["connect_clusters_total"] == 2
+    assert watcher_metrics["connectors_total"] == 10
+    labels: dict = {"shard_index": "1", "shard_count": "2"}
+    assert (
+        registry.get_sample_value("kafka_connect_watcher_shard_clusters", labels) == 2
+    )
+    assert (
+        registry.get_sample_value("kafka_connect_watcher_shard_connectors", labels)
+        == 10
+    )
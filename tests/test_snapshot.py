@@ -0,0 +1,171 @@
+from copy import deepcopy
+from unittest.mock import MagicMock, patch
+
+from kafka_connect_api.errors import GenericNotFound
+
+from kafka_connect_watcher.cluster import ConnectCluster
+from kafka_connect_watcher.snapshot import (
+    EXPANDED_CONNECTORS_PATH,
+    ClusterSnapshot,
+    ConnectorSnapshot,
+    ConnectorState,
+    import_connectors_snapshot,
+)
+
+EXPANDED_PAYLOAD: dict = {
+    "sink-connector": {
+        "status": {
+            "name": "sink-connector",
+            "connector": {"state": "RUNNING", "worker_id": "10.0.0.1:8083"},
+            "tasks": [
+                {"id": 0, "state": "RUNNING", "worker_id": "10.0.0.1:8083"},
+                {"id": 1, "state": "FAILED", "worker_id": "10.0.0.2:8083"},
+            ],
+            "type": "sink",
+        },
+        "info": {
+            "name": "sink-connector",
+            "config": {"connector.class": "SinkClass"},
+            "tasks": [{"connector": "sink-connector", "task": 0}],
+            "type": "sink",
+        },
+    },
+    "paused-connector": {
+        "status": {
+            "name": "paused-connector",
+            "connector": {"state": "PAUSED", "worker_id": "10.0.0.1:8083"},
+            "tasks": [],
+            "type": "source",
+        },
+        "info": {"config": {"connector.class": "SourceClass"}},
+    },
+}
+
+
+def test_import_connectors_snapshot():
+    connectors = import_connectors_snapshot(EXPANDED_PAYLOAD)
+    assert list(connectors.keys()) == ["sink-connector", "paused-connector"]
+
+    sink = connectors["sink-connector"]
+    assert isinstance(sink, ConnectorState)
+    assert sink.state == "RUNNING"
+    assert sink.connector_type == "sink"
+    assert sink.tasks_ids == (0, 1)
+    assert sink.tasks_states == ("RUNNING", "FAILED")
+    assert sink.fingerprint == ("RUNNING", ("RUNNING", "FAILED"))
+    assert not hasattr(sink, "__dict__")
+
+    paused = connectors["paused-connector"]
+    assert paused.state == "PAUSED"
+    assert paused.tasks_states == ()
+
+
+def test_connector_state_interns_states():
+    first = ConnectorState(
+        "first", "".join(["RUN", "NING"]), (0,), ("".join(["FAIL", "ED"]),)
+    )
+    second = ConnectorState.from_status(
+        "second",
+        {"connector": {"state": "RUNNING"}, "tasks": [{"id": 0, "state": "FAILED"}]},
+    )
+    assert first.state is second.state
+    assert first.tasks_states[0] is second.tasks_states[0]
+
+
+def test_cluster_snapshot_connector():
+    cluster = MagicMock()
+    snapshot = ClusterSnapshot(
+        import_connectors_snapshot(EXPANDED_PAYLOAD), cluster=cluster
+    )
+    assert isinstance(snapshot["sink-connector"], ConnectorState)
+    connector = snapshot.connector("sink-connector")
+    assert isinstance(connector, ConnectorSnapshot)
+    assert connector.name == "sink-connector"
+    assert connector.state == "RUNNING"
+    assert [(_task.id, _task.state) for _task in connector.tasks] == [
+        (0, "RUNNING"),
+        (1, "FAILED"),
+    ]
+    assert [_task.is_running() for _task in connector.tasks] == [True, False]
+    cluster.api.get.assert_not_called()
+
+
+def test_connect_cluster_connectors_snapshot_single_request():
+    connect = MagicMock()
+    connect.api.get.return_value = EXPANDED_PAYLOAD
+    connectors = ConnectCluster.get_connectors_snapshot(connect)
+    connect.api.get.assert_called_once_with(EXPANDED_CONNECTORS_PATH)
+    assert len(connectors) == 2
+
+
+def test_connect_cluster_connectors_snapshot_without_expand_support():
+    connect = MagicMock()
+    statuses: dict = {
+        f"/connectors/{name}/status": definition["status"]
+        for name, definition in EXPANDED_PAYLOAD.items()
+    }
+    connect.api.get.side_effect = lambda query_path: (
+        list(EXPANDED_PAYLOAD.keys())
+        if query_path == EXPANDED_CONNECTORS_PATH
+        else statuses[query_path]
+    )
+    connectors = ConnectCluster.get_connectors_snapshot(connect)
+    assert connect.api.get.call_count == 3
+    assert connectors["sink-connector"].state == "RUNNING"
+    assert connectors["paused-connector"].state == "PAUSED"
+
+
+def test_connect_cluster_connectors_snapshot_skips_deleted_connectors():
+    connect = MagicMock()
+
+    def get(query_path):
+        if query_path == EXPANDED_CONNECTORS_PATH:
+            return ["deleted-connector", *EXPANDED_PAYLOAD.keys()]
+        if query_path == "/connectors/deleted-connector/status":
+            raise GenericNotFound(404, ["Connector deleted-connector not found"])
+        return EXPANDED_PAYLOAD[query_path.split("/")[2]]["status"]
+
+    connect.api.get.side_effect = get
+    connectors = ConnectCluster.get_connectors_snapshot(connect)
+    assert list(connectors) == ["sink-connector", "paused-connector"]
+
+
+def test_connect_cluster_snapshot():
+    connect = MagicMock()
+    connect.get_connectors_snapshot.return_value = import_connectors_snapshot(
+        EXPANDED_PAYLOAD
+    )
+    connect.build_snapshot.side_effect = ClusterSnapshot
+    snapshot = ConnectCluster.get_snapshot(connect)
+    assert isinstance(snapshot, ClusterSnapshot)
+    assert len(snapshot) == 2
+    assert snapshot.connectors_names == ["sink-connector", "paused-connector"]
+    assert snapshot["paused-connector"].state == "PAUSED"
+    connect.get_connectors_snapshot.assert_called_once_with()
+
+
+@patch("kafka_connect_watcher.cluster.monotonic")
+def test_connect_cluster_snapshot_unchanged_connectors(monotonic_mock):
+    connect = MagicMock(
+        connectors_fingerprints={}, full_resync_interval=300, _next_full_resync=0
+    )
+    monotonic_mock.return_value = 1000
+    first = ConnectCluster.build_snapshot(
+        connect, import_connectors_snapshot(EXPANDED_PAYLOAD)
+    )
+    assert first.unchanged == frozenset()
+
+    changed_payload: dict = deepcopy(EXPANDED_PAYLOAD)
+    changed_payload["sink-connector"]["status"]["tasks"][1]["state"] = "RUNNING"
+    monotonic_mock.return_value = 1015
+    second = ConnectCluster.build_snapshot(
+        connect, import_connectors_snapshot(changed_payload)
+    )
+    assert second.unchanged == frozenset({"paused-connector"})
+    assert connect.unchanged_connectors == second.unchanged
+
+    monotonic_mock.return_value = 1300
+    resync = ConnectCluster.build_snapshot(
+        connect, import_connectors_snapshot(changed_payload)
+    )
+    assert resync.unchanged == frozenset()
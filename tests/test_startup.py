@@ -0,0 +1,48 @@
+import subprocess
+import sys
+
+import pytest
+
+STARTUP_BUDGET_MS: int = 500
+OPTIONAL_BACKENDS: tuple = (
+    "aiohttp",
+    "aws_embedded_metrics",
+    "boto3",
+    "jinja2",
+    "prometheus_client",
+)
+
+
+def import_times(statement: str) -> dict[str, int]:
+    """Cumulative import time, in microseconds, of each module imported by the statement"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times: dict[str, int] = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, module = line.split("|")
+        times[module.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize(
+    "statement",
+    (
+        "import kafka_connect_watcher.cli",
+        "from kafka_connect_watcher.config import Config;"
+        "Config(configuration={'clusters': [{'hostname': 'localhost'}]})",
+    ),
+)
+def test_optional_backends_not_imported(statement):
+    imported: set[str] = {module.split(".")[0] for module in import_times(statement)}
+    assert not imported.intersection(OPTIONAL_BACKENDS)
+
+
+def test_cli_import_time_budget():
+    times = import_times("import kafka_connect_watcher.cli")
+    assert times["kafka_connect_watcher.cli"] / 1000 < STARTUP_BUDGET_MS
@@ -0,0 +1,56 @@
+import re
+
+import pytest
+
+from kafka_connect_watcher.tools import (
+    ConnectorsFilter,
+    combine_regexes,
+    import_regexes,
+)
+
+
+@pytest.mark.parametrize(
+    ["include", "exclude", "connector_name", "expected"],
+    (
+        ([".*"], [], "any-connector", True),
+        (["^sink-.*", "^source-.*"], [], "source-db", True),
+        (["^sink-.*", "^source-.*"], [], "replicator-db", False),
+        (["^sink-.*", "^source-.*"], [".*-db$", ".*-test$"], "source-db", False),
+        (["^sink-.*", "^source-.*"], [".*-db$", ".*-test$"], "sink-s3", True),
+        ([], [], "any-connector", False),
+    ),
+)
+def test_connectors_filter(include, exclude, connector_name, expected):
+    connectors_filter = ConnectorsFilter(
+        import_regexes(include), import_regexes(exclude)
+    )
+    assert connector_name not in connectors_filter
+    assert connectors_filter.matches(connector_name) is expected
+    assert connector_name in connectors_filter
+    assert connectors_filter.matches(connector_name) is expected
+
+
+def test_combine_regexes_with_incompatible_patterns():
+    regexes = import_regexes(["(?i)^SINK-.*", "^source-.*"])
+    with pytest.raises(re.error):
+        re.compile("|".join(f"(?:{regex.pattern})" for regex in regexes))
+    combined = combine_regexes(regexes)
+    assert combined.match("sink-s3")
+    assert combined.match("source-db")
+    assert not combined.match("replicator")
+
+
+def test_combine_regexes_keeps_numbered_backreferences():
+    regexes = import_regexes(["^(sink|source)-.*", r"^(\w)\1-.*"])
+    naive = re.compile("|".join(f"(?:{regex.pattern})" for regex in regexes))
+    assert not naive.match("aa-connector")
+    combined = combine_regexes(regexes)
+    assert combined.match("aa-connector")
+    assert combined.match("sink-s3")
+    assert not combined.match("ab-connector")
+
+
+def test_import_regexes_single_string():
+    assert [regex.pattern for regex in import_regexes(".*to-include.*")] == [
+        ".*to-include.*"
+    ]
@@ -1,278 +1,217 @@
-import sys
-import types
-from queue import Queue
-from unittest.mock import MagicMock, call, patch
-
-import pytest
-
-from .watcher import Watcher, process_cluster, process_error_rules
-
-# pytest
-
-
-
-@pytest.fixture
-def dummy_config():
-    cfg = MagicMock()
-    cfg.config = {"clusters": [{"hostname": "h1"}, {"hostname": "h2"}]}
-    cfg.emf_watcher_config = False
-    cfg.scan_intervals = 2
-    return cfg
-
-@pytest.fixture
-def dummy_cluster():
-    cluster = MagicMock()
-    cluster.name = "cluster1"
-    cluster.emf_config = None
-    cluster.handling_rules = []
-    return cluster
-
-def test_watcher_init_sets_metrics():
-    watcher = Watcher()
-    assert watcher.metrics["connect_clusters_total"] == 0
-    assert watcher.metrics["connect_clusters_healthy"] == 0
-    assert watcher.metrics["connect_clusters_unhealthy"] == 0
-    assert watcher.keep_running is True
-    assert hasattr(watcher, "exit_gracefully")
-
-@patch("kafka_connect_watcher.watcher.ConnectCluster")
-@patch("kafka_connect_watcher.watcher.init_emf_config")
-@patch("kafka_connect_watcher.watcher.LOG")
-@patch("kafka_connect_watcher.watcher.NUM_THREADS", 1)
-def test_watcher_run_main_loop(mock_log, mock_init_emf, mock_connect_cluster, dummy_config, monkeypatch):
-    # Setup dummy cluster
-    dummy_cluster = MagicMock()
-    dummy_cluster.name = "c1"
-    dummy_cluster.emf_config = None
-    dummy_cluster.handling_rules = []
-    mock_connect_cluster.side_effect = lambda cluster, config: dummy_cluster
-
-    watcher = Watcher()
-    # Patch threading.Thread to run target immediately
-    def fake_thread(target, daemon, args):
-        class DummyThread:
-            def start(self):
-                # Put a dummy cluster and then break
-                args[0].put([watcher, dummy_config, dummy_cluster], False)
-                args[0].put([watcher, dummy_config, None], False)
-                target(args[0])
-            def join(self): pass
-        return DummyThread()
-    monkeypatch.setattr("threading.Thread", fake_thread)
-    monkeypatch.setattr("kafka_connect_watcher.watcher.process_cluster", lambda q: None)
-    # Patch sleep to avoid delay
-    monkeypatch.setattr("kafka_connect_watcher.watcher.sleep", lambda x: None)
-    # Patch handle_watcher_emf to avoid side effects
-    monkeypatch.setattr("kafka_connect_watcher.watcher.handle_watcher_emf", lambda config, watcher: None)
-    # Patch Queue.join to return immediately
-    watcher.connect_clusters_processing_queue.join = lambda: None
-
-    # Only run one loop
-    def stop_after_first(*a, **kw):
-        watcher.keep_running = False
-    monkeypatch.setattr(watcher, "metrics", watcher.metrics)
-    monkeypatch.setattr(watcher, "keep_running", True)
-    monkeypatch.setattr("kafka_connect_watcher.watcher.dt", MagicMock(now=lambda: MagicMock(total_seconds=lambda: 0)))
-    watcher.keep_running = True
-    watcher.run(dummy_config)
-    assert watcher.metrics["connect_clusters_total"] == 2
-
-def test_exit_gracefully_sets_flag_and_exits(monkeypatch):
-    watcher = Watcher()
-    monkeypatch.setattr("builtins.exit", lambda code=0: (_ for _ in ()).throw(SystemExit(code)))
-    with pytest.raises(SystemExit):
-        watcher.exit_gracefully(1, "signal")
-    assert watcher.keep_running is False
-
-def test_process_error_rules_success(monkeypatch):
-    rule = MagicMock()
-    cluster = MagicMock()
-    cluster.emf_config = None
-    watcher = MagicMock()
-    watcher.metrics = {
-        "connect_clusters_healthy": 0,
-        "connect_clusters_unhealthy": 0,
-    }
-    monkeypatch.setattr("kafka_connect_watcher.watcher.publish_clusters_emf", lambda c: None)
-    process_error_rules(rule, cluster, watcher)
-    assert watcher.metrics["connect_clusters_healthy"] == 1
-    assert watcher.metrics["connect_clusters_unhealthy"] == 0
-    rule.execute.assert_called_once_with(cluster)
-
-def test_process_error_rules_execute_exception(monkeypatch):
-    class FailingRule:
-        def execute(self, cluster):
-            raise Exception("fail")
-    rule = FailingRule()
-    cluster = MagicMock()
-    cluster.emf_config = None
-    watcher = MagicMock()
-    watcher.metrics = {
-        "connect_clusters_healthy": 0,
-        "connect_clusters_unhealthy": 0,
-    }
-    monkeypatch.setattr("kafka_connect_watcher.watcher.LOG", MagicMock())
-    monkeypatch.setattr("kafka_connect_watcher.watcher.publish_clusters_emf", lambda c: None)
-    process_error_rules(rule, cluster, watcher)
-    assert watcher.metrics["connect_clusters_healthy"] == 0
-    assert watcher.metrics["connect_clusters_unhealthy"] == 1
-
-def test_process_error_rules_emf_exception(monkeypatch):
-    rule = MagicMock()
-    cluster = MagicMock()
-    cluster.emf_config = True
-    watcher = MagicMock()
-    watcher.metrics = {
-        "connect_clusters_healthy": 0,
-        "connect_clusters_unhealthy": 0,
-    }
-    monkeypatch.setattr("kafka_connect_watcher.watcher.publish_clusters_emf", lambda c: (_ for _ in ()).throw(Exception("emf fail")))
-    monkeypatch.setattr("kafka_connect_watcher.watcher.LOG", MagicMock())
-    process_error_rules(rule, cluster, watcher)
-    assert watcher.metrics["connect_clusters_healthy"] == 1
-
-def test_process_cluster_runs_rules(monkeypatch):
-    rule = MagicMock()
-    cluster = MagicMock()
-    cluster.handling_rules = [rule]
-    watcher = MagicMock()
-    config = MagicMock()
-    q = Queue()
-    q.put([watcher, config, cluster], False)
-    q.put([watcher, config, None], False)
-    monkeypatch.setattr("kafka_connect_watcher.watcher.process_error_rules", lambda h, c, w: h.execute(c))
-    process_cluster(q)
-    rule.execute.assert_called_once_with(cluster)
-
-def test_process_cluster_breaks_on_none(monkeypatch):
-    watcher = MagicMock()
-    config = MagicMock()
-    q = Queue()
-    q.put([watcher, config, None], False)
-    # Should not raise or hang
-    process_cluster(q)from unittest.mock import MagicMock, patch
+import threading
 from queue import Queue
+from unittest.mock import MagicMock, patch
 
 import pytest
 
+from kafka_connect_watcher.reload import ConfigChanges
+from kafka_connect_watcher.snapshot import ClusterSnapshot
 from kafka_connect_watcher.watcher import Watcher, process_cluster, process_error_rules
 
 # pytest
 
 
-
 class DummyHandlingRule:
     def __init__(self):
         self.executed = False
-    def execute(self, cluster):
+
+    def execute(self, cluster, snapshot, remediation=None, executor=None):
         self.executed = True
+        self.snapshot = snapshot
+
 
 class DummyCluster:
     def __init__(self, name="dummy", emf_config=False):
         self.name = name
         self.emf_config = emf_config
         self.handling_rules = []
+        self.interval = 5
+        self.prometheus_enabled = False
+        self.metrics = {"connectors": {}}
+        self.snapshots_taken = 0
+
+    def get_snapshot(self):
+        self.snapshots_taken += 1
+        return ClusterSnapshot({})
+
     def __str__(self):
         return self.name
 
+
 class DummyWatcher:
     def __init__(self):
+        self.scheduler = MagicMock()
+        self.prometheus_exporter = None
+        self.remediation = None
+        self.evaluation_executor = None
+        self.emf_exporter = MagicMock()
         self.metrics = {
             "connect_clusters_total": 0,
             "connect_clusters_healthy": 0,
             "connect_clusters_unhealthy": 0,
         }
 
+
+def test_watcher_init_sets_metrics():
+    watcher = Watcher()
+    assert watcher.metrics["connect_clusters_total"] == 0
+    assert watcher.metrics["connect_clusters_healthy"] == 0
+    assert watcher.metrics["connect_clusters_unhealthy"] == 0
+    assert watcher.keep_running is True
+    assert hasattr(watcher, "exit_gracefully")
+
+
+@patch("kafka_connect_watcher.watcher.init_emf_config")
+@patch("kafka_connect_watcher.watcher.Config")
+@patch("kafka_connect_watcher.watcher.reload_clusters")
+def test_reload_config_releases_replaced_clusters(
+    reload_clusters_mock, config_mock, init_emf_config_mock
+):
+    watcher = Watcher()
+    watcher.config = MagicMock()
+    watcher.config.config_file_path = "watcher-config.yaml"
+    watcher.scheduler = MagicMock()
+    watcher.prometheus_exporter = MagicMock()
+    removed, changed, kept = MagicMock(), MagicMock(), MagicMock()
+    watcher.clusters = {"removed": removed, "changed": changed, "kept": kept}
+    changes = ConfigChanges()
+    changes.clusters_removed = ["removed"]
+    changes.clusters_changed = ["changed"]
+    reload_clusters_mock.return_value = (
+        {"changed": MagicMock(), "kept": kept},
+        changes,
+    )
+    watcher.reload_config(0)
+    removed.api.close.assert_called_once()
+    changed.api.close.assert_called_once()
+    kept.api.close.assert_not_called()
+    watcher.prometheus_exporter.remove_cluster.assert_called_once_with("removed")
+    assert set(watcher.clusters) == {"changed", "kept"}
+
+
+@patch("kafka_connect_watcher.watcher.ConnectCluster")
+@patch("kafka_connect_watcher.watcher.init_emf_config")
+@patch("kafka_connect_watcher.watcher.handle_watcher_emf")
+@patch("kafka_connect_watcher.watcher.NUM_THREADS", 2)
+def test_watcher_run_main_loop(
+    mock_handle_emf, mock_init_emf, mock_connect_cluster, monkeypatch
+):
+    class DummyConfig:
+        config = {"clusters": [{"hostname": "h1"}, {"hostname": "h2"}]}
+        emf_watcher_config = False
+        scan_intervals = 2
+        notifications_config = {}
+        config_file_path = None
+
+    rule = DummyHandlingRule()
+    dummy_cluster = DummyCluster()
+    dummy_cluster.handling_rules = [rule]
+    mock_connect_cluster.return_value = dummy_cluster
+    watcher = Watcher()
+
+    def stop_after_first_scan(_seconds):
+        watcher.keep_running = False
+
+    monkeypatch.setattr("kafka_connect_watcher.watcher.sleep", stop_after_first_scan)
+    watcher.run(DummyConfig())
+    assert watcher.metrics["connect_clusters_total"] == 2
+    assert rule.executed
+    assert not any(_thread.is_alive() for _thread in watcher._threads)
+    assert watcher.remediation.keep_running is False
+    assert watcher.remediation.notifications is watcher.notifications
+    assert watcher.notifications.keep_running is False
+    assert watcher.emf_exporter.keep_running is False
+
+
+def test_exit_gracefully_only_sets_flag():
+    watcher = Watcher()
+    watcher._threads = [MagicMock(), MagicMock()]
+    watcher.exit_gracefully(15, None)
+    assert watcher.keep_running is False
+    assert watcher.connect_clusters_processing_queue.qsize() == 0
+    watcher.stop_workers()
+    watcher.stop_workers()
+    assert watcher.connect_clusters_processing_queue.qsize() == 2
+
+
 def test_process_error_rules_success(monkeypatch):
     rule = DummyHandlingRule()
     cluster = DummyCluster()
     watcher = DummyWatcher()
-    monkeypatch.setattr("kafka_connect_watcher.watcher.publish_clusters_emf", lambda c: None)
-    process_error_rules(rule, cluster, watcher)
+    process_error_rules(rule, cluster, watcher, ClusterSnapshot({}))
     assert watcher.metrics["connect_clusters_healthy"] == 1
     assert watcher.metrics["connect_clusters_unhealthy"] == 0
     assert rule.executed
 
+
 def test_process_error_rules_execute_exception(monkeypatch):
     class FailingRule(DummyHandlingRule):
-        def execute(self, cluster):
+        def execute(self, cluster, snapshot, remediation=None):
             raise Exception("fail")
+
     rule = FailingRule()
     cluster = DummyCluster()
     watcher = DummyWatcher()
     monkeypatch.setattr("kafka_connect_watcher.watcher.LOG", MagicMock())
-    monkeypatch.setattr("kafka_connect_watcher.watcher.publish_clusters_emf", lambda c: None)
-    process_error_rules(rule, cluster, watcher)
+    process_error_rules(rule, cluster, watcher, ClusterSnapshot({}))
     assert watcher.metrics["connect_clusters_healthy"] == 0
     assert watcher.metrics["connect_clusters_unhealthy"] == 1
 
-def test_process_error_rules_emf_exception(monkeypatch):
-    rule = DummyHandlingRule()
-    cluster = DummyCluster(emf_config=True)
-    watcher = DummyWatcher()
-    monkeypatch.setattr("kafka_connect_watcher.watcher.publish_clusters_emf", lambda c: (_ for _ in ()).throw(Exception("emf fail")))
-    monkeypatch.setattr("kafka_connect_watcher.watcher.LOG", MagicMock())
-    process_error_rules(rule, cluster, watcher)
-    assert watcher.metrics["connect_clusters_healthy"] == 1
 
 def test_process_cluster_runs_rules(monkeypatch):
     rule = DummyHandlingRule()
+    other_rule = DummyHandlingRule()
     cluster = DummyCluster()
-    cluster.handling_rules = [rule]
+    cluster.handling_rules = [rule, other_rule]
     watcher = DummyWatcher()
     config = MagicMock()
     q = Queue()
     q.put([watcher, config, cluster], False)
-    monkeypatch.setattr("kafka_connect_watcher.watcher.process_error_rules", lambda h, c, w: h.execute(c))
-    # Should not raise
+    q.put([watcher, config, None], False)
+    monkeypatch.setattr(
+        "kafka_connect_watcher.watcher.process_error_rules",
+        lambda h, c, w, s: h.execute(c, s),
+    )
     process_cluster(q)
-    assert rule.executed
+    assert rule.executed and other_rule.executed
+    watcher.emf_exporter.submit.assert_called_once_with(cluster)
+    assert cluster.snapshots_taken == 1
+    assert rule.snapshot is other_rule.snapshot
+    watcher.scheduler.done.assert_called_once_with(cluster)
+    q.join()
 
-def test_process_cluster_breaks_on_none(monkeypatch):
+
+def test_process_cluster_snapshot_failure():
+    rule = DummyHandlingRule()
+    cluster = DummyCluster()
+    cluster.handling_rules = [rule]
+    cluster.get_snapshot = MagicMock(side_effect=Exception("unreachable"))
     watcher = DummyWatcher()
-    config = MagicMock()
     q = Queue()
-    q.put([watcher, config, None], False)
-    # Should not raise or hang
+    q.put([watcher, MagicMock(), cluster], False)
+    q.put([watcher, MagicMock(), None], False)
     process_cluster(q)
+    assert not rule.executed
+    assert watcher.metrics["connect_clusters_unhealthy"] == 1
+    watcher.scheduler.done.assert_called_once_with(cluster)
+    q.join()
 
-def test_exit_gracefully_sets_flag_and_exits(monkeypatch):
-    watcher = Watcher()
-    monkeypatch.setattr("builtins.exit", lambda code=0: (_ for _ in ()).throw(SystemExit(code)))
-    with pytest.raises(SystemExit):
-        watcher.exit_gracefully(1, "signal")
-    assert watcher.keep_running is False
 
-def test_watcher_init_sets_metrics():
-    watcher = Watcher()
-    assert watcher.metrics["connect_clusters_total"] == 0
-    assert watcher.metrics["connect_clusters_healthy"] == 0
-    assert watcher.metrics["connect_clusters_unhealthy"] == 0
+def test_process_cluster_breaks_on_none():
+    q = Queue()
+    q.put([None, None, None], False)
+    # Should not raise or hang
+    process_cluster(q)
+    q.join()
 
-@patch("kafka_connect_watcher.watcher.ConnectCluster")
-@patch("kafka_connect_watcher.watcher.init_emf_config")
-@patch("kafka_connect_watcher.watcher.handle_watcher_emf")
-@patch("kafka_connect_watcher.watcher.NUM_THREADS", 1)
-def test_watcher_run_main_loop(mock_handle_emf, mock_init_emf, mock_connect_cluster, monkeypatch):
-    # Setup dummy config and cluster
-    class DummyConfig:
-        config = {"clusters": [1]}
-        emf_watcher_config = False
-        scan_intervals = 1
-    dummy_cluster = MagicMock()
-    mock_connect_cluster.return_value = dummy_cluster
-    watcher = Watcher()
-    # Patch threading.Thread to run target immediately
-    def fake_thread(target, daemon, args):
-        class DummyThread:
-            def start(self):
-                # Put a dummy cluster and then break
-                args[0].put([watcher, DummyConfig(), dummy_cluster], False)
-                args[0].put([watcher, DummyConfig(), None], False)
-                target(args[0])
-            def join(self): pass
-        return DummyThread()
-    monkeypatch.setattr("threading.Thread", fake_thread)
-    monkeypatch.setattr("kafka_connect_watcher.watcher.process_cluster", lambda q: None)
-    watcher.run(DummyConfig())
-    assert watcher.metrics["connect_clusters_total"] == 1
+
+def test_process_cluster_waits_on_empty_queue(monkeypatch):
+    monkeypatch.setattr("kafka_connect_watcher.watcher.QUEUE_GET_TIMEOUT", 0.01)
+    q = Queue()
+    worker = threading.Thread(target=process_cluster, args=(q,), daemon=True)
+    worker.start()
+    worker.join(0.1)
+    assert worker.is_alive()
+    q.put([None, None, None], False)
+    worker.join(1)
+    assert not worker.is_alive()